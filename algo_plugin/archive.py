@@ -0,0 +1,156 @@
+import os
+import json
+import mmap
+import zipfile
+from algo_plugin.build_cache import member_data_offset
+
+ASSETS_DIR = 'assets/'
+
+def archive_root(names, archive_path=''):
+    """
+    Return the folder prefix a plugin archive keeps its files under: '' when manifest.json is
+    at the root, or 'name/' when the archive holds a single plugin folder.
+    """
+    if 'manifest.json' in names:
+        return ''
+    nested = [name for name in names if name.count('/') == 1 and name.endswith('/manifest.json')]
+    if len(nested) != 1:
+        raise ValueError(f"No manifest.json found in '{archive_path}'")
+    return nested[0][:-len('manifest.json')]
+
+class DirectoryAssets:
+    """Assets of an unpacked plugin: the files under its assets/ directory."""
+
+    def __init__(self, plugin_dir):
+        self.root = os.path.join(plugin_dir, ASSETS_DIR)
+
+    def names(self):
+        """Asset paths relative to assets/, with '/' separators, sorted."""
+        if not os.path.isdir(self.root):
+            return []
+        names = []
+        for dirpath, _, filenames in os.walk(self.root):
+            relative = os.path.relpath(dirpath, self.root)
+            for filename in filenames:
+                names.append(filename if relative == '.' else f"{relative.replace(os.sep, '/')}/{filename}")
+        return sorted(names)
+
+    def _path(self, name):
+        return os.path.join(self.root, *name.split('/'))
+
+    def open(self, name):
+        return open(self._path(name), 'rb')
+
+    def read(self, name):
+        with self.open(name) as file:
+            return file.read()
+
+    def view(self, name):
+        return memoryview(self.read(name))
+
+    def close(self):
+        pass
+
+class ArchiveAssets:
+    """
+    Assets of a plugin archive, read lazily without extracting anything. open() streams a
+    member (decompressing as it is read); view() returns a memoryview, which for STORED
+    members is a zero-copy slice of the memory-mapped archive. Release views before close().
+    """
+
+    def __init__(self, archive_path, zip_file=None, root=None):
+        self.archive_path = archive_path
+        self.zip_file = zip_file or zipfile.ZipFile(archive_path, 'r')
+        self.root = archive_root(self.zip_file.namelist(), archive_path) if root is None else root
+        self._prefix = self.root + ASSETS_DIR
+        self._file = None
+        self._map = None
+
+    def names(self):
+        prefix = self._prefix
+        return sorted(name[len(prefix):] for name in self.zip_file.namelist()
+                      if name.startswith(prefix) and not name.endswith('/'))
+
+    def _info(self, name):
+        try:
+            return self.zip_file.getinfo(self._prefix + name)
+        except KeyError:
+            raise FileNotFoundError(f"No asset '{name}' in '{self.archive_path}'")
+
+    def open(self, name):
+        return self.zip_file.open(self._info(name))
+
+    def read(self, name):
+        return self.zip_file.read(self._info(name))
+
+    def view(self, name):
+        info = self._info(name)
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            return memoryview(self.zip_file.read(info))
+        if self._map is None:
+            self._file = open(self.archive_path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        offset = member_data_offset(self._file, info)
+        return memoryview(self._map)[offset:offset + info.file_size]
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # A view is still alive; the map is released when it is garbage collected.
+                pass
+            self._file.close()
+            self._map = self._file = None
+
+class PluginArchive:
+    """An open plugin archive: its manifest, the files it ships, and its assets."""
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        self.zip_file = zipfile.ZipFile(archive_path, 'r')
+        self.names = self.zip_file.namelist()
+        self.root = archive_root(self.names, archive_path)
+        self.assets = ArchiveAssets(archive_path, self.zip_file, self.root)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.assets.close()
+        self.zip_file.close()
+
+    @property
+    def import_path(self):
+        """The sys.path entry zipimport needs to import the plugin's modules, e.g. 'plugin.zip/plugin/'."""
+        return os.path.join(self.archive_path, self.root) if self.root else self.archive_path
+
+    def read(self, name):
+        return self.zip_file.read(self.root + name)
+
+    def manifest(self):
+        return json.loads(self.read('manifest.json').decode('utf-8'))
+
+    def local_module_names(self):
+        """Top-level modules and packages in the archive root, like loader._local_module_names."""
+        names = set()
+        for name in self.names:
+            if not name.startswith(self.root):
+                continue
+            parts = name[len(self.root):].split('/')
+            if len(parts) == 1 and parts[0].endswith('.py'):
+                names.add(parts[0][:-3])
+            elif len(parts) == 2 and parts[1] == '__init__.py':
+                names.add(parts[0])
+        return names
+
+    def module_source(self, module_name):
+        """Return (member name, source bytes) of a module in the archive, or raise KeyError."""
+        base = self.root + module_name.replace('.', '/')
+        for candidate in (base + '.py', base + '/__init__.py'):
+            if candidate in self.names:
+                return candidate, self.zip_file.read(candidate)
+        raise KeyError(module_name)
@@ -0,0 +1,205 @@
+import os
+import json
+import hashlib
+from algo_plugin.build_cache import PLUGIN_FILES_DIR, cache_entry_name, file_sha256
+
+COMPILED_DIR = '_compiled'
+INDEX_NAME = 'index.json'
+INDEX_VERSION = 1
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tga', '.webp'}
+SOUND_EXTENSIONS = {'.wav', '.ogg', '.mp3', '.flac'}
+# Images no larger than this in either dimension are packed into atlases.
+MAX_SPRITE_SIZE = 256
+ATLAS_SIZE = 2048
+ATLAS_PADDING = 1
+# Every sound is converted to this format; hosts init pygame.mixer with it to play them.
+SOUND_FREQUENCY = 44100
+SOUND_SIZE = -16
+SOUND_CHANNELS = 2
+
+def _init_pygame(need_sound):
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+    try:
+        import pygame
+    except ImportError:
+        raise RuntimeError("Precompiling assets needs pygame (pip install pygame)")
+    if need_sound and pygame.mixer.get_init() != (SOUND_FREQUENCY, SOUND_SIZE, SOUND_CHANNELS):
+        pygame.mixer.quit()
+        pygame.mixer.init(frequency=SOUND_FREQUENCY, size=SOUND_SIZE, channels=SOUND_CHANNELS)
+    return pygame
+
+def find_assets(plugin_dir):
+    """Return (name, path, kind) for every image and sound under plugin_dir/assets, sorted by name."""
+    assets_dir = os.path.join(plugin_dir, 'assets')
+    found = []
+    for folder_name, subfolders, filenames in os.walk(assets_dir):
+        subfolders[:] = [d for d in subfolders if d != COMPILED_DIR]
+        for filename in filenames:
+            path = os.path.join(folder_name, filename)
+            name = os.path.relpath(path, assets_dir).replace(os.sep, '/')
+            extension = os.path.splitext(filename)[1].lower()
+            if extension in IMAGE_EXTENSIONS:
+                found.append((name, path, 'image'))
+            elif extension in SOUND_EXTENSIONS:
+                found.append((name, path, 'sound'))
+    return sorted(found)
+
+def pack_shelves(sizes, atlas_size=ATLAS_SIZE, padding=ATLAS_PADDING):
+    """
+    Place rectangles in atlases with a shelf packer, tallest first.
+    :param sizes: {name: (width, height)}, each at most atlas_size.
+    :return: ({name: (atlas index, x, y)}, [(width, height) used by each atlas]).
+    """
+    placements, atlases = {}, []
+    x = y = shelf_height = 0
+    order = sorted(sizes, key=lambda name: (-sizes[name][1], -sizes[name][0], name))
+    for name in order:
+        width, height = sizes[name]
+        if x + width > atlas_size:
+            x, y, shelf_height = 0, y + shelf_height + padding, 0
+        if not atlases or y + height > atlas_size:
+            atlases.append([0, 0])
+            x = y = shelf_height = 0
+        placements[name] = (len(atlases) - 1, x, y)
+        atlases[-1][0] = max(atlases[-1][0], x + width)
+        atlases[-1][1] = max(atlases[-1][1], y + height)
+        x += width + padding
+        shelf_height = max(shelf_height, height)
+    return placements, [tuple(size) for size in atlases]
+
+def _sources_key(assets):
+    digest = hashlib.sha256(f'{INDEX_VERSION}:{MAX_SPRITE_SIZE}:{ATLAS_SIZE}'.encode('utf-8'))
+    for name, path, kind in assets:
+        digest.update(f'{name}\0{kind}\0{file_sha256(path)}\0'.encode('utf-8'))
+    return digest.hexdigest()
+
+def _current_index(output_dir, sources_key):
+    try:
+        with open(os.path.join(output_dir, INDEX_NAME), 'r') as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if index.get('sources') != sources_key:
+        return None
+    files = [entry['file'] for section in ('images', 'sounds') for entry in index.get(section, {}).values()]
+    if not all(os.path.exists(os.path.join(output_dir, name)) for name in files):
+        return None
+    return index
+
+def compiled_assets_dir(cache_dir, cache_key):
+    """
+    Where the build cache keeps a plugin's precompiled assets between builds. Like the plugin's
+    cache entry it is named by cache_key, so it doesn't depend on the checkout path, and
+    prune_cache removes it with the entry.
+    """
+    return os.path.join(cache_dir, PLUGIN_FILES_DIR, cache_entry_name(cache_key))
+
+def precompile_assets(plugin_dir, output_dir):
+    """
+    Decode a plugin's images and sounds once, into raw buffers that load without decoding.
+    Images become RGBA pixels; those up to MAX_SPRITE_SIZE are packed into ATLAS_SIZE texture
+    atlases. Sounds are converted to 16-bit signed stereo PCM at SOUND_FREQUENCY. Everything is
+    written to output_dir with an index.json mapping each original asset name to its buffer
+    file (and rectangle in the atlas). Nothing is rebuilt while the source assets are unchanged.
+    :return: (index dict, [(arcname, path)] of the files to add under assets/_compiled/), or
+        (None, []) when the plugin has no images or sounds.
+    """
+    assets = find_assets(plugin_dir)
+    if not assets:
+        return None, []
+    sources_key = _sources_key(assets)
+    index = _current_index(output_dir, sources_key)
+    if index is None:
+        index = _compile(assets, output_dir, sources_key)
+    names = [INDEX_NAME] + sorted({entry['file'] for section in ('images', 'sounds')
+                                   for entry in index[section].values()})
+    return index, [(f'assets/{COMPILED_DIR}/{name}', os.path.join(output_dir, name)) for name in names]
+
+def _write(output_dir, name, data):
+    with open(os.path.join(output_dir, name), 'wb') as file:
+        file.write(data)
+
+def _compile(assets, output_dir, sources_key):
+    pygame = _init_pygame(any(kind == 'sound' for _, _, kind in assets))
+    os.makedirs(output_dir, exist_ok=True)
+    for stale in os.listdir(output_dir):
+        os.remove(os.path.join(output_dir, stale))
+    index = {'version': INDEX_VERSION, 'sources': sources_key, 'images': {}, 'sounds': {}}
+
+    images, sprites = {}, {}
+    for name, path, kind in assets:
+        if kind == 'image':
+            surface = pygame.image.load(path)
+            images[name] = surface
+            if surface.get_width() <= MAX_SPRITE_SIZE and surface.get_height() <= MAX_SPRITE_SIZE:
+                sprites[name] = surface.get_size()
+        else:
+            raw = pygame.mixer.Sound(path).get_raw()
+            file_name = f'sound-{len(index["sounds"])}.pcm'
+            _write(output_dir, file_name, raw)
+            index['sounds'][name] = {'file': file_name, 'frequency': SOUND_FREQUENCY, 'size': SOUND_SIZE,
+                                     'channels': SOUND_CHANNELS}
+
+    placements, atlas_sizes = pack_shelves(sprites)
+    atlases = [pygame.Surface(size, pygame.SRCALPHA, 32) for size in atlas_sizes]
+    for atlas in atlases:
+        atlas.fill((0, 0, 0, 0))
+    for name, surface in images.items():
+        width, height = surface.get_size()
+        if name in placements:
+            atlas_index, x, y = placements[name]
+            atlases[atlas_index].blit(surface, (x, y))
+            index['images'][name] = {'file': f'atlas-{atlas_index}.rgba', 'size': list(atlas_sizes[atlas_index]),
+                                     'rect': [x, y, width, height]}
+        else:
+            file_name = f'image-{len(index["images"])}.rgba'
+            _write(output_dir, file_name, pygame.image.tobytes(surface, 'RGBA'))
+            index['images'][name] = {'file': file_name, 'size': [width, height], 'rect': [0, 0, width, height]}
+    for atlas_index, atlas in enumerate(atlases):
+        _write(output_dir, f'atlas-{atlas_index}.rgba', pygame.image.tobytes(atlas, 'RGBA'))
+
+    with open(os.path.join(output_dir, INDEX_NAME), 'w') as file:
+        json.dump(index, file, indent=2, sort_keys=True)
+    return index
+
+class CompiledAssets:
+    """
+    Runtime side of precompile_assets(): loads images and sounds from the raw buffers in
+    assets/_compiled/ with pygame.image.frombuffer and pygame.mixer.Sound(buffer=...), without
+    decoding. Each atlas or file is read once and atlas images are subsurfaces of it.
+    :param assets: A plugin's assets (spec.assets), from a directory or an archive.
+    """
+
+    def __init__(self, assets):
+        self.assets = assets
+        self.index = json.loads(bytes(assets.read(f'{COMPILED_DIR}/{INDEX_NAME}')).decode('utf-8'))
+        self._buffers = {}
+
+    def __contains__(self, name):
+        return name in self.index['images'] or name in self.index['sounds']
+
+    def _surface(self, file_name, size):
+        import pygame
+        surface = self._buffers.get(file_name)
+        if surface is None:
+            # frombuffer shares memory with its buffer and surfaces may be drawn on, so it gets
+            # a private copy (a plain memcpy from the archive map) that lives as long as it does.
+            data = bytearray(self.assets.view(f'{COMPILED_DIR}/{file_name}'))
+            surface = self._buffers[file_name] = (pygame.image.frombuffer(data, tuple(size), 'RGBA'), data)
+        return surface[0]
+
+    def image(self, name):
+        """The image as a Surface; atlas images are subsurfaces sharing the atlas pixels."""
+        entry = self.index['images'][name]
+        surface = self._surface(entry['file'], entry['size'])
+        if list(entry['rect']) == [0, 0] + list(entry['size']):
+            return surface
+        return surface.subsurface(entry['rect'])
+
+    def sound(self, name):
+        """The sound as a pygame.mixer.Sound; the mixer must be initialised with the compiled format."""
+        import pygame
+        entry = self.index['sounds'][name]
+        return pygame.mixer.Sound(buffer=self.assets.read(f'{COMPILED_DIR}/{entry["file"]}'))
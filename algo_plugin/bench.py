@@ -0,0 +1,201 @@
+import os
+import sys
+import json
+import time
+
+DEFAULT_FRAMES = 600
+DEFAULT_WARMUP = 10
+DEFAULT_SIZE = (600, 600)
+DEFAULT_TOLERANCE = 0.10
+# Frame times this small are dominated by noise; regressions under it are ignored.
+NOISE_FLOOR_MS = 0.05
+FRAME_TIME = 1.0 / 60
+
+def default_script():
+    """
+    A 120-frame script exercising the usual plugin inputs: label keys and mouse clicks spread
+    over the window, then the classifier (L, F, S) and retrain (R) keys the probability
+    playground handles, retraining after each switch. Frames without events still run
+    update and draw.
+    """
+    events = []
+    for index in range(10):
+        frame = index * 4
+        events.append({'frame': frame, 'type': 'KEYDOWN', 'key': 'K_1' if index % 2 == 0 else 'K_2'})
+        events.append({'frame': frame + 1, 'type': 'MOUSEBUTTONDOWN', 'button': 1,
+                       'pos': [60 + (index * 53) % 480, 80 + (index * 97) % 440]})
+    for frame, key in [(50, 'K_l'), (55, 'K_r'), (70, 'K_f'), (75, 'K_r'), (90, 'K_s'), (95, 'K_r')]:
+        events.append({'frame': frame, 'type': 'KEYDOWN', 'key': key})
+    return {'frames': 120, 'events': events}
+
+def load_script(script_path):
+    """
+    Load an event script: {"frames": N, "events": [{"frame": i, "type": "KEYDOWN", "key": "K_r"}, ...]}.
+    Event attributes are passed to pygame.event.Event; 'key' may be a pygame key name.
+    The script repeats every N frames.
+    """
+    with open(script_path, 'r') as file:
+        script = json.load(file)
+    if not isinstance(script.get('events'), list):
+        raise ValueError(f"Event script '{script_path}' has no 'events' list")
+    frames = max([event.get('frame', 0) for event in script['events']] + [0]) + 1
+    script.setdefault('frames', frames)
+    return script
+
+class EventRecorder:
+    """
+    Records the events a host feeds a plugin, frame by frame, in the event script format.
+    Call record() once per frame with that frame's events and save() at the end.
+    """
+
+    ATTRIBUTES = ['key', 'pos', 'button', 'rel', 'buttons', 'unicode', 'mod', 'x', 'y']
+
+    def __init__(self):
+        self.frame = 0
+        self.events = []
+
+    def record(self, events):
+        import pygame
+        for event in events:
+            entry = {'frame': self.frame, 'type': pygame.event.event_name(event.type).upper()}
+            for attribute in self.ATTRIBUTES:
+                if hasattr(event, attribute):
+                    value = getattr(event, attribute)
+                    entry[attribute] = list(value) if isinstance(value, tuple) else value
+            self.events.append(entry)
+        self.frame += 1
+
+    def save(self, script_path):
+        with open(script_path, 'w') as file:
+            json.dump({'frames': self.frame, 'events': self.events}, file, indent=2)
+
+def _event_types(pygame):
+    # pygame.event.event_name gives e.g. 'MouseButtonDown'; scripts use the constant names.
+    return {name: getattr(pygame, name) for name in dir(pygame) if name.isupper() and not name.startswith('K_')}
+
+def build_frames(script):
+    """Turn a script into one list of pygame events per script frame."""
+    import pygame
+    types = _event_types(pygame)
+    frames = [[] for _ in range(script['frames'])]
+    for entry in script['events']:
+        attributes = dict(entry)
+        frame = attributes.pop('frame', 0)
+        type_name = attributes.pop('type')
+        if type_name not in types:
+            raise ValueError(f"Unknown pygame event type '{type_name}'")
+        if isinstance(attributes.get('key'), str):
+            attributes['key'] = getattr(pygame, attributes['key'])
+        if 'pos' in attributes:
+            attributes['pos'] = tuple(attributes['pos'])
+        if types[type_name] in (pygame.KEYDOWN, pygame.KEYUP):
+            attributes.setdefault('mod', 0)
+            attributes.setdefault('unicode', '')
+            attributes.setdefault('scancode', 0)
+        frames[frame % script['frames']].append(pygame.event.Event(types[type_name], attributes))
+    return frames
+
+def percentile(sorted_values, fraction):
+    """Linearly interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def summarize(times_ns, blocks):
+    times_ms = sorted(value / 1e6 for value in times_ns)
+    blocks = sorted(blocks)
+    return {
+        'calls': len(times_ms),
+        'mean_ms': sum(times_ms) / len(times_ms) if times_ms else 0.0,
+        'p50_ms': percentile(times_ms, 0.50),
+        'p95_ms': percentile(times_ms, 0.95),
+        'p99_ms': percentile(times_ms, 0.99),
+        'max_ms': times_ms[-1] if times_ms else 0.0,
+        'mean_net_blocks': sum(blocks) / len(blocks) if blocks else 0.0,
+        'p95_net_blocks': percentile(blocks, 0.95),
+    }
+
+def run_benchmark(plugin_dir, script=None, frames=DEFAULT_FRAMES, warmup=DEFAULT_WARMUP, size=DEFAULT_SIZE):
+    """
+    Run a plugin headless and time its update and draw calls.
+    The plugin draws onto an offscreen surface with the SDL dummy video driver. Events come
+    from script (default_script() if None), repeated until frames frames have run; the
+    first warmup frames are not counted.
+    :return: Result dict with 'update' and 'draw' summaries: p50/p95/p99/mean/max in ms, and
+        the net change in live memory blocks per call (sys.getallocatedblocks), which is not
+        a count of allocations.
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    import pygame
+    from algo_plugin.loader import discover_plugin
+
+    pygame.display.init()
+    pygame.font.init()
+    pygame.display.set_mode(size)
+    surface = pygame.Surface(size)
+
+    spec = discover_plugin(plugin_dir)
+    plugin = spec.activate(screen=surface)
+    script_frames = build_frames(script or default_script())
+
+    update_ns, draw_ns, update_blocks, draw_blocks = [], [], [], []
+    clock = time.perf_counter_ns
+    allocated_blocks = sys.getallocatedblocks
+    for frame in range(warmup + frames):
+        events = script_frames[frame % len(script_frames)]
+
+        blocks = allocated_blocks()
+        start = clock()
+        plugin.update(events, FRAME_TIME)
+        update_time = clock() - start
+        update_block_delta = allocated_blocks() - blocks
+
+        blocks = allocated_blocks()
+        start = clock()
+        plugin.draw(surface)
+        draw_time = clock() - start
+        draw_block_delta = allocated_blocks() - blocks
+
+        if frame >= warmup:
+            update_ns.append(update_time)
+            draw_ns.append(draw_time)
+            update_blocks.append(update_block_delta)
+            draw_blocks.append(draw_block_delta)
+
+    return {
+        'plugin': spec.name,
+        'path': plugin_dir,
+        'frames': frames,
+        'warmup': warmup,
+        'update': summarize(update_ns, update_blocks),
+        'draw': summarize(draw_ns, draw_blocks),
+    }
+
+def compare_to_baseline(result, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return a message for every p50/p95/p99 frame time more than tolerance slower than the baseline."""
+    regressions = []
+    for phase in ('update', 'draw'):
+        for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+            before = baseline.get(phase, {}).get(key)
+            after = result[phase][key]
+            if before is None:
+                continue
+            if after > before * (1 + tolerance) and after - before > NOISE_FLOOR_MS:
+                regressions.append(f"{phase} {key[:-3]} went from {before:.3f} ms to {after:.3f} ms "
+                                   f"(+{(after / before - 1) * 100 if before else float('inf'):.0f}%)")
+    return regressions
+
+def format_result(result):
+    lines = [f"Plugin: {result['plugin']} ({result['path']}), {result['frames']} frames after {result['warmup']} warmup frames",
+             f"{'':8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'net blocks':>13}"]
+    for phase in ('update', 'draw'):
+        summary = result[phase]
+        lines.append(f"{phase:8}{summary['p50_ms']:10.3f}{summary['p95_ms']:10.3f}{summary['p99_ms']:10.3f}"
+                     f"{summary['max_ms']:10.3f}{summary['mean_net_blocks']:13.1f}")
+    for regression in result.get('regressions', []):
+        lines.append(f"Regression: {regression}")
+    return '\n'.join(lines)
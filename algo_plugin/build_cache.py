@@ -0,0 +1,352 @@
+import os
+import sys
+import json
+import shutil
+import struct
+import hashlib
+import zipfile
+import tempfile
+from algo_plugin.compression import AUTO, CompressionPolicy
+
+# Every archive member gets the same timestamp and permissions so that building the
+# same files twice gives byte-for-byte identical archives.
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+FIXED_FILE_MODE = 0o644
+CACHE_VERSION = 2
+# Subdirectory of the build cache other build steps keep per-plugin files in, one folder per
+# cache entry, named by cache_entry_name(); see assets.compiled_assets_dir().
+PLUGIN_FILES_DIR = 'assets'
+
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+# Python versions whose ZipFile internals write_raw_member has been checked against,
+# from the first up to but not including the second.
+RAW_WRITE_PYTHON = ((3, 8), (3, 14))
+_RAW_WRITE_ATTRIBUTES = ('fp', 'start_dir', 'filelist', 'NameToInfo', '_writecheck', '_didModify', '_writing')
+
+def collect_files(directory_path):
+    """Return (arcname, path) pairs for every file under directory_path, sorted by arcname."""
+    files = []
+    for folder_name, subfolders, filenames in os.walk(directory_path):
+        for filename in filenames:
+            file_path = os.path.join(folder_name, filename)
+            arcname = os.path.relpath(file_path, directory_path).replace(os.sep, '/')
+            files.append((arcname, file_path))
+    return sorted(files)
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_zipinfo(arcname, compress_type):
+    zinfo = zipfile.ZipInfo(arcname, date_time=FIXED_DATE_TIME)
+    zinfo.compress_type = compress_type
+    zinfo.create_system = 3
+    zinfo.external_attr = (0o100000 | FIXED_FILE_MODE) << 16
+    return zinfo
+
+def member_data_offset(fp, zinfo):
+    """Return the offset of the (possibly compressed) data of zinfo in the archive file fp."""
+    fp.seek(zinfo.header_offset)
+    header = fp.read(_LOCAL_HEADER_SIZE)
+    if len(header) != _LOCAL_HEADER_SIZE or header[:4] != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local file header for member '{zinfo.filename}'")
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    return zinfo.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length
+
+def read_raw_member(fp, zinfo):
+    """Return the stored bytes of zinfo exactly as they are in the archive, without decompressing."""
+    fp.seek(member_data_offset(fp, zinfo))
+    return fp.read(zinfo.compress_size)
+
+def raw_writes_supported(zip_file):
+    """
+    Whether write_raw_member can be used on zip_file. It relies on ZipFile internals, so it is
+    only used on the Python versions in RAW_WRITE_PYTHON; callers write members the normal way
+    otherwise.
+    """
+    low, high = RAW_WRITE_PYTHON
+    if not low <= sys.version_info[:2] < high:
+        return False
+    return all(hasattr(zip_file, name) for name in _RAW_WRITE_ATTRIBUTES) and not zip_file._writing
+
+def write_raw_member(zip_file, zinfo, raw_data):
+    """
+    Append an already-compressed member to zip_file.
+    zinfo must carry the CRC, file_size, compress_size and compress_type of raw_data.
+    The header written is the same one ZipFile.writestr would write for the same member.
+    Check raw_writes_supported(zip_file) first.
+    """
+    if not raw_writes_supported(zip_file):
+        raise RuntimeError(f"Raw zip members can't be written on Python {sys.version_info[0]}.{sys.version_info[1]}")
+    # ZipFile has no public API for raw members; this mirrors ZipFile._open_to_write.
+    zinfo.flag_bits = 0x02 if zinfo.compress_type == zipfile.ZIP_LZMA else 0x00
+    zip64 = zinfo.file_size * 1.05 > zipfile.ZIP64_LIMIT
+    zip_file.fp.seek(zip_file.start_dir)
+    zinfo.header_offset = zip_file.fp.tell()
+    zip_file._writecheck(zinfo)
+    zip_file._didModify = True
+    zip_file.fp.write(zinfo.FileHeader(zip64))
+    zip_file.fp.write(raw_data)
+    zip_file.start_dir = zip_file.fp.tell()
+    zip_file.filelist.append(zinfo)
+    zip_file.NameToInfo[zinfo.filename] = zinfo
+
+def plugin_cache_key(directory_path):
+    """
+    Default name of a plugin's cache entry: the name in its manifest, or else its folder name.
+    Unlike its absolute path, this is the same in every checkout, so a cache restored on CI hits.
+    """
+    try:
+        with open(os.path.join(directory_path, 'manifest.json'), 'r') as file:
+            name = json.load(file).get('name')
+    except (OSError, ValueError, AttributeError):
+        name = None
+    if isinstance(name, str) and name:
+        return name
+    return os.path.basename(os.path.normpath(os.path.abspath(directory_path)))
+
+def cache_entry_name(cache_key):
+    """File-system safe name of the cache entry for cache_key (see plugin_cache_key)."""
+    return hashlib.sha256(cache_key.encode('utf-8')).hexdigest()[:32]
+
+def _entry_path(cache_dir, cache_key):
+    return os.path.join(cache_dir, 'entries', cache_entry_name(cache_key) + '.json')
+
+def _object_path(cache_dir, archive_sha256):
+    return os.path.join(cache_dir, 'objects', archive_sha256 + '.zip')
+
+def _load_entry(entry_path):
+    try:
+        with open(entry_path, 'r') as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if entry.get('cache_version') != CACHE_VERSION:
+        return None
+    return entry
+
+def _atomic_write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+def _atomic_copy(source, destination):
+    directory = os.path.dirname(os.path.abspath(destination))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    shutil.copyfile(source, temp_path)
+    os.replace(temp_path, destination)
+
+def _hash_members(files, previous_members):
+    # Reuse the recorded hash of a file whose size and mtime haven't changed.
+    members = {}
+    for arcname, file_path in files:
+        stat = os.stat(file_path)
+        previous = previous_members.get(arcname)
+        if previous and previous['size'] == stat.st_size and previous['mtime_ns'] == stat.st_mtime_ns:
+            sha256 = previous['sha256']
+        else:
+            sha256 = file_sha256(file_path)
+        members[arcname] = {'sha256': sha256, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    return members
+
+def _choose_compression(files, members, policy, previous_members, reuse_auto):
+    for arcname, file_path in files:
+        member = members[arcname]
+        method = policy.method_for(arcname, member['size'])
+        previous = previous_members.get(arcname)
+        if method == AUTO and reuse_auto and previous and previous['sha256'] == member['sha256']:
+            # Same content under the same policy: the sampled decision can't have changed.
+            method = previous['compress_type'], previous['compresslevel']
+        elif method == AUTO:
+            method = policy.sample(file_path)
+        member['compress_type'], member['compresslevel'] = method
+
+def _build_key(members):
+    digest = hashlib.sha256()
+    digest.update(f'algo-plugin build cache v{CACHE_VERSION}\n'.encode('utf-8'))
+    for arcname in sorted(members):
+        member = members[arcname]
+        digest.update(f"{arcname}\0{member['sha256']}\0{member['compress_type']}\0{member['compresslevel']}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def _output_is_current(output_zip_path, entry):
+    try:
+        stat = os.stat(output_zip_path)
+    except OSError:
+        return False
+    output = entry.get('outputs', {}).get(os.path.abspath(output_zip_path))
+    return bool(output) and output == [stat.st_size, stat.st_mtime_ns]
+
+def _record_output(entry, output_zip_path):
+    stat = os.stat(output_zip_path)
+    entry.setdefault('outputs', {})[os.path.abspath(output_zip_path)] = [stat.st_size, stat.st_mtime_ns]
+
+def _write_archive(output_zip_path, files, members, previous_archive, previous_members):
+    # Members whose content and compression settings match the previous build are copied
+    # over still compressed; everything else is compressed again.
+    reused = compressed = 0
+    previous_zip = previous_fp = None
+    if previous_archive:
+        try:
+            previous_zip = zipfile.ZipFile(previous_archive, 'r')
+            previous_fp = open(previous_archive, 'rb')
+        except (OSError, zipfile.BadZipFile):
+            previous_zip = previous_fp = None
+
+    directory = os.path.dirname(os.path.abspath(output_zip_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(temp_path, 'w') as zip_file:
+            reuse = previous_zip is not None and raw_writes_supported(zip_file)
+            for arcname, file_path in files:
+                member = members[arcname]
+                zinfo = make_zipinfo(arcname, member['compress_type'])
+                previous = previous_members.get(arcname)
+                if (reuse and previous is not None
+                        and previous['sha256'] == member['sha256']
+                        and previous['compress_type'] == member['compress_type']
+                        and previous['compresslevel'] == member['compresslevel']
+                        and arcname in previous_zip.NameToInfo):
+                    previous_info = previous_zip.getinfo(arcname)
+                    zinfo.CRC = previous_info.CRC
+                    zinfo.file_size = previous_info.file_size
+                    zinfo.compress_size = previous_info.compress_size
+                    write_raw_member(zip_file, zinfo, read_raw_member(previous_fp, previous_info))
+                    reused += 1
+                else:
+                    with open(file_path, 'rb') as file:
+                        data = file.read()
+                    zip_file.writestr(zinfo, data, compress_type=member['compress_type'],
+                                      compresslevel=member['compresslevel'])
+                    compressed += 1
+        os.replace(temp_path, output_zip_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        if previous_zip is not None:
+            previous_zip.close()
+            previous_fp.close()
+    return reused, compressed
+
+def build_archive(directory_path, output_zip_path, cache_dir=None, policy=None, extra_files=None, cache_key=None):
+    """
+    Write a reproducible archive of directory_path to output_zip_path.
+    Entries are sorted and carry fixed timestamps, so unchanged inputs give identical bytes.
+    :param cache_dir: Optional build cache directory. With a cache, an unchanged plugin is not
+        rebuilt at all, and a partly changed plugin reuses the compressed members of its
+        previous archive.
+    :param policy: CompressionPolicy choosing the method for each file, defaults to
+        CompressionPolicy.default_policy().
+    :param extra_files: Optional (arcname, path) pairs to add, such as generated files kept
+        outside the plugin directory; they replace plugin files with the same arcname.
+    :param cache_key: Name of the plugin's cache entry, default plugin_cache_key(directory_path).
+        It must not depend on where the plugin is checked out.
+    :return: Dict with 'status' ('unchanged' or 'built'), 'reused' and 'compressed' member counts.
+    """
+    if policy is None:
+        policy = CompressionPolicy.default_policy()
+    files = collect_files(directory_path)
+    if extra_files:
+        extra = dict(extra_files)
+        files = sorted([(arcname, path) for arcname, path in files if arcname not in extra] + list(extra.items()))
+    entry_path = _entry_path(cache_dir, cache_key or plugin_cache_key(directory_path)) if cache_dir else None
+    entry = _load_entry(entry_path) if entry_path else None
+    previous_members = entry['members'] if entry else {}
+
+    members = _hash_members(files, previous_members)
+    _choose_compression(files, members, policy, previous_members,
+                        reuse_auto=bool(entry) and entry.get('policy') == policy.to_dict())
+    build_key = _build_key(members)
+
+    previous_archive = None
+    if entry:
+        previous_archive = _object_path(cache_dir, entry['archive_sha256'])
+        if not os.path.exists(previous_archive):
+            previous_archive = None
+
+    if entry and previous_archive and entry['build_key'] == build_key:
+        if not _output_is_current(output_zip_path, entry):
+            _atomic_copy(previous_archive, output_zip_path)
+            _record_output(entry, output_zip_path)
+        # Hashes may have been refreshed for files that were touched but not changed.
+        entry['members'] = members
+        entry['policy'] = policy.to_dict()
+        _atomic_write_json(entry_path, entry)
+        return {'status': 'unchanged', 'reused': len(files), 'compressed': 0}
+
+    reused, compressed = _write_archive(output_zip_path, files, members, previous_archive, previous_members)
+    if not cache_dir:
+        return {'status': 'built', 'reused': reused, 'compressed': compressed}
+
+    archive_sha256 = file_sha256(output_zip_path)
+    object_path = _object_path(cache_dir, archive_sha256)
+    # The previous object is left in place: another entry may share it, and a parallel build
+    # may be copying it. prune_cache() removes objects once nothing refers to them.
+    if not os.path.exists(object_path):
+        _atomic_copy(output_zip_path, object_path)
+
+    entry = {
+        'cache_version': CACHE_VERSION,
+        'directory': os.path.realpath(directory_path),
+        'build_key': build_key,
+        'archive_sha256': archive_sha256,
+        'members': members,
+        'policy': policy.to_dict(),
+    }
+    _record_output(entry, output_zip_path)
+    _atomic_write_json(entry_path, entry)
+    return {'status': 'built', 'reused': reused, 'compressed': compressed}
+
+def prune_cache(cache_dir):
+    """
+    Remove cached archives that no entry refers to any more, and per-plugin folders (such as
+    precompiled assets) whose entry is gone. Run it when no build is using the cache, e.g.
+    after zip --all has finished.
+    :return: Dict with the number of 'archives' and 'folders' removed.
+    """
+    removed = {'archives': 0, 'folders': 0}
+    entries_dir = os.path.join(cache_dir, 'entries')
+    try:
+        entry_names = os.listdir(entries_dir)
+    except OSError:
+        return removed
+    entries = {}
+    for name in entry_names:
+        if name.endswith('.json'):
+            entry = _load_entry(os.path.join(entries_dir, name))
+            if entry:
+                entries[name[:-len('.json')]] = entry
+    referenced = {entry['archive_sha256'] + '.zip' for entry in entries.values()}
+
+    objects_dir = os.path.join(cache_dir, 'objects')
+    for name in _list_dir(objects_dir):
+        if name.endswith('.zip') and name not in referenced:
+            try:
+                os.remove(os.path.join(objects_dir, name))
+                removed['archives'] += 1
+            except OSError:
+                pass
+    files_dir = os.path.join(cache_dir, PLUGIN_FILES_DIR)
+    for name in _list_dir(files_dir):
+        if name not in entries:
+            shutil.rmtree(os.path.join(files_dir, name), ignore_errors=True)
+            removed['folders'] += 1
+    return removed
+
+def _list_dir(path):
+    try:
+        return os.listdir(path)
+    except OSError:
+        return []
@@ -0,0 +1,163 @@
+import os
+import json
+import zlib
+import zipfile
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from algo_plugin.build_cache import collect_files, file_sha256, make_zipinfo, raw_writes_supported, write_raw_member
+from algo_plugin.compression import CompressionPolicy
+
+BUNDLE_VERSION = 1
+BUNDLE_MANIFEST = 'bundle.json'
+BLOB_DIR = 'blobs/'
+
+def _hash_files(plugin_dirs, workers):
+    jobs = [(name, arcname, path) for name, plugin_dir in plugin_dirs
+            for arcname, path in collect_files(plugin_dir)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        hashes = list(executor.map(lambda job: file_sha256(job[2]), jobs))
+    return [(name, arcname, path, sha256) for (name, arcname, path), sha256 in zip(jobs, hashes)]
+
+def _compress_blob(path, method):
+    # Runs on a worker thread; zlib and file reads release the GIL.
+    with open(path, 'rb') as file:
+        data = file.read()
+    compress_type, compresslevel = method
+    if compress_type == zipfile.ZIP_STORED:
+        return data, data
+    if compress_type == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if compresslevel is None else compresslevel,
+                                      zlib.DEFLATED, -15)
+        return data, compressor.compress(data) + compressor.flush()
+    return data, None
+
+def create_bundle(plugin_dirs, output_path, policy=None, workers=None):
+    """
+    Pack several plugins into one archive backed by a content-addressed store.
+    Every distinct file content is stored once, as blobs/<sha256>, and bundle.json maps each
+    plugin's files to the hashes of their content. A plugin_base.py copied into every plugin
+    is therefore stored and compressed only once. Blobs are compressed in parallel.
+    :param plugin_dirs: (name, plugin directory) pairs; name is the plugin's folder when unbundled,
+        so names must be unique (ValueError otherwise).
+    :param policy: CompressionPolicy, chosen for each blob by the first file that has its content.
+    :return: Dict with the number of 'plugins', 'files' and 'blobs', and 'input_bytes',
+        'unique_bytes' and 'output_bytes'.
+    """
+    if policy is None:
+        policy = CompressionPolicy.default_policy()
+    plugin_dirs = sorted(plugin_dirs)
+    names = [os.path.normcase(name) for name, _ in plugin_dirs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Plugin names must be unique in a bundle: {', '.join(duplicates)}")
+    files = _hash_files(plugin_dirs, workers)
+
+    plugins = {name: {'files': {}} for name, _ in plugin_dirs}
+    blobs = {}
+    input_bytes = 0
+    for name, arcname, path, sha256 in files:
+        plugins[name]['files'][arcname] = sha256
+        size = os.path.getsize(path)
+        input_bytes += size
+        if sha256 not in blobs:
+            blobs[sha256] = (arcname, path, size)
+    order = sorted(blobs)
+    methods = {sha256: policy.choose(blobs[sha256][0], blobs[sha256][1], blobs[sha256][2]) for sha256 in order}
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(temp_path, 'w') as zip_file, ThreadPoolExecutor(max_workers=workers) as executor:
+            # Compress a bounded window of blobs ahead of the writer, in order.
+            window = max(2, (workers or os.cpu_count() or 1) * 2)
+            raw_writes = raw_writes_supported(zip_file)
+            for start in range(0, len(order), window):
+                batch = order[start:start + window]
+                compressed = list(executor.map(lambda sha256: _compress_blob(blobs[sha256][1], methods[sha256]), batch))
+                for sha256, (data, raw) in zip(batch, compressed):
+                    compress_type, compresslevel = methods[sha256]
+                    zinfo = make_zipinfo(BLOB_DIR + sha256, compress_type)
+                    if raw is None or not raw_writes:
+                        zip_file.writestr(zinfo, data, compress_type=compress_type, compresslevel=compresslevel)
+                        continue
+                    zinfo.CRC = zlib.crc32(data)
+                    zinfo.file_size = len(data)
+                    zinfo.compress_size = len(raw)
+                    write_raw_member(zip_file, zinfo, raw)
+            manifest = {'version': BUNDLE_VERSION, 'plugins': plugins,
+                        'blobs': {sha256: blobs[sha256][2] for sha256 in order}}
+            zip_file.writestr(make_zipinfo(BUNDLE_MANIFEST, zipfile.ZIP_DEFLATED),
+                              json.dumps(manifest, indent=2, sort_keys=True))
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return {
+        'plugins': len(plugins),
+        'files': len(files),
+        'blobs': len(blobs),
+        'input_bytes': input_bytes,
+        'unique_bytes': sum(size for _, _, size in blobs.values()),
+        'output_bytes': os.path.getsize(output_path),
+    }
+
+def read_bundle_manifest(bundle_path):
+    with zipfile.ZipFile(bundle_path, 'r') as zip_file:
+        manifest = json.loads(zip_file.read(BUNDLE_MANIFEST).decode('utf-8'))
+    if manifest.get('version') != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle version {manifest.get('version')!r} in '{bundle_path}'")
+    return manifest
+
+def _safe_path(root, *parts):
+    # Refuse names that would escape the output directory.
+    relative = os.path.normpath(os.path.join(*parts))
+    if os.path.isabs(relative) or relative == '..' or relative.startswith('..' + os.sep):
+        raise ValueError(f"Unsafe path '{'/'.join(parts)}' in bundle")
+    return os.path.join(root, relative)
+
+def extract_bundle(bundle_path, output_dir, plugins=None, workers=None):
+    """
+    Unpack plugins from a bundle into output_dir/<name>/, in parallel. Each blob is read and
+    decompressed once and written to every file that has its content.
+    :param plugins: Names of the plugins to unpack, default all of them; unknown names raise ValueError.
+    :return: Dict with the names of the 'plugins' unpacked and the number of 'files' and 'blobs'.
+    """
+    manifest = read_bundle_manifest(bundle_path)
+    names = sorted(manifest['plugins']) if plugins is None else list(plugins)
+    missing = [name for name in names if name not in manifest['plugins']]
+    if missing:
+        raise ValueError(f"No plugin named {', '.join(missing)} in '{bundle_path}'")
+
+    targets = {}
+    for name in names:
+        for arcname, sha256 in manifest['plugins'][name]['files'].items():
+            targets.setdefault(sha256, []).append(_safe_path(output_dir, name, *arcname.split('/')))
+    for paths in targets.values():
+        for path in paths:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    local = threading.local()
+    opened = []
+
+    def extract_blob(sha256):
+        # One ZipFile per worker thread, so reads don't contend for a shared file handle.
+        if not hasattr(local, 'zip_file'):
+            local.zip_file = zipfile.ZipFile(bundle_path, 'r')
+            opened.append(local.zip_file)
+        data = local.zip_file.read(BLOB_DIR + sha256)
+        for path in targets[sha256]:
+            with open(path, 'wb') as file:
+                file.write(data)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(extract_blob, sorted(targets)))
+    finally:
+        for zip_file in opened:
+            zip_file.close()
+    return {'plugins': names, 'files': sum(len(paths) for paths in targets.values()), 'blobs': len(targets)}
@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import fnmatch
+import datetime
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from algo_plugin.manifest import DOCUMENT, format_errors, validate_manifest_file
+
+REQUIRED_FILES = ['plugin.py', '__init__.py', 'manifest.json', 'requirements.txt', 'plugin_base.py']
+# Files a plugin may ship besides the required ones. Anything else is reported as unexpected,
+# which is worth a look but doesn't fail the check.
+ALLOWED_PATTERNS = ['*.py', 'assets/*', 'README*', 'LICENSE*']
+IGNORED_DIRECTORIES = ['__pycache__']
+
+def scan_tree(root, with_mtime=False):
+    """
+    Read a directory tree once with os.scandir.
+    :return: (files, newest_mtime) where files are '/'-separated paths relative to root and
+        newest_mtime is the latest mtime of any file or directory (0.0 unless with_mtime).
+    """
+    files = []
+    newest = os.stat(root).st_mtime if with_mtime else 0.0
+    stack = ['']
+    while stack:
+        relative = stack.pop()
+        with os.scandir(os.path.join(root, relative) if relative else root) as entries:
+            for entry in entries:
+                name = entry.name
+                path = relative + '/' + name if relative else name
+                if entry.is_dir(follow_symlinks=False):
+                    if name.startswith('.') or name in IGNORED_DIRECTORIES:
+                        continue
+                    stack.append(path)
+                elif name.endswith('.pyc'):
+                    continue
+                else:
+                    files.append(path)
+                if with_mtime:
+                    # A directory's mtime changes when entries are added or removed.
+                    newest = max(newest, entry.stat(follow_symlinks=False).st_mtime)
+    files.sort()
+    return files, newest
+
+def check_plugin(plugin_dir, changed_since=None, manifest_cache=None):
+    """
+    Check one plugin directory.
+    :param changed_since: Optional timestamp; a tree with nothing modified after it is skipped.
+    :param manifest_cache: Optional ManifestCache used for the manifest validation.
+    :return: Result dict with the plugin name and path, 'status' ('passed', 'failed' or
+        'skipped'), 'missing', 'unexpected', 'manifest_errors' ({field: [errors]}) and the
+        check 'seconds'.
+    """
+    start = time.perf_counter()
+    result = {
+        'plugin': os.path.basename(os.path.normpath(plugin_dir)),
+        'path': plugin_dir,
+        'status': 'passed',
+        'missing': [],
+        'unexpected': [],
+        'manifest_errors': {},
+    }
+    try:
+        files, newest = scan_tree(plugin_dir, with_mtime=changed_since is not None)
+    except OSError as error:
+        result['status'] = 'failed'
+        result['missing'] = list(REQUIRED_FILES)
+        result['manifest_errors'] = {DOCUMENT: [f"unable to read plugin directory: {error}"]}
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+    if changed_since is not None and newest <= changed_since:
+        result['status'] = 'skipped'
+    else:
+        present = set(files)
+        result['missing'] = [name for name in REQUIRED_FILES if name not in present]
+        result['unexpected'] = [path for path in files
+                                if path not in REQUIRED_FILES
+                                and not any(fnmatch.fnmatchcase(path, pattern) for pattern in ALLOWED_PATTERNS)]
+        if 'manifest.json' in present:
+            result['manifest_errors'] = validate_manifest_file(os.path.join(plugin_dir, 'manifest.json'), manifest_cache)
+        if result['missing'] or result['manifest_errors']:
+            result['status'] = 'failed'
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def plugin_roots(plugins_root):
+    """Every direct subdirectory of plugins_root is a plugin, whether or not it has a manifest."""
+    with os.scandir(plugins_root) as entries:
+        return sorted(entry.path for entry in entries
+                      if entry.is_dir() and not entry.name.startswith('.') and entry.name not in IGNORED_DIRECTORIES)
+
+def check_many(plugin_dirs, workers=None, changed_since=None, manifest_cache=None):
+    """Check many plugin directories in parallel; results come back in the order given."""
+    plugin_dirs = list(plugin_dirs)
+    if len(plugin_dirs) <= 1:
+        results = [check_plugin(plugin_dir, changed_since, manifest_cache) for plugin_dir in plugin_dirs]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda plugin_dir: check_plugin(plugin_dir, changed_since, manifest_cache),
+                                        plugin_dirs))
+    if manifest_cache is not None:
+        manifest_cache.save()
+    return results
+
+def parse_changed_since(value):
+    """
+    Turn a --changed-since value into a timestamp. Accepts seconds since the epoch,
+    an ISO 8601 date/time or the path of a file whose mtime is used (e.g. a stamp file
+    touched after the last successful check).
+    """
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if os.path.exists(value):
+        return os.stat(value).st_mtime
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"--changed-since must be a timestamp, an ISO date or an existing file, got '{value}'")
+
+def summarize(results):
+    counts = {'passed': 0, 'failed': 0, 'skipped': 0}
+    for result in results:
+        counts[result['status']] += 1
+    counts['total'] = len(results)
+    return counts
+
+def results_to_json(results):
+    return json.dumps({'summary': summarize(results), 'plugins': results}, indent=2)
+
+def results_to_junit(results):
+    counts = summarize(results)
+    suite = ET.Element('testsuite', {
+        'name': 'algo-plugin check',
+        'tests': str(counts['total']),
+        'failures': str(counts['failed']),
+        'skipped': str(counts['skipped']),
+        'time': f"{sum(result['seconds'] for result in results):.6f}",
+    })
+    for result in results:
+        case = ET.SubElement(suite, 'testcase', {
+            'classname': 'algo_plugin.check',
+            'name': result['plugin'],
+            'file': result['path'],
+            'time': f"{result['seconds']:.6f}",
+        })
+        if result['status'] == 'skipped':
+            ET.SubElement(case, 'skipped', {'message': 'unchanged since the given time'})
+        elif result['status'] == 'failed':
+            lines = [f"missing file: {name}" for name in result['missing']]
+            lines += [f"manifest: {error}" for error in format_errors(result['manifest_errors'])]
+            failure = ET.SubElement(case, 'failure', {'message': f"{len(lines)} problem(s)"})
+            failure.text = '\n'.join(lines)
+        if result['unexpected']:
+            output = ET.SubElement(case, 'system-out')
+            output.text = '\n'.join(f"unexpected file: {path}" for path in result['unexpected'])
+    return ET.tostring(suite, encoding='unicode')
+
+def results_to_text(results):
+    lines = []
+    for result in results:
+        lines.append(f"{result['status'].upper():<7} {result['plugin']} ({result['path']})")
+        for name in result['missing']:
+            lines.append(f"        missing file: {name}")
+        for error in format_errors(result['manifest_errors']):
+            lines.append(f"        manifest: {error}")
+        for path in result['unexpected']:
+            lines.append(f"        unexpected file: {path}")
+    counts = summarize(results)
+    lines.append(f"{counts['passed']} passed, {counts['failed']} failed, {counts['skipped']} skipped.")
+    return '\n'.join(lines)
+
+FORMATTERS = {
+    'text': results_to_text,
+    'json': results_to_json,
+    'junit': results_to_junit,
+}
@@ -1,7 +1,254 @@
 import os
+import io
+import sys
 import json
+import time
 import zipfile
 import argparse
+import tempfile
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from algo_plugin import bench
+from algo_plugin.assets import compiled_assets_dir, precompile_assets
+from algo_plugin.build_cache import build_archive, plugin_cache_key, prune_cache
+from algo_plugin.bundle import create_bundle, extract_bundle
+from algo_plugin.compression import load_policy
+from algo_plugin import checker
+from algo_plugin.import_profile import format_result, profile_import
+from algo_plugin.index import DEFAULT_INDEX_NAME, PluginIndex
+from algo_plugin.manifest import cache_for, format_errors, validate_manifest_file, validate_manifests
+
+PLUGIN_BASE_TEMPLATE = '''import os
+import time
+import cProfile
+import tracemalloc
+
+# ALGO_PLUGIN_PROFILE=1 profiles every plugin's update and draw calls. ALGO_PLUGIN_PROFILE=capture:N
+# also records a cProfile of the next N frames to <plugin_id>.prof in ALGO_PLUGIN_PROFILE_DIR.
+PROFILE_ENV = 'ALGO_PLUGIN_PROFILE'
+PROFILE_DIR_ENV = 'ALGO_PLUGIN_PROFILE_DIR'
+PROFILED_METHODS = ('update', 'draw')
+# Bucket i of a histogram counts the calls that took less than 2**i microseconds.
+HISTOGRAM_BUCKETS = 24
+
+def _profile_setting(value):
+    # (enabled, frames to capture) from ALGO_PLUGIN_PROFILE, read once at import.
+    if value in ('', '0'):
+        return False, 0
+    if not value.startswith('capture:'):
+        return True, 0
+    try:
+        return True, int(value.split(':', 1)[1])
+    except ValueError:
+        print(f"Warning: Ignoring the capture in {PROFILE_ENV}={value!r}; expected capture:FRAMES.")
+        return True, 0
+
+PROFILE_ENABLED, PROFILE_CAPTURE_FRAMES = _profile_setting(os.environ.get(PROFILE_ENV, ''))
+# Open profiles that trace memory, and whether one of them started tracemalloc. Every plugin
+# ships its own copy of this module, so the count is kept on tracemalloc, which they all share.
+_TRACING = tracemalloc.__dict__.setdefault('_plugin_base_tracing', {'profiles': 0, 'started': False})
+
+class CallProfile:
+    """Timing histogram and allocations of the calls of one method."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+        self.net_bytes = 0
+        self.max_peak_bytes = 0
+
+    def record(self, elapsed_ns, net_bytes=0, peak_bytes=0):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        self.histogram[min((elapsed_ns // 1000).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        self.net_bytes += net_bytes
+        self.max_peak_bytes = max(self.max_peak_bytes, peak_bytes)
+
+    def percentile(self, fraction):
+        """Upper bound in ms of the histogram bucket that holds the given fraction of the calls."""
+        count = 0
+        for bucket, calls in enumerate(self.histogram):
+            count += calls
+            if calls and count >= fraction * self.calls:
+                return (1 << bucket) / 1000.0
+        return 0.0
+
+    def summary(self):
+        return {
+            'calls': self.calls,
+            'mean_ms': self.total_ns / self.calls / 1e6 if self.calls else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.max_ns / 1e6,
+            'mean_net_bytes': self.net_bytes / self.calls if self.calls else 0.0,
+            'max_peak_bytes': self.max_peak_bytes,
+            'histogram_us': self.histogram,
+        }
+
+class PluginProfile:
+    """
+    Profiling state of one plugin instance. With trace_memory, each call records the bytes it
+    left allocated and its peak allocation (tracemalloc is started if needed). A capture runs
+    cProfile over the plugin's calls for a number of frames, then dumps it to a file, and the
+    difference between tracemalloc snapshots from before and after to <file>.memory.txt.
+    Tracing slows down every allocation in the process, so if a profile started it, it is
+    stopped again once the last profile that traces memory is closed.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.methods = {name: CallProfile() for name in PROFILED_METHODS}
+        self.trace_memory = trace_memory
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _TRACING['started'] = True
+            _TRACING['profiles'] += 1
+        self.profiler = None
+        self.capture_path = None
+        self.capture_frames = 0
+        self.snapshot = None
+        self.captures = []
+        self.running = False
+
+    def start_capture(self, frames, path):
+        self.profiler = cProfile.Profile()
+        self.capture_path = path
+        self.capture_frames = frames
+        self.snapshot = tracemalloc.take_snapshot() if self.trace_memory else None
+
+    def _finish_capture(self):
+        self.profiler.dump_stats(self.capture_path)
+        if self.snapshot is not None:
+            statistics = tracemalloc.take_snapshot().compare_to(self.snapshot, 'lineno')
+            with open(self.capture_path + '.memory.txt', 'w') as file:
+                for statistic in statistics[:50]:
+                    print(statistic, file=file)
+        self.captures.append(self.capture_path)
+        self.profiler = self.capture_path = self.snapshot = None
+
+    def call(self, name, method, plugin, args, kwargs):
+        if self.running:
+            # An overriding method calling super(): only the outermost call is measured.
+            return method(plugin, *args, **kwargs)
+        self.running = True
+        profiler = self.profiler
+        try:
+            if self.trace_memory:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+            if profiler is not None:
+                profiler.enable()
+            start = time.perf_counter_ns()
+            try:
+                return method(plugin, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                if profiler is not None:
+                    profiler.disable()
+                if self.trace_memory:
+                    current, peak = tracemalloc.get_traced_memory()
+                    self.methods[name].record(elapsed, current - before, peak - before)
+                else:
+                    self.methods[name].record(elapsed)
+                if profiler is not None and name == 'update':
+                    self.capture_frames -= 1
+                    if self.capture_frames <= 0:
+                        self._finish_capture()
+        finally:
+            self.running = False
+
+    def close(self):
+        if not self.trace_memory:
+            return
+        self.trace_memory = False
+        _TRACING['profiles'] -= 1
+        if _TRACING['profiles'] == 0 and _TRACING['started']:
+            tracemalloc.stop()
+            _TRACING['started'] = False
+
+    def stats(self):
+        stats = {name: profile.summary() for name, profile in self.methods.items()}
+        stats['captures'] = list(self.captures)
+        return stats
+
+def _profiled(name, method):
+    def wrapper(self, *args, **kwargs):
+        if self._profile is None:
+            return method(self, *args, **kwargs)
+        return self._profile.call(name, method, self, args, kwargs)
+    wrapper.__name__ = method.__name__
+    wrapper.__qualname__ = method.__qualname__
+    wrapper.__doc__ = method.__doc__
+    wrapper.__wrapped__ = method
+    return wrapper
+
+class PluginBase:
+    # PluginProfile while profiling is enabled; while it is None the cost is one attribute check per call.
+    _profile = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in PROFILED_METHODS:
+            if name in cls.__dict__:
+                setattr(cls, name, _profiled(name, cls.__dict__[name]))
+
+    def __init__(self, plugin_id):
+        """
+        Initialize the plugin. Set up any necessary variables, load resources, etc.
+        :param plugin_id: Unique identifier for the plugin.
+        """
+        self.plugin_id = plugin_id  # Unique ID for the plugin
+        self.active = True  # Control whether the plugin is active or not
+        if PROFILE_ENABLED:
+            self.enable_profiling()
+            if PROFILE_CAPTURE_FRAMES:
+                self.capture_profile(PROFILE_CAPTURE_FRAMES,
+                                     os.path.join(os.environ.get(PROFILE_DIR_ENV, '.'), f'{plugin_id}.prof'))
+
+    def enable_profiling(self, trace_memory=True):
+        """
+        Record timing histograms (and allocations, with trace_memory) of update and draw.
+        Hosts call this, or set the ALGO_PLUGIN_PROFILE environment variable.
+        """
+        if self._profile is None:
+            self._profile = PluginProfile(trace_memory)
+        return self._profile
+
+    def disable_profiling(self):
+        if self._profile is not None:
+            self._profile.close()
+            self._profile = None
+
+    def capture_profile(self, frames, path):
+        """
+        Run cProfile over the update and draw calls of the next frames frames, then dump it
+        to path (read it with pstats or snakeviz). Enables profiling if needed.
+        """
+        self.enable_profiling().start_capture(frames, path)
+
+    def profile_stats(self):
+        """Per-method summaries (calls, mean/p50/p95/p99/max ms, allocations, histogram), or None when off."""
+        return None if self._profile is None else self._profile.stats()
+
+    def update(self, events, delta_time):
+        """
+        Update the game logic. This will be called by the main loop.
+        :param events: List of Pygame events.
+        :param delta_time: Time elapsed since the last frame (to make movements frame rate independent).
+        """
+        raise NotImplementedError("The 'update' method must be implemented by the plugin.")
+
+    def draw(self, surface):
+        """
+        Draw the plugin content on the provided Pygame surface.
+        :param surface: Pygame surface where the plugin should render its output.
+        """
+        raise NotImplementedError("The 'draw' method must be implemented by the plugin.")
+'''
 
 def create_plugin_structure():
     print("Welcome to the Plugin Creator!")
@@ -24,9 +271,10 @@ def create_plugin_structure():
         "description": f"A plugin for {plugin_name}.",
         "game_version": game_version,
         "python_version": python_version,
-        "dependencies": [dep.strip() for dep in dependencies],
+        "dependencies": [dep.strip() for dep in dependencies if dep.strip()],
         "author": author,
-        "contact": contact
+        "contact": contact,
+        "entry_point": f"plugin:{plugin_name}Plugin"
     }
     
     manifest_path = os.path.join(plugin_dir, 'manifest.json')
@@ -45,31 +293,7 @@ def create_plugin_structure():
     
     # Create plugin_base.py
     with open(base_path, 'w') as file:
-        file.write('''
-class PluginBase:
-    def __init__(self, plugin_id):
-        """
-        Initialize the plugin. Set up any necessary variables, load resources, etc.
-        :param plugin_id: Unique identifier for the plugin.
-        """
-        self.plugin_id = plugin_id  # Unique ID for the plugin
-        self.active = True  # Control whether the plugin is active or not
-
-    def update(self, events, delta_time):
-        """
-        Update the game logic. This will be called by the main loop.
-        :param events: List of Pygame events.
-        :param delta_time: Time elapsed since the last frame (to make movements frame rate independent).
-        """
-        raise NotImplementedError("The 'update' method must be implemented by the plugin.")
-
-    def draw(self, surface):
-        """
-        Draw the plugin content on the provided Pygame surface.
-        :param surface: Pygame surface where the plugin should render its output.
-        """
-        raise NotImplementedError("The 'draw' method must be implemented by the plugin.")
-        ''')
+        file.write(PLUGIN_BASE_TEMPLATE)
     
     # Create plugin.py
     with open(plugin_path, 'w') as file:
@@ -97,81 +321,479 @@ class {plugin_name}Plugin(PluginBase):
     
     print(f"Plugin structure created at: {plugin_dir}")
 
-def check_directory_structure(directory_path):
-    print(f"Checking structure of directory: {directory_path}")
-    passed = True
-    required_files = ['plugin.py', '__init__.py', 'manifest.json', 'requirements.txt', 'plugin_base.py']
-    
-    for folder_name, subfolders, filenames in os.walk(directory_path):
-        print(f"Directory: {folder_name}")
-        for subfolder in subfolders:
-            print(f"  Subdirectory: {subfolder}")
-        for filename in filenames:
-            if filename in required_files:
-                print(f"  File: {filename} (passed)")
-            else:
-                print(f"  File: {filename}")
-                passed = False
-
-    if passed:
-        print("All required files are present.")
+def check_directory_structure(directory_path, output_format='text', report_path=None, changed_since=None, cache_dir=None):
+    """Check one plugin directory and write the report; returns the result dict."""
+    results = checker.check_many([directory_path], changed_since=changed_since, manifest_cache=cache_for(cache_dir))
+    write_check_report(results, output_format, report_path)
+    return results[0]
+
+def check_all(plugins_root, output_format='text', report_path=None, changed_since=None, workers=None, cache_dir=None):
+    """Check every plugin directory directly under plugins_root in parallel; returns the result dicts."""
+    results = checker.check_many(checker.plugin_roots(plugins_root), workers=workers, changed_since=changed_since,
+                                 manifest_cache=cache_for(cache_dir))
+    write_check_report(results, output_format, report_path)
+    return results
+
+def write_check_report(results, output_format='text', report_path=None):
+    report = checker.FORMATTERS[output_format](results)
+    if report_path:
+        with open(report_path, 'w') as file:
+            file.write(report + '\n')
+        print(f"Check report written to '{report_path}'.")
     else:
-        print("Some required files are missing or additional files were found.")
+        print(report)
 
-def zip_directory(directory_path, output_zip_path):
+def zip_directory(directory_path, output_zip_path, cache_dir=None, policy=None, validated=False,
+                  precompile=False, cache_key=None):
     manifest_path = os.path.join(directory_path, 'manifest.json')
     if not os.path.exists(manifest_path):
         print(f"Warning: No manifest.json file found in {directory_path}. The directory will not be zipped.")
-        return
+        return False
     
-    if not validate_manifest(manifest_path):
+    if not validated and not validate_manifest(manifest_path, cache=cache_for(cache_dir)):
         print(f"Error: Invalid manifest.json file in {directory_path}. The directory will not be zipped.")
-        return
+        return False
 
-    with zipfile.ZipFile(output_zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for folder_name, subfolders, filenames in os.walk(directory_path):
-            for filename in filenames:
-                file_path = os.path.join(folder_name, filename)
-                zip_file.write(file_path, os.path.relpath(file_path, directory_path))
-    print(f"Directory '{directory_path}' has been zipped to '{output_zip_path}'.")
+    # The cache entry and the compiled assets share this name, so prune_cache removes them together.
+    cache_key = cache_key or plugin_cache_key(directory_path)
+    if precompile:
+        # Compiled assets live in the build cache so they are only redone when the assets change.
+        with contextlib.ExitStack() as stack:
+            compiled_dir = (compiled_assets_dir(cache_dir, cache_key) if cache_dir
+                            else stack.enter_context(tempfile.TemporaryDirectory()))
+            index, extra_files = precompile_assets(directory_path, compiled_dir)
+            if index:
+                print(f"Precompiled {len(index['images'])} images and {len(index['sounds'])} sounds in '{directory_path}'.")
+            build = build_archive(directory_path, output_zip_path, cache_dir=cache_dir, policy=policy,
+                                  extra_files=extra_files, cache_key=cache_key)
+    else:
+        build = build_archive(directory_path, output_zip_path, cache_dir=cache_dir, policy=policy, cache_key=cache_key)
+    if build['status'] == 'unchanged':
+        print(f"Directory '{directory_path}' is unchanged since the last build; '{output_zip_path}' is up to date.")
+    elif build['reused']:
+        print(f"Directory '{directory_path}' has been zipped to '{output_zip_path}' "
+              f"({build['compressed']} files compressed, {build['reused']} reused from the build cache).")
+    else:
+        print(f"Directory '{directory_path}' has been zipped to '{output_zip_path}'.")
+    return True
 
-def validate_manifest(manifest_path):
+def find_plugin_directories(plugins_root):
+    """Return every directory under plugins_root that holds a manifest.json, sorted."""
+    plugin_dirs = []
+    for folder_name, subfolders, filenames in os.walk(plugins_root):
+        if 'manifest.json' in filenames:
+            plugin_dirs.append(folder_name)
+            # A plugin directory is packaged as a whole, so don't look for plugins inside it.
+            subfolders[:] = []
+        else:
+            subfolders[:] = [d for d in subfolders if not d.startswith('.') and d != '__pycache__']
+    return sorted(plugin_dirs)
+
+def _directory_size(directory_path):
+    total = 0
+    for folder_name, subfolders, filenames in os.walk(directory_path):
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(folder_name, filename))
+    return total
+
+def _zip_plugin_job(directory_path, output_zip_path, cache_dir=None, policy=None, validated=False, precompile=False,
+                    cache_key=None):
+    # Runs in a worker process. Output is captured so that concurrent jobs don't
+    # interleave their messages, and any exception is turned into a failed result.
+    start = time.perf_counter()
+    log = io.StringIO()
+    result = {
+        'directory': directory_path,
+        'output': output_zip_path,
+        'ok': False,
+        'input_bytes': 0,
+        'output_bytes': 0,
+        'message': '',
+    }
     try:
-        with open(manifest_path, 'r') as file:
-            manifest = json.load(file)
-        required_fields = ["name", "version", "game_version", "python_version"]
+        result['input_bytes'] = _directory_size(directory_path)
+        with contextlib.redirect_stdout(log):
+            result['ok'] = bool(zip_directory(directory_path, output_zip_path, cache_dir=cache_dir,
+                                                   policy=policy, validated=validated, precompile=precompile,
+                                                   cache_key=cache_key))
+        if result['ok']:
+            result['output_bytes'] = os.path.getsize(output_zip_path)
+    except Exception as error:
+        log.write(f"Error: {type(error).__name__}: {error}\n")
+    lines = log.getvalue().strip().splitlines()
+    result['message'] = lines[-1] if lines else ''
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def _failed_result(plugin_dir, output_path, message):
+    return {
+        'directory': plugin_dir,
+        'output': output_path,
+        'ok': False,
+        'seconds': 0.0,
+        'input_bytes': 0,
+        'output_bytes': 0,
+        'message': message,
+    }
+
+def plugin_archive_name(plugin_dir, plugins_root):
+    """Name of a plugin's archive or bundle entry: its path under plugins_root, with '_' for separators."""
+    relative = os.path.relpath(plugin_dir, plugins_root)
+    return 'plugin' if relative == '.' else relative.replace(os.sep, '_')
+
+def find_name_clashes(names):
+    """
+    Map each plugin directory whose name is shared with others (ignoring case where the file
+    system does) to those others. Folders such as group/two and group_two are both 'group_two'.
+    :param names: Dict of plugin directory to name.
+    """
+    by_name = {}
+    for plugin_dir, name in names.items():
+        by_name.setdefault(os.path.normcase(name), []).append(plugin_dir)
+    return {plugin_dir: [other for other in by_name[os.path.normcase(name)] if other != plugin_dir]
+            for plugin_dir, name in names.items() if len(by_name[os.path.normcase(name)]) > 1}
+
+def zip_all(plugins_root, output_dir, workers=None, cache_dir=None, policy=None, precompile=False):
+    """
+    Zip every plugin directory under plugins_root into output_dir, one archive per plugin.
+    :param plugins_root: Directory searched for plugin directories (those containing manifest.json).
+    :param output_dir: Directory the archives are written to.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param cache_dir: Optional build cache directory shared by all plugins.
+    :param policy: Optional CompressionPolicy used for every plugin.
+    :param precompile: Add precompiled assets (see algo_plugin.assets) to every archive.
+    :return: List of per-plugin result dicts, in plugin order.
+    """
+    plugin_dirs = find_plugin_directories(plugins_root)
+    if not plugin_dirs:
+        print(f"Warning: No plugin directories found under {plugins_root}.")
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = {}
+    cache_keys = {}
+    names = {plugin_dir: plugin_archive_name(plugin_dir, plugins_root) for plugin_dir in plugin_dirs}
+    clashes = find_name_clashes(names)
+    for plugin_dir in plugin_dirs:
+        jobs[plugin_dir] = os.path.join(output_dir, names[plugin_dir] + '.zip')
+        # The path below the plugins root names the cache entry, so any checkout of the tree hits it.
+        cache_keys[plugin_dir] = os.path.relpath(plugin_dir, plugins_root).replace(os.sep, '/')
+
+    # Validate every manifest in one batch up front, so workers don't each open the manifest cache.
+    manifest_errors = validate_manifests([os.path.join(plugin_dir, 'manifest.json') for plugin_dir in plugin_dirs],
+                                         cache=cache_for(cache_dir))
+    results = {}
+    for plugin_dir in plugin_dirs:
+        errors = manifest_errors[os.path.join(plugin_dir, 'manifest.json')]
+        if errors:
+            results[plugin_dir] = _failed_result(plugin_dir, jobs.pop(plugin_dir),
+                                                 f"Error: Invalid manifest.json file in {plugin_dir}: "
+                                                 f"{'; '.join(format_errors(errors))}")
+        elif plugin_dir in clashes:
+            output_path = jobs.pop(plugin_dir)
+            results[plugin_dir] = _failed_result(plugin_dir, output_path,
+                                                 f"Error: {plugin_dir} and {', '.join(clashes[plugin_dir])} would both "
+                                                 f"be zipped to {output_path}; rename one of them.")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_zip_plugin_job, plugin_dir, output_path, cache_dir, policy, True, precompile,
+                                   cache_keys[plugin_dir]): plugin_dir
+                   for plugin_dir, output_path in jobs.items()}
+        for future in as_completed(futures):
+            plugin_dir = futures[future]
+            try:
+                results[plugin_dir] = future.result()
+            except Exception as error:
+                # The worker process itself died; record it and keep going.
+                results[plugin_dir] = _failed_result(plugin_dir, jobs[plugin_dir],
+                                                     f"Error: {type(error).__name__}: {error}")
+
+    ordered = [results[plugin_dir] for plugin_dir in plugin_dirs]
+    print_zip_summary(ordered, plugins_root)
+    return ordered
+
+def print_zip_summary(results, plugins_root):
+    rows = []
+    for result in results:
+        name = os.path.relpath(result['directory'], plugins_root)
+        status = 'ok' if result['ok'] else 'FAILED'
+        rows.append((name, status, f"{result['seconds']:.3f}", str(result['input_bytes']), str(result['output_bytes'])))
+    header = ('Plugin', 'Status', 'Time (s)', 'Input (B)', 'Output (B)')
+    widths = [max(len(row[i]) for row in rows + [header]) for i in range(len(header))]
+
+    def format_row(row):
+        # Left-align the plugin name, right-align the numbers.
+        return '  '.join([row[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])])
+
+    print()
+    print(format_row(header))
+    for row in rows:
+        print(format_row(row))
+
+    failed = [result for result in results if not result['ok']]
+    print(f"\n{len(results) - len(failed)} of {len(results)} plugins zipped.")
+    for result in failed:
+        print(f"  {os.path.relpath(result['directory'], plugins_root)}: {result['message']}")
 
-        for field in required_fields:
-            if field not in manifest:
-                print(f"Manifest is missing required field: {field}")
-                return False
+def validate_manifest(manifest_path, cache=None):
+    """
+    Validate a manifest file against the manifest schema, printing every problem found.
+    :param cache: Optional ManifestCache; an unchanged manifest is not parsed again.
+    :return: True when the manifest is valid.
+    """
+    errors = validate_manifest_file(manifest_path, cache)
+    if cache is not None:
+        cache.save()
+    for error in format_errors(errors):
+        print(f"Manifest error in '{manifest_path}': {error}")
+    return not errors
 
-        return True
+def index_plugins(index_path, plugins_root=None, output_format='text', name=None, game_version=None, depends_on=None):
+    """
+    Update the plugin index from plugins_root (if given) and print the plugins matching the filters.
+    :return: List of matching plugin dicts.
+    """
+    with PluginIndex(index_path) as index:
+        if plugins_root:
+            counts = index.update(plugins_root)
+            for path, error in counts['errors']:
+                print(f"Warning: Unable to index '{path}': {error}")
+            if output_format == 'text':
+                print(f"Index '{index_path}' updated: {counts['added']} added, {counts['updated']} updated, "
+                      f"{counts['removed']} removed, {counts['unchanged']} unchanged.")
+        plugins = index.query(name=name, game_version=game_version, depends_on=depends_on)
 
-    except json.JSONDecodeError:
-        print(f"Error: Unable to parse manifest file '{manifest_path}'.")
+    if output_format == 'json':
+        print(json.dumps(plugins, indent=2))
+    else:
+        for plugin in plugins:
+            dependencies = ', '.join(plugin['dependencies']) or '-'
+            print(f"{plugin['name']} {plugin['version']} (game {plugin['game_version']}, python {plugin['python_version']}) "
+                  f"[{plugin['kind']}: {plugin['source']}] depends on: {dependencies}")
+    return plugins
+
+def profile_plugin_import(path, output_format='text'):
+    """
+    Profile importing and constructing the plugin at path (directory or archive) in a fresh interpreter.
+    :return: The profile dict, or None if the plugin could not be imported or constructed.
+    """
+    try:
+        result = profile_import(path)
+    except (OSError, ValueError, RuntimeError) as error:
+        print(f"Error: {error}")
+        return None
+    if output_format == 'json':
+        print(json.dumps(result, indent=2))
+    else:
+        print(format_result(result))
+    return result
+
+def bench_plugin(plugin_dir, script_path=None, frames=bench.DEFAULT_FRAMES, baseline_path=None,
+                 save_baseline_path=None, tolerance=bench.DEFAULT_TOLERANCE, output_format='text'):
+    """
+    Benchmark a plugin's update and draw calls headless, optionally against a saved baseline.
+    :return: The benchmark dict, with 'regressions' listing frame times slower than the baseline,
+        or None if the plugin raised an exception.
+    """
+    script = bench.load_script(script_path) if script_path else None
+    try:
+        result = bench.run_benchmark(plugin_dir, script=script, frames=frames)
+    except Exception as error:
+        print(f"Error: Plugin '{plugin_dir}' failed during the benchmark: {type(error).__name__}: {error}")
+        return None
+    result['regressions'] = []
+    if baseline_path:
+        with open(baseline_path, 'r') as file:
+            result['regressions'] = bench.compare_to_baseline(result, json.load(file), tolerance)
+    if save_baseline_path:
+        with open(save_baseline_path, 'w') as file:
+            json.dump({key: result[key] for key in ('plugin', 'frames', 'update', 'draw')}, file, indent=2)
+
+    if output_format == 'json':
+        print(json.dumps(result, indent=2))
+    else:
+        print(bench.format_result(result))
+        if save_baseline_path:
+            print(f"Baseline saved to '{save_baseline_path}'.")
+    return result
+
+def bundle_plugins(plugins_root, output_path, workers=None, policy=None, cache_dir=None):
+    """
+    Pack every plugin directory under plugins_root into one deduplicated bundle.
+    Nothing is written if a manifest is invalid or two plugins would get the same name.
+    :return: The bundle statistics, or None on failure.
+    """
+    plugin_dirs = find_plugin_directories(plugins_root)
+    if not plugin_dirs:
+        print(f"Warning: No plugin directories found under {plugins_root}.")
+        return None
+    manifest_errors = validate_manifests([os.path.join(plugin_dir, 'manifest.json') for plugin_dir in plugin_dirs],
+                                         cache=cache_for(cache_dir))
+    invalid = False
+    for manifest_path, errors in sorted(manifest_errors.items()):
+        if errors:
+            print(f"Error: Invalid manifest.json file in {os.path.dirname(manifest_path)}: {'; '.join(format_errors(errors))}")
+            invalid = True
+    names = {plugin_dir: plugin_archive_name(plugin_dir, plugins_root) for plugin_dir in plugin_dirs}
+    clashes = find_name_clashes(names)
+    for plugin_dir in plugin_dirs:
+        if plugin_dir in clashes:
+            print(f"Error: {plugin_dir} and {', '.join(clashes[plugin_dir])} would both be bundled as "
+                  f"'{names[plugin_dir]}'; rename one of them.")
+            invalid = True
+    if invalid:
+        return None
+
+    stats = create_bundle([(names[plugin_dir], plugin_dir) for plugin_dir in plugin_dirs], output_path,
+                          policy=policy, workers=workers)
+    print(f"Bundled {stats['plugins']} plugins into '{output_path}': {stats['files']} files stored as "
+          f"{stats['blobs']} unique blobs, {stats['input_bytes']} bytes in, {stats['output_bytes']} bytes out.")
+    return stats
+
+def unbundle_plugins(bundle_path, output_dir, names=None, workers=None):
+    """Unpack the named plugins (all by default) from a bundle into output_dir; returns False on failure."""
+    try:
+        result = extract_bundle(bundle_path, output_dir, plugins=names, workers=workers)
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile) as error:
+        print(f"Error: Unable to unbundle '{bundle_path}': {error}")
         return False
+    print(f"Unpacked {len(result['plugins'])} plugins ({result['files']} files from {result['blobs']} blobs) "
+          f"into '{output_dir}'.")
+    return True
 
 def main():
     parser = argparse.ArgumentParser(description="Algorithm Plugin Manager")
-    parser.add_argument('action', choices=['create', 'check', 'zip'], help="Action to perform")
-    parser.add_argument('--directory', type=str, help="Path to the plugin directory")
-    parser.add_argument('--output', type=str, help="Path to the output zip file")
+    parser.add_argument('action', choices=['create', 'check', 'zip', 'bundle', 'unbundle', 'index', 'profile-import', 'bench'], help="Action to perform")
+    parser.add_argument('--directory', type=str, help="Path to the plugin directory (or plugin archive for profile-import)")
+    parser.add_argument('--output', type=str, help="Path to the output zip file (output directory with --all)")
+    parser.add_argument('--all', type=str, metavar='PLUGINS_ROOT', help="Check, zip, bundle or index every plugin found under PLUGINS_ROOT")
+    parser.add_argument('--workers', type=int, help="Number of workers used with --all")
+    parser.add_argument('--format', type=str, choices=sorted(checker.FORMATTERS), default='text',
+                        help="Output format; index, profile-import and bench support text and json")
+    parser.add_argument('--report', type=str, help="Write the check report to this file instead of stdout")
+    parser.add_argument('--changed-since', type=str,
+                        help="Only check plugin trees modified after this timestamp, ISO date or stamp file's mtime")
+    parser.add_argument('--cache-dir', type=str, help="Build cache directory; unchanged plugins and manifests are not processed again")
+    parser.add_argument('--prune-cache', action='store_true',
+                        help="After zip, remove cached archives no plugin refers to; don't run other builds on the cache meanwhile")
+    parser.add_argument('--compression', type=str, help="Default compression: stored, deflate[:LEVEL], bzip2[:LEVEL], lzma or auto")
+    parser.add_argument('--compress-rule', type=str, action='append', default=[],
+                        help="Compression rule such as '.png,.mp3=stored', 'assets/*=auto' or 'size>10MB=lzma' (repeatable)")
+    parser.add_argument('--compression-config', type=str, help="JSON file with the compression policy")
+    parser.add_argument('--precompile-assets', action='store_true',
+                        help="Decode images and sounds into raw buffers and texture atlases when zipping (needs pygame)")
+    parser.add_argument('--index', type=str, help=f"Plugin index file (default: PLUGINS_ROOT/{DEFAULT_INDEX_NAME})")
+    parser.add_argument('--name', type=str,
+                        help="Only list the indexed plugin with this name; with unbundle, comma-separated plugins to unpack")
+    parser.add_argument('--game-version', type=str, help="Only list indexed plugins compatible with this game version, e.g. 1.5.x")
+    parser.add_argument('--depends-on', type=str, help="Only list indexed plugins that depend on this package")
+    parser.add_argument('--script', type=str, help="JSON event script fed to the plugin by bench")
+    parser.add_argument('--frames', type=int, default=bench.DEFAULT_FRAMES, help="Number of frames bench measures")
+    parser.add_argument('--baseline', type=str, help="Bench results to compare against")
+    parser.add_argument('--save-baseline', type=str, help="Save the bench results as a baseline to this file")
+    parser.add_argument('--tolerance', type=float, default=bench.DEFAULT_TOLERANCE,
+                        help="Allowed slowdown against the baseline, as a fraction (default 0.1)")
     
     args = parser.parse_args()
     
     if args.action == 'create':
         create_plugin_structure()
     elif args.action == 'check':
-        if args.directory:
-            check_directory_structure(args.directory)
+        changed_since = None
+        if args.changed_since:
+            try:
+                changed_since = checker.parse_changed_since(args.changed_since)
+            except ValueError as error:
+                print(f"Error: {error}")
+                sys.exit(1)
+        if args.all:
+            results = check_all(args.all, args.format, args.report, changed_since, workers=args.workers,
+                                cache_dir=args.cache_dir)
+        elif args.directory:
+            results = [check_directory_structure(args.directory, args.format, args.report, changed_since,
+                                                 cache_dir=args.cache_dir)]
         else:
-            print("Error: Directory path is required for checking.")
+            print("Error: Directory path (or --all) is required for checking.")
+            sys.exit(1)
+        if any(result['status'] == 'failed' for result in results):
+            sys.exit(1)
     elif args.action == 'zip':
-        if args.directory and args.output:
-            zip_directory(args.directory, args.output)
+        try:
+            policy = load_policy(args.compression_config, args.compression, args.compress_rule)
+        except (OSError, ValueError, TypeError) as error:
+            print(f"Error: Invalid compression policy: {error}")
+            sys.exit(1)
+        if args.all:
+            output_dir = args.output or 'dist'
+            results = zip_all(args.all, output_dir, workers=args.workers, cache_dir=args.cache_dir, policy=policy,
+                              precompile=args.precompile_assets)
+            if not results or not all(result['ok'] for result in results):
+                sys.exit(1)
+        elif args.directory and args.output:
+            try:
+                zip_directory(args.directory, args.output, cache_dir=args.cache_dir, policy=policy,
+                              precompile=args.precompile_assets)
+            except RuntimeError as error:
+                print(f"Error: {error}")
+                sys.exit(1)
         else:
-            print("Error: Both directory path and output zip file path are required for zipping.")
+            print("Error: Both directory path and output zip file path (or --all) are required for zipping.")
+        if args.prune_cache and args.cache_dir:
+            pruned = prune_cache(args.cache_dir)
+            print(f"Pruned {pruned['archives']} unused archives and {pruned['folders']} unused asset folders "
+                  f"from the build cache.")
+    elif args.action == 'bundle':
+        if not (args.all and args.output):
+            print("Error: A plugins directory (--all) and an output bundle path (--output) are required for bundling.")
+            sys.exit(1)
+        try:
+            policy = load_policy(args.compression_config, args.compression, args.compress_rule)
+        except (OSError, ValueError, TypeError) as error:
+            print(f"Error: Invalid compression policy: {error}")
+            sys.exit(1)
+        if bundle_plugins(args.all, args.output, workers=args.workers, policy=policy, cache_dir=args.cache_dir) is None:
+            sys.exit(1)
+    elif args.action == 'unbundle':
+        if not (args.directory and args.output):
+            print("Error: A bundle path (--directory) and an output directory (--output) are required for unbundling.")
+            sys.exit(1)
+        names = [name.strip() for name in args.name.split(',') if name.strip()] if args.name else None
+        if not unbundle_plugins(args.directory, args.output, names, workers=args.workers):
+            sys.exit(1)
+    elif args.action == 'index':
+        if args.format == 'junit':
+            print("Error: The index can only be printed as text or json.")
+            sys.exit(1)
+        if args.directory:
+            print("Error: Pass the plugins directory to index with --all; --directory names a single plugin.")
+            sys.exit(1)
+        index_path = args.index or (os.path.join(args.all, DEFAULT_INDEX_NAME) if args.all else None)
+        if not index_path:
+            print("Error: A plugins directory (--all) or an index file (--index) is required for indexing.")
+            sys.exit(1)
+        index_plugins(index_path, args.all, args.format, name=args.name,
+                      game_version=args.game_version, depends_on=args.depends_on)
+    elif args.action == 'profile-import':
+        if not args.directory:
+            print("Error: Plugin directory or archive path is required for profiling.")
+            sys.exit(1)
+        if args.format == 'junit':
+            print("Error: The import profile can only be printed as text or json.")
+            sys.exit(1)
+        result = profile_plugin_import(args.directory, args.format)
+        if result is None or result['violations']:
+            sys.exit(1)
+    elif args.action == 'bench':
+        if not args.directory:
+            print("Error: Plugin directory path is required for benchmarking.")
+            sys.exit(1)
+        if args.format == 'junit':
+            print("Error: Bench results can only be printed as text or json.")
+            sys.exit(1)
+        result = bench_plugin(args.directory, args.script, args.frames, args.baseline, args.save_baseline,
+                              args.tolerance, args.format)
+        if result is None or result['regressions']:
+            sys.exit(1)
 
 if __name__ == "__main__":
     main()
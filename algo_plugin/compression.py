@@ -0,0 +1,191 @@
+import os
+import json
+import zlib
+import fnmatch
+import zipfile
+
+AUTO = 'auto'
+
+METHODS = {
+    'stored': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+LEVELS = {
+    'deflate': range(0, 10),
+    'bzip2': range(1, 10),
+}
+
+# Formats that are already compressed; deflating them costs CPU for next to no gain.
+COMPRESSED_EXTENSIONS = [
+    '.png', '.jpg', '.jpeg', '.gif', '.webp',
+    '.mp3', '.ogg', '.oga', '.opus', '.flac', '.m4a',
+    '.mp4', '.webm', '.avi', '.mkv',
+    '.zip', '.gz', '.bz2', '.xz', '.7z', '.whl', '.npz',
+    '.woff', '.woff2',
+]
+
+DEFAULT_AUTO_SAMPLE_SIZE = 64 * 1024
+DEFAULT_AUTO_MIN_SAVING = 0.1
+
+def parse_method(spec):
+    """
+    Parse a compression method such as 'stored', 'deflate', 'deflate:9', 'bzip2:5', 'lzma' or 'auto'.
+    :return: A (compress_type, compresslevel) tuple, or AUTO.
+    """
+    spec = spec.strip().lower()
+    if spec == AUTO:
+        return AUTO
+    name, _, level = spec.partition(':')
+    if name not in METHODS:
+        raise ValueError(f"Unknown compression method '{name}'; expected one of: {', '.join(list(METHODS) + [AUTO])}")
+    if not level:
+        return METHODS[name], None
+    if name not in LEVELS:
+        raise ValueError(f"Compression method '{name}' does not take a level")
+    try:
+        level = int(level)
+    except ValueError:
+        raise ValueError(f"Invalid compression level '{level}' for '{name}'")
+    if level not in LEVELS[name]:
+        raise ValueError(f"Compression level for '{name}' must be between {LEVELS[name][0]} and {LEVELS[name][-1]}")
+    return METHODS[name], level
+
+def parse_size(text):
+    units = {'k': 1024, 'kb': 1024, 'm': 1024 ** 2, 'mb': 1024 ** 2, 'g': 1024 ** 3, 'gb': 1024 ** 3}
+    text = str(text).strip().lower()
+    for suffix in sorted(units, key=len, reverse=True):
+        if text.endswith(suffix):
+            return int(float(text[:-len(suffix)]) * units[suffix])
+    return int(text)
+
+def parse_rule(text):
+    """
+    Parse a command line rule into a rule dict.
+    Examples: '.png,.mp3=stored', 'assets/*=deflate:1', 'size>10MB=lzma', 'size<256=stored'.
+    """
+    condition, separator, method = text.rpartition('=')
+    if not separator or not condition:
+        raise ValueError(f"Invalid compression rule '{text}'; expected CONDITION=METHOD")
+    rule = {'method': method}
+    condition = condition.strip()
+    if condition.startswith('size>'):
+        rule['min_size'] = parse_size(condition[5:])
+    elif condition.startswith('size<'):
+        rule['max_size'] = parse_size(condition[5:])
+    else:
+        for part in condition.split(','):
+            part = part.strip()
+            if part.startswith('.'):
+                rule.setdefault('extensions', []).append(part)
+            elif part:
+                rule.setdefault('paths', []).append(part)
+    return rule
+
+class CompressionPolicy:
+    """
+    Decides how each archive member is compressed.
+    Rules are checked in order and the first match wins; a rule matches when all of its
+    conditions (extensions, path globs, min_size, max_size) hold. Files matching no rule
+    use the default method. The 'auto' method compresses a sample from the start of the
+    file and stores the file when the sample doesn't shrink enough.
+    """
+
+    def __init__(self, default='deflate', rules=None, auto_method='deflate',
+                 auto_sample_size=DEFAULT_AUTO_SAMPLE_SIZE, auto_min_saving=DEFAULT_AUTO_MIN_SAVING):
+        self.default = default
+        self.rules = [dict(rule) for rule in (rules or [])]
+        self.auto_method = auto_method
+        self.auto_sample_size = int(auto_sample_size)
+        self.auto_min_saving = float(auto_min_saving)
+
+        # Parse everything up front so a bad policy fails before any file is touched.
+        self._default = parse_method(default)
+        self._auto_method = parse_method(auto_method)
+        if self._auto_method == AUTO:
+            raise ValueError("auto_method must be a concrete compression method")
+        self._rules = []
+        for rule in self.rules:
+            unknown = set(rule) - {'method', 'extensions', 'paths', 'min_size', 'max_size'}
+            if unknown:
+                raise ValueError(f"Unknown compression rule keys: {', '.join(sorted(unknown))}")
+            if 'method' not in rule:
+                raise ValueError(f"Compression rule {rule} has no method")
+            self._rules.append((
+                tuple(extension.lower() for extension in rule.get('extensions', [])),
+                tuple(rule.get('paths', [])),
+                parse_size(rule['min_size']) if 'min_size' in rule else None,
+                parse_size(rule['max_size']) if 'max_size' in rule else None,
+                parse_method(rule['method']),
+            ))
+
+    @classmethod
+    def default_policy(cls):
+        """Deflate everything except files that are already compressed."""
+        return cls(rules=[{'extensions': COMPRESSED_EXTENSIONS, 'method': 'stored'}])
+
+    @classmethod
+    def from_dict(cls, config):
+        return cls(**config)
+
+    @classmethod
+    def from_config(cls, config_path):
+        with open(config_path, 'r') as file:
+            return cls.from_dict(json.load(file))
+
+    def to_dict(self):
+        return {
+            'default': self.default,
+            'rules': self.rules,
+            'auto_method': self.auto_method,
+            'auto_sample_size': self.auto_sample_size,
+            'auto_min_saving': self.auto_min_saving,
+        }
+
+    def method_for(self, arcname, size):
+        """Return the (compress_type, compresslevel) configured for a member, or AUTO."""
+        extension = os.path.splitext(arcname)[1].lower()
+        for extensions, paths, min_size, max_size, method in self._rules:
+            if extensions and extension not in extensions:
+                continue
+            if paths and not any(fnmatch.fnmatchcase(arcname, pattern) for pattern in paths):
+                continue
+            if min_size is not None and size < min_size:
+                continue
+            if max_size is not None and size > max_size:
+                continue
+            return method
+        return self._default
+
+    def sample(self, file_path):
+        """Resolve AUTO for a file by test-compressing its first chunk."""
+        with open(file_path, 'rb') as file:
+            chunk = file.read(self.auto_sample_size)
+        if not chunk:
+            return METHODS['stored'], None
+        saving = 1.0 - len(zlib.compress(chunk, 1)) / len(chunk)
+        if saving < self.auto_min_saving:
+            return METHODS['stored'], None
+        return self._auto_method
+
+    def choose(self, arcname, file_path, size):
+        method = self.method_for(arcname, size)
+        if method == AUTO:
+            return self.sample(file_path)
+        return method
+
+def load_policy(config_path=None, default=None, rules=None):
+    """
+    Build the policy used by 'algo-plugin zip' from a config file and command line options.
+    Command line rules are checked before the ones from the config file.
+    """
+    if config_path:
+        config = CompressionPolicy.from_config(config_path).to_dict()
+    else:
+        config = CompressionPolicy.default_policy().to_dict()
+    if default:
+        config['default'] = default
+    if rules:
+        config['rules'] = [parse_rule(rule) for rule in rules] + config['rules']
+    return CompressionPolicy.from_dict(config)
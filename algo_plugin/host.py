@@ -0,0 +1,254 @@
+import os
+import time
+
+FRAME_BUDGET_MS = 1000.0 / 60
+# A plugin that overruns its budget sits out at most this many frames in a row.
+MAX_SKIPPED_FRAMES = 30
+STATS_INTERVAL = 60
+_POSITIONAL_EVENTS = ('MOUSEMOTION', 'MOUSEBUTTONDOWN', 'MOUSEBUTTONUP')
+
+class PluginStats:
+    """Live counters of one hosted plugin. Times are in milliseconds."""
+
+    def __init__(self):
+        self.frames = 0
+        self.updates = 0
+        self.draws = 0
+        self.skipped_frames = 0
+        self.deferred_frames = 0
+        self.last_update_ms = 0.0
+        self.last_draw_ms = 0.0
+        self.total_update_ms = 0.0
+        self.total_draw_ms = 0.0
+        self.max_update_ms = 0.0
+        self.max_draw_ms = 0.0
+        self.surface_bytes = 0
+
+    def to_dict(self):
+        return {
+            'frames': self.frames,
+            'updates': self.updates,
+            'draws': self.draws,
+            'skipped_frames': self.skipped_frames,
+            'deferred_frames': self.deferred_frames,
+            'last_update_ms': self.last_update_ms,
+            'last_draw_ms': self.last_draw_ms,
+            'mean_update_ms': self.total_update_ms / self.updates if self.updates else 0.0,
+            'mean_draw_ms': self.total_draw_ms / self.draws if self.draws else 0.0,
+            'max_update_ms': self.max_update_ms,
+            'max_draw_ms': self.max_draw_ms,
+            'surface_bytes': self.surface_bytes,
+        }
+
+class HostedPlugin:
+    """A plugin placed on the host screen, with its own offscreen surface."""
+
+    def __init__(self, name, plugin, rect, surface, budget_ms):
+        self.name = name
+        self.plugin = plugin
+        self.rect = rect
+        self.surface = surface
+        self.budget_ms = budget_ms
+        self.stats = PluginStats()
+        self.stats.surface_bytes = surface.get_pitch() * surface.get_height()
+        self.skip = 0
+        self.pending_events = []
+        self.pending_delta = 0.0
+
+class PluginHost:
+    """
+    Runs many PluginBase plugins from one loop, each in its own rectangle of the screen.
+    Every plugin draws onto an offscreen surface, and only the surfaces of plugins that ran
+    this frame are composited, so frame() returns just those rectangles for
+    pygame.display.update. Each plugin has a time budget per frame (update plus draw). A
+    plugin that goes over it sits out the next frames in proportion, so its average cost stays
+    within budget. Once the whole frame budget is spent, the remaining plugins are deferred to
+    the next frame, starting with them. Events and elapsed time are saved for skipped and
+    deferred plugins and delivered on their next update. A plugin that is not updated is not
+    drawn either, so it must only change its picture in update(). Plugins whose active flag is
+    False are not run.
+    :param stats_hook: Called as stats_hook(host.stats()) every stats_interval frames.
+    """
+
+    def __init__(self, screen, frame_budget_ms=FRAME_BUDGET_MS, stats_hook=None, stats_interval=STATS_INTERVAL):
+        import pygame
+        self.pygame = pygame
+        self.screen = screen
+        self.frame_budget_ms = frame_budget_ms
+        self.stats_hook = stats_hook
+        self.stats_interval = stats_interval
+        self.plugins = []
+        self.focus = None
+        self.frame_count = 0
+        self._next = 0
+        self._event_names = {getattr(pygame, name): name for name in _POSITIONAL_EVENTS}
+
+    def _surface(self, size):
+        surface = self.pygame.Surface(size)
+        if self.pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        return surface
+
+    def add(self, plugin, rect, name=None, budget_ms=None, surface=None):
+        """
+        Host an already constructed plugin in rect (anything pygame.Rect accepts).
+        :param budget_ms: Time the plugin may take per frame, default an equal share of the frame budget.
+        """
+        rect = self.pygame.Rect(rect)
+        hosted = HostedPlugin(name or getattr(plugin, 'plugin_id', None) or f'plugin-{len(self.plugins)}',
+                              plugin, rect, surface or self._surface(rect.size), budget_ms)
+        self.plugins.append(hosted)
+        if self.focus is None:
+            self.focus = hosted
+        return hosted
+
+    def activate(self, spec, rect, budget_ms=None, **kwargs):
+        """Construct a discovered plugin (loader.PluginSpec) with its offscreen surface as screen, and host it."""
+        rect = self.pygame.Rect(rect)
+        surface = self._surface(rect.size)
+        plugin = spec.activate(screen=surface, **kwargs)
+        return self.add(plugin, rect, name=spec.name, budget_ms=budget_ms, surface=surface)
+
+    def remove(self, name):
+        self.plugins = [hosted for hosted in self.plugins if hosted.name != name]
+        if self.focus is not None and self.focus.name == name:
+            self.focus = self.plugins[0] if self.plugins else None
+        self._next = 0
+
+    def _budget(self, hosted):
+        if hosted.budget_ms is not None:
+            return hosted.budget_ms
+        return self.frame_budget_ms / max(len(self.plugins), 1)
+
+    def route_events(self, events):
+        """
+        Give each event to the plugins that should see it: mouse events go to the plugin under
+        the pointer, in its own coordinates, and move the keyboard focus there; other events go
+        to the focused plugin, and QUIT to every plugin.
+        """
+        pygame = self.pygame
+        routed = {id(hosted): [] for hosted in self.plugins}
+        for event in events:
+            if event.type == pygame.QUIT:
+                for hosted in self.plugins:
+                    routed[id(hosted)].append(event)
+            elif event.type in self._event_names:
+                for hosted in reversed(self.plugins):
+                    if hosted.rect.collidepoint(event.pos):
+                        attributes = dict(event.dict)
+                        attributes['pos'] = (event.pos[0] - hosted.rect.x, event.pos[1] - hosted.rect.y)
+                        routed[id(hosted)].append(pygame.event.Event(event.type, attributes))
+                        if event.type == pygame.MOUSEBUTTONDOWN:
+                            self.focus = hosted
+                        break
+            elif self.focus is not None:
+                routed[id(self.focus)].append(event)
+        return routed
+
+    def frame(self, events, delta_time):
+        """
+        Run one frame: update and draw the plugins the scheduler lets run, composite their
+        surfaces onto the screen and return the list of screen rectangles that changed.
+        """
+        clock = time.perf_counter_ns
+        start = clock()
+        routed = self.route_events(events)
+        dirty = []
+        count = len(self.plugins)
+        order = [self.plugins[(self._next + offset) % count] for offset in range(count)] if count else []
+        next_first = None
+
+        for hosted in order:
+            if not getattr(hosted.plugin, 'active', True):
+                continue
+            hosted.stats.frames += 1
+            hosted.pending_events.extend(routed[id(hosted)])
+            hosted.pending_delta += delta_time
+            if hosted.skip > 0:
+                hosted.skip -= 1
+                hosted.stats.skipped_frames += 1
+                continue
+            if (clock() - start) / 1e6 >= self.frame_budget_ms and dirty:
+                hosted.stats.deferred_frames += 1
+                if next_first is None:
+                    next_first = hosted
+                continue
+
+            events_now, hosted.pending_events = hosted.pending_events, []
+            delta_now, hosted.pending_delta = hosted.pending_delta, 0.0
+            began = clock()
+            hosted.plugin.update(events_now, delta_now)
+            updated = clock()
+            hosted.plugin.draw(hosted.surface)
+            drawn = clock()
+
+            stats = hosted.stats
+            stats.updates += 1
+            stats.draws += 1
+            stats.last_update_ms = (updated - began) / 1e6
+            stats.last_draw_ms = (drawn - updated) / 1e6
+            stats.total_update_ms += stats.last_update_ms
+            stats.total_draw_ms += stats.last_draw_ms
+            stats.max_update_ms = max(stats.max_update_ms, stats.last_update_ms)
+            stats.max_draw_ms = max(stats.max_draw_ms, stats.last_draw_ms)
+
+            spent = stats.last_update_ms + stats.last_draw_ms
+            budget = self._budget(hosted)
+            if budget > 0 and spent > budget:
+                hosted.skip = min(int(spent / budget), MAX_SKIPPED_FRAMES)
+            dirty.append(hosted)
+
+        if next_first is not None:
+            self._next = self.plugins.index(next_first)
+        elif count:
+            self._next = (self._next + 1) % count
+
+        rects = [self.screen.blit(hosted.surface, hosted.rect) for hosted in dirty]
+        self.frame_count += 1
+        if self.stats_hook is not None and self.frame_count % self.stats_interval == 0:
+            self.stats_hook(self.stats())
+        return rects
+
+    def enable_profiling(self, capture_frames=0, output_dir='.', trace_memory=True):
+        """
+        Turn on the profiling hooks of every hosted plugin built on the generated PluginBase.
+        Their summaries then appear under 'profile' in stats().
+        :param capture_frames: If set, each plugin also records a cProfile of that many frames
+            to output_dir/<name>.prof.
+        """
+        for hosted in self.plugins:
+            plugin = hosted.plugin
+            if not hasattr(plugin, 'enable_profiling'):
+                continue
+            plugin.enable_profiling(trace_memory)
+            if capture_frames:
+                plugin.capture_profile(capture_frames, os.path.join(output_dir, f'{hosted.name}.prof'))
+
+    def stats(self):
+        """
+        Counters per plugin name: update and draw times, skipped and deferred frames, surface
+        bytes, and the plugin's own profile_stats() as 'profile' when its profiling is on.
+        """
+        stats = {}
+        for hosted in self.plugins:
+            stats[hosted.name] = hosted.stats.to_dict()
+            profile_stats = getattr(hosted.plugin, 'profile_stats', None)
+            profile = profile_stats() if profile_stats is not None else None
+            if profile is not None:
+                stats[hosted.name]['profile'] = profile
+        return stats
+
+    def run(self, fps=60, max_frames=None):
+        """Simple main loop: poll events, run frames, update the changed rectangles, until QUIT."""
+        pygame = self.pygame
+        clock = pygame.time.Clock()
+        frames = 0
+        running = True
+        while running and (max_frames is None or frames < max_frames):
+            events = pygame.event.get()
+            running = not any(event.type == pygame.QUIT for event in events)
+            rects = self.frame(events, clock.get_time() / 1000.0)
+            if rects:
+                pygame.display.update(rects)
+            clock.tick(fps)
+            frames += 1
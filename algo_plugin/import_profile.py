@@ -0,0 +1,290 @@
+import os
+import re
+import sys
+import json
+import zipfile
+import tempfile
+import subprocess
+
+IMPORT_START = '--- algo-plugin: import start ---'
+IMPORT_END = '--- algo-plugin: import end ---'
+CONSTRUCT_END = '--- algo-plugin: construct end ---'
+RESULT_PREFIX = 'algo-plugin-result: '
+
+BUDGET_KEYS = {
+    'import_ms': 'import time (ms)',
+    'construct_ms': 'construction time (ms)',
+    'peak_memory_mb': 'peak traced memory during construction (MB)',
+}
+
+# Distributions whose import name differs from the project name, for Pythons without
+# importlib.metadata.packages_distributions().
+KNOWN_IMPORT_NAMES = {
+    'scikit-learn': ['sklearn'],
+    'scikit-image': ['skimage'],
+    'pillow': ['PIL'],
+    'opencv-python': ['cv2'],
+    'opencv-python-headless': ['cv2'],
+    'pyyaml': ['yaml'],
+    'beautifulsoup4': ['bs4'],
+    'pygame-ce': ['pygame'],
+}
+
+# Runs in the fresh interpreter started with -X importtime. The markers on stderr split the
+# import-time log into the plugin import and the plugin construction.
+_CHILD_SCRIPT = r'''
+import sys, json, time, tracemalloc
+from algo_plugin.loader import discover_plugin, instantiate_plugin
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def max_rss():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+spec = discover_plugin(sys.argv[1])
+sys.stderr.write(%(import_start)r + '\n'); sys.stderr.flush()
+start = time.perf_counter()
+plugin_class = spec.load_class()
+import_seconds = time.perf_counter() - start
+sys.stderr.write(%(import_end)r + '\n'); sys.stderr.flush()
+
+screen = None
+if 'pygame' in sys.modules:
+    import pygame
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((640, 480))
+
+rss_before = max_rss()
+tracemalloc.start()
+start = time.perf_counter()
+instantiate_plugin(plugin_class, screen=screen)
+construct_seconds = time.perf_counter() - start
+traced_now, traced_peak = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+rss_after = max_rss()
+sys.stderr.write(%(construct_end)r + '\n'); sys.stderr.flush()
+
+print(%(result_prefix)r + json.dumps({
+    'import_seconds': import_seconds,
+    'construct_seconds': construct_seconds,
+    'peak_traced_bytes': traced_peak,
+    'retained_traced_bytes': traced_now,
+    'max_rss_bytes': rss_after,
+    'rss_growth_bytes': None if rss_after is None else rss_after - rss_before,
+}))
+''' % {'import_start': IMPORT_START, 'import_end': IMPORT_END,
+       'construct_end': CONSTRUCT_END, 'result_prefix': RESULT_PREFIX}
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$')
+
+def parse_importtime(lines):
+    """
+    Turn '-X importtime' lines into a tree of {'module', 'self_us', 'cumulative_us', 'children'}.
+    Python logs a module after its imports, indented two spaces per nesting level.
+    """
+    pending = {}
+    for line in lines:
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        depth = len(match.group(3)) // 2
+        node = {
+            'module': match.group(4),
+            'self_us': int(match.group(1)),
+            'cumulative_us': int(match.group(2)),
+            'children': pending.pop(depth + 1, []),
+        }
+        pending.setdefault(depth, []).append(node)
+    # Anything left deeper than the top level belongs to a module whose line was never logged.
+    roots = []
+    for depth in sorted(pending):
+        roots.extend(pending[depth])
+    return roots
+
+def dependency_modules(dependencies):
+    """Map each declared dependency to the top-level module names it provides."""
+    try:
+        from importlib.metadata import packages_distributions
+        provided = {}
+        for module, distributions in packages_distributions().items():
+            for distribution in distributions:
+                provided.setdefault(_normalize(distribution), []).append(module)
+    except ImportError:
+        provided = {}
+
+    modules = {}
+    for requirement in dependencies:
+        match = re.match(r'\s*([A-Za-z0-9][A-Za-z0-9._-]*)', requirement)
+        if not match:
+            continue
+        name = _normalize(match.group(1))
+        modules[requirement.strip()] = sorted(set(
+            provided.get(name) or KNOWN_IMPORT_NAMES.get(name) or [name.replace('-', '_')]))
+    return modules
+
+def _normalize(name):
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+def attribute_imports(roots, dependencies, local_modules):
+    """
+    Split import time between the declared dependencies, the plugin's own modules and
+    everything else. A module is charged to whoever imported it first, so time spent in
+    scipy because sklearn imported it counts towards scikit-learn.
+    """
+    owners = {}
+    for requirement, modules in dependency_modules(dependencies).items():
+        for module in modules:
+            owners[module] = requirement
+    for module in local_modules:
+        owners.setdefault(module, '(plugin)')
+
+    breakdown = {requirement: {'modules': [], 'cumulative_us': 0} for requirement in dependencies}
+    breakdown['(plugin)'] = {'modules': [], 'cumulative_us': 0}
+    breakdown['(other)'] = {'modules': [], 'cumulative_us': 0}
+
+    def visit(nodes):
+        for node in nodes:
+            top_level = node['module'].split('.')[0]
+            owner = owners.get(top_level)
+            if owner is None and node['module'].startswith('_algo_plugin_'):
+                owner = '(plugin)'
+            if owner is None:
+                # Not ours: charge its own time to '(other)' and look inside for our modules.
+                breakdown['(other)']['cumulative_us'] += node['self_us']
+                visit(node['children'])
+                continue
+            entry = breakdown.setdefault(owner, {'modules': [], 'cumulative_us': 0})
+            entry['cumulative_us'] += node['cumulative_us']
+            if node['module'] not in entry['modules']:
+                entry['modules'].append(node['module'])
+
+    visit(roots)
+    return breakdown
+
+def check_budget(result, budget):
+    """Return a message for every startup budget entry the profile exceeds."""
+    measured = {
+        'import_ms': result['import']['seconds'] * 1000,
+        'construct_ms': result['construct']['seconds'] * 1000,
+        'peak_memory_mb': result['construct']['peak_traced_bytes'] / (1024 * 1024),
+    }
+    violations = []
+    for key, limit in sorted((budget or {}).items()):
+        if key in measured and measured[key] > limit:
+            violations.append(f"{BUDGET_KEYS[key]} is {measured[key]:.1f}, over the budget of {limit}")
+    return violations
+
+def _profile_directory(plugin_dir, timeout):
+    with open(os.path.join(plugin_dir, 'manifest.json'), 'r') as file:
+        manifest = json.load(file)
+
+    env = dict(os.environ)
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env.setdefault('SDL_AUDIODRIVER', 'dummy')
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_root, env.get('PYTHONPATH')]))
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', _CHILD_SCRIPT, os.path.abspath(plugin_dir)],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env, timeout=timeout,
+                             universal_newlines=True)
+
+    measurements = None
+    for line in process.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            measurements = json.loads(line[len(RESULT_PREFIX):])
+    if process.returncode != 0 or measurements is None:
+        errors = [line for line in process.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError(f"Plugin '{plugin_dir}' failed to import or construct:\n" + '\n'.join(errors[-20:]))
+
+    stderr = process.stderr.splitlines()
+    start, end, construct_end = (stderr.index(IMPORT_START), stderr.index(IMPORT_END), stderr.index(CONSTRUCT_END))
+    import_tree = parse_importtime(stderr[start + 1:end])
+    construct_tree = parse_importtime(stderr[end + 1:construct_end])
+
+    local_modules = [name[:-3] for name in os.listdir(plugin_dir) if name.endswith('.py')]
+    dependencies = [dependency for dependency in manifest.get('dependencies', []) if isinstance(dependency, str)]
+    result = {
+        'plugin': manifest.get('name'),
+        'path': plugin_dir,
+        'import': {'seconds': measurements['import_seconds'], 'tree': import_tree},
+        'construct': {
+            'seconds': measurements['construct_seconds'],
+            'peak_traced_bytes': measurements['peak_traced_bytes'],
+            'retained_traced_bytes': measurements['retained_traced_bytes'],
+            'max_rss_bytes': measurements['max_rss_bytes'],
+            'rss_growth_bytes': measurements['rss_growth_bytes'],
+            'imports': construct_tree,
+        },
+        'dependencies': attribute_imports(import_tree + construct_tree, dependencies, local_modules),
+        'budget': manifest.get('startup_budget') or {},
+    }
+    result['violations'] = check_budget(result, result['budget'])
+    return result
+
+def profile_import(path, timeout=None):
+    """
+    Import and construct a plugin in a fresh interpreter and measure the cost.
+    :param path: Plugin directory or plugin archive (.zip).
+    :return: Result dict with the import time and '-X importtime' tree, the import time per
+        declared dependency, the construction time and memory, and any startup budget violations.
+    """
+    if os.path.isfile(path) and zipfile.is_zipfile(path):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with zipfile.ZipFile(path, 'r') as zip_file:
+                zip_file.extractall(temp_dir)
+            plugin_dir = temp_dir
+            if not os.path.exists(os.path.join(temp_dir, 'manifest.json')):
+                # Archives may hold the plugin in a single top-level folder.
+                nested = [os.path.join(temp_dir, name) for name in os.listdir(temp_dir)
+                          if os.path.exists(os.path.join(temp_dir, name, 'manifest.json'))]
+                if len(nested) == 1:
+                    plugin_dir = nested[0]
+            result = _profile_directory(plugin_dir, timeout)
+        result['path'] = path
+        return result
+    return _profile_directory(path, timeout)
+
+def format_tree(nodes, min_us=1000, max_depth=3, indent=0):
+    """Render an import tree, largest first, hiding modules cheaper than min_us or nested deeper than max_depth."""
+    lines = []
+    for node in sorted(nodes, key=lambda node: node['cumulative_us'], reverse=True):
+        if node['cumulative_us'] < min_us:
+            continue
+        lines.append(f"{node['cumulative_us'] / 1000:10.1f} ms  {'  ' * indent}{node['module']}")
+        if indent + 1 < max_depth:
+            lines.extend(format_tree(node['children'], min_us, max_depth, indent + 1))
+    return lines
+
+def format_result(result, min_us=None, max_depth=3):
+    if min_us is None:
+        # Show what matters: modules taking at least 2% of the import, and at least 1 ms.
+        min_us = max(1000, result['import']['seconds'] * 1e6 * 0.02)
+    lines = [f"Plugin: {result['plugin']} ({result['path']})", '',
+             f"Import: {result['import']['seconds'] * 1000:.1f} ms (modules over {min_us / 1000:.1f} ms, cumulative)"]
+    lines.extend(format_tree(result['import']['tree'], min_us, max_depth) or ['  (nothing over the threshold)'])
+    lines += ['', 'Import time by dependency:']
+    for name, entry in sorted(result['dependencies'].items(), key=lambda item: item[1]['cumulative_us'], reverse=True):
+        modules = f" ({', '.join(entry['modules'])})" if entry['modules'] else ''
+        lines.append(f"{entry['cumulative_us'] / 1000:10.1f} ms  {name}{modules}")
+
+    construct = result['construct']
+    lines += ['', f"Construction: {construct['seconds'] * 1000:.1f} ms, "
+                  f"peak traced memory {construct['peak_traced_bytes'] / (1024 * 1024):.1f} MB"]
+    if construct['rss_growth_bytes'] is not None:
+        lines.append(f"Max RSS {construct['max_rss_bytes'] / (1024 * 1024):.1f} MB "
+                     f"(+{construct['rss_growth_bytes'] / (1024 * 1024):.1f} MB during construction)")
+    if construct['imports']:
+        lines.append('Imports during construction:')
+        lines.extend(format_tree(construct['imports'], min_us, max_depth))
+
+    if result['budget']:
+        lines.append('')
+        lines.extend(f"Over budget: {violation}" for violation in result['violations'])
+        if not result['violations']:
+            lines.append('Within the startup budget.')
+    return '\n'.join(lines)
@@ -0,0 +1,222 @@
+import os
+import re
+import json
+import sqlite3
+import zipfile
+from algo_plugin.archive import archive_root
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_NAME = '.plugin-index.sqlite'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plugins (
+    source TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    name TEXT,
+    version TEXT,
+    game_version TEXT,
+    python_version TEXT,
+    manifest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plugins_name ON plugins (name);
+CREATE INDEX IF NOT EXISTS plugins_game_version ON plugins (game_version);
+CREATE TABLE IF NOT EXISTS dependencies (
+    source TEXT NOT NULL REFERENCES plugins (source) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    requirement TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dependencies_name ON dependencies (name);
+CREATE INDEX IF NOT EXISTS dependencies_source ON dependencies (source);
+"""
+
+_REQUIREMENT_NAME_RE = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+def normalize_name(name):
+    """Normalize a distribution name the way pip does (PEP 503), e.g. 'Scikit_Learn' -> 'scikit-learn'."""
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+def requirement_name(requirement):
+    match = _REQUIREMENT_NAME_RE.match(requirement)
+    return normalize_name(match.group(1)) if match else None
+
+def read_archive_manifest(archive_path):
+    """Return the parsed manifest.json of a plugin archive, at its root or in a single top-level folder."""
+    with zipfile.ZipFile(archive_path, 'r') as zip_file:
+        member = archive_root(zip_file.namelist(), archive_path) + 'manifest.json'
+        return json.loads(zip_file.read(member).decode('utf-8'))
+
+def find_sources(plugins_root):
+    """
+    Return (path, kind, stat) for every plugin under plugins_root: each direct subdirectory
+    with a manifest.json ('directory', stamped by the manifest) and each .zip ('archive').
+    """
+    sources = []
+    with os.scandir(plugins_root) as entries:
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir():
+                manifest_path = os.path.join(entry.path, 'manifest.json')
+                try:
+                    sources.append((os.path.abspath(entry.path), 'directory', os.stat(manifest_path)))
+                except OSError:
+                    continue
+            elif entry.name.endswith('.zip') and entry.is_file():
+                sources.append((os.path.abspath(entry.path), 'archive', entry.stat()))
+    return sorted(sources)
+
+_WILDCARDS = ('x', '*')
+
+def _escape_like(text):
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def game_version_clause(pattern):
+    """
+    Return (sql, params) matching plugins.game_version against a query such as '1.5.x',
+    '1.5.*', '1.*.2' or '1.5.2'. A trailing wildcard also matches the shorter version,
+    so '1.5.x' matches both '1.5' and '1.5.2'.
+    """
+    parts = pattern.strip().split('.')
+    trailing = False
+    while parts and parts[-1].lower() in _WILDCARDS:
+        parts.pop()
+        trailing = True
+    if not parts:
+        return '1', []
+    like = '.'.join('%' if part.lower() in _WILDCARDS else _escape_like(part) for part in parts)
+    if trailing:
+        return "(p.game_version LIKE ? ESCAPE '\\' OR p.game_version LIKE ? ESCAPE '\\')", [like, like + '.%']
+    return "p.game_version LIKE ? ESCAPE '\\'", [like]
+
+class PluginIndex:
+    """
+    On-disk SQLite index of plugin manifests, so a host can list and query plugins without
+    opening every manifest.json. update() only re-reads plugins whose manifest or archive
+    mtime or size changed.
+    """
+
+    def __init__(self, index_path):
+        self.index_path = index_path
+        directory = os.path.dirname(os.path.abspath(index_path))
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(index_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version != INDEX_VERSION:
+            self.connection.executescript('DROP TABLE IF EXISTS dependencies; DROP TABLE IF EXISTS plugins;')
+            self.connection.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def update(self, plugins_root):
+        """
+        Bring the index up to date with plugins_root.
+        :return: Dict with the number of 'added', 'updated', 'removed' and 'unchanged' plugins,
+            and 'errors', a list of (path, message) for plugins that couldn't be read.
+        """
+        counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'errors': []}
+        root = os.path.abspath(plugins_root)
+        prefix = os.path.join(root, '')
+        known = {row['source']: (row['mtime_ns'], row['size']) for row in self.connection.execute(
+            'SELECT source, mtime_ns, size FROM plugins WHERE substr(source, 1, ?) = ?', (len(prefix), prefix))}
+
+        seen = set()
+        with self.connection:
+            for path, kind, stat in find_sources(root):
+                seen.add(path)
+                if known.get(path) == (stat.st_mtime_ns, stat.st_size):
+                    counts['unchanged'] += 1
+                    continue
+                try:
+                    if kind == 'archive':
+                        manifest = read_archive_manifest(path)
+                    else:
+                        with open(os.path.join(path, 'manifest.json'), 'r') as file:
+                            manifest = json.load(file)
+                    if not isinstance(manifest, dict):
+                        raise ValueError("manifest must be a JSON object")
+                except (OSError, ValueError, zipfile.BadZipFile) as error:
+                    counts['errors'].append((path, str(error)))
+                    if path in known:
+                        self.connection.execute('DELETE FROM plugins WHERE source = ?', (path,))
+                    continue
+                self._store(path, kind, stat, manifest)
+                counts['updated' if path in known else 'added'] += 1
+
+            for path in set(known) - seen:
+                self.connection.execute('DELETE FROM plugins WHERE source = ?', (path,))
+                counts['removed'] += 1
+        return counts
+
+    def _store(self, path, kind, stat, manifest):
+        def text(field):
+            value = manifest.get(field)
+            return value if isinstance(value, str) else None
+
+        self.connection.execute('DELETE FROM plugins WHERE source = ?', (path,))
+        self.connection.execute(
+            'INSERT INTO plugins (source, kind, mtime_ns, size, name, version, game_version, python_version, manifest) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (path, kind, stat.st_mtime_ns, stat.st_size, text('name'), text('version'),
+             text('game_version'), text('python_version'), json.dumps(manifest, sort_keys=True)))
+        dependencies = manifest.get('dependencies')
+        for requirement in dependencies if isinstance(dependencies, list) else []:
+            if isinstance(requirement, str) and requirement_name(requirement):
+                self.connection.execute('INSERT INTO dependencies (source, name, requirement) VALUES (?, ?, ?)',
+                                        (path, requirement_name(requirement), requirement.strip()))
+
+    def query(self, name=None, game_version=None, depends_on=None):
+        """
+        Return matching plugins as dicts with source, kind, name, version, game_version,
+        python_version and dependencies. All filters are optional and combined with AND.
+        :param game_version: Compatible game version such as '1.5.x' or '1.5.2'.
+        :param depends_on: Dependency name such as 'scikit-learn', matched after normalization.
+        """
+        clauses, params = [], []
+        if name is not None:
+            clauses.append('p.name = ?')
+            params.append(name)
+        if game_version is not None:
+            clause, clause_params = game_version_clause(game_version)
+            clauses.append(clause)
+            params += clause_params
+        if depends_on is not None:
+            clauses.append('EXISTS (SELECT 1 FROM dependencies d WHERE d.source = p.source AND d.name = ?)')
+            params.append(normalize_name(depends_on))
+        # One query: each plugin's rows come together, one per dependency (or one with NULL).
+        sql = ('SELECT p.*, dep.requirement AS requirement FROM plugins p'
+               ' LEFT JOIN dependencies dep ON dep.source = p.source')
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY p.name, p.version, p.source, dep.rowid'
+
+        plugins = []
+        for row in self.connection.execute(sql, params):
+            if not plugins or plugins[-1]['source'] != row['source']:
+                plugins.append({
+                    'source': row['source'],
+                    'kind': row['kind'],
+                    'name': row['name'],
+                    'version': row['version'],
+                    'game_version': row['game_version'],
+                    'python_version': row['python_version'],
+                    'dependencies': [],
+                })
+            if row['requirement'] is not None:
+                plugins[-1]['dependencies'].append(row['requirement'])
+        return plugins
+
+    def get(self, name):
+        """Return the indexed plugins called name (one per source)."""
+        return self.query(name=name)
@@ -0,0 +1,318 @@
+import os
+import re
+import ast
+import sys
+import json
+import hashlib
+import types
+import inspect
+import zipfile
+import zipimport
+import contextlib
+import importlib.util
+from algo_plugin.archive import DirectoryAssets, PluginArchive
+
+DEFAULT_ENTRY_MODULE = 'plugin'
+ENTRY_POINT_RE = re.compile(r'^([A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*):([A-Za-z_]\w*)$')
+
+class PluginLoadError(Exception):
+    pass
+
+def parse_entry_point(entry_point):
+    """Split a manifest entry point such as 'plugin:MyPlugin' into ('plugin', 'MyPlugin')."""
+    match = ENTRY_POINT_RE.match(entry_point or '')
+    if not match:
+        raise PluginLoadError(f"Invalid entry point '{entry_point}'; expected 'module:ClassName'")
+    return match.group(1), match.group(2)
+
+def module_path(plugin_dir, module_name):
+    path = os.path.join(plugin_dir, *module_name.split('.'))
+    if os.path.isdir(path):
+        return os.path.join(path, '__init__.py')
+    return path + '.py'
+
+def find_plugin_class(source_path, base_name='PluginBase'):
+    """
+    Return the name of the first class in source_path deriving from base_name, by reading the
+    source with ast. Nothing is imported or executed.
+    """
+    with open(source_path, 'rb') as file:
+        return find_plugin_class_in_source(file.read(), source_path, base_name)
+
+def find_plugin_class_in_source(source, filename, base_name='PluginBase'):
+    tree = ast.parse(source, filename=filename)
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            for base in node.bases:
+                name = base.attr if isinstance(base, ast.Attribute) else getattr(base, 'id', None)
+                if name == base_name:
+                    return node.name
+    return None
+
+def instantiate_plugin(plugin_class, screen=None, **kwargs):
+    """
+    Construct a plugin, passing screen only to constructors that take it. Plugins may define
+    __init__(self, screen), __init__(self, **kwargs) or __init__(self).
+    """
+    parameters = inspect.signature(plugin_class).parameters
+    accepts_kwargs = any(parameter.kind == parameter.VAR_KEYWORD for parameter in parameters.values())
+    if accepts_kwargs or 'screen' in parameters:
+        kwargs.setdefault('screen', screen)
+    if not accepts_kwargs:
+        kwargs = {name: value for name, value in kwargs.items() if name in parameters}
+    return plugin_class(**kwargs)
+
+def _local_module_names(plugin_dir):
+    # Top-level modules a plugin can import by plain name, e.g. 'plugin_base'.
+    names = set()
+    with os.scandir(plugin_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith('.py'):
+                names.add(entry.name[:-3])
+            elif entry.is_dir() and os.path.exists(os.path.join(entry.path, '__init__.py')):
+                names.add(entry.name)
+    return names
+
+@contextlib.contextmanager
+def _plugin_import_path(path_entry, local_names):
+    # Plugins import their helpers by plain name ('from plugin_base import PluginBase'), so
+    # path_entry is put on sys.path while the module runs. The plugin's own top-level modules
+    # are kept out of sys.modules afterwards, so two plugins shipping a 'plugin_base' or
+    # 'plugin' module don't see each other's.
+    saved = {name: sys.modules.pop(name) for name in local_names if name in sys.modules}
+    sys.path.insert(0, path_entry)
+    try:
+        yield
+    finally:
+        sys.path.remove(path_entry)
+        for name in local_names:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved)
+
+def _exec_unique(module, unique_name, run):
+    sys.modules[unique_name] = module
+    try:
+        run()
+    except BaseException:
+        del sys.modules[unique_name]
+        raise
+    return module
+
+def import_plugin_module(plugin_dir, module_name, unique_name):
+    """
+    Import module_name from plugin_dir under unique_name, with plugin_dir on sys.path while it
+    runs and the plugin's own top-level modules isolated from other plugins'.
+    """
+    path = module_path(plugin_dir, module_name)
+    if not os.path.exists(path):
+        raise PluginLoadError(f"Entry module '{module_name}' not found in '{plugin_dir}'")
+    with _plugin_import_path(plugin_dir, _local_module_names(plugin_dir)):
+        spec = importlib.util.spec_from_file_location(unique_name, path)
+        module = importlib.util.module_from_spec(spec)
+        return _exec_unique(module, unique_name, lambda: spec.loader.exec_module(module))
+
+def import_archive_module(archive, module_name, unique_name):
+    """
+    Import module_name straight from a PluginArchive with zipimport, under unique_name.
+    Nothing is extracted; the plugin's helpers are imported from the archive the same way.
+    """
+    path_entry = archive.import_path
+    # zipimporter only looks up the last part of a name, so 'pkg.main' is found as 'main'
+    # through an importer on the archive's pkg/ folder, like module_path() does for directories.
+    *package, leaf = module_name.split('.')
+    try:
+        importer = zipimport.zipimporter(os.path.join(path_entry, *package, ''))
+        # The archive may have been rebuilt since zipimport last cached its directory.
+        importer.invalidate_caches()
+        code = importer.get_code(leaf)
+        filename = importer.get_filename(leaf)
+        is_package = importer.is_package(leaf)
+    except zipimport.ZipImportError:
+        raise PluginLoadError(f"Entry module '{module_name}' not found in '{archive.archive_path}'")
+    module = types.ModuleType(unique_name)
+    module.__file__ = filename
+    module.__loader__ = importer
+    module.__spec__ = importlib.util.spec_from_loader(unique_name, importer, origin=filename, is_package=is_package)
+    if is_package:
+        module.__path__ = [os.path.join(path_entry, *module_name.split('.'))]
+    try:
+        with _plugin_import_path(path_entry, archive.local_module_names()):
+            return _exec_unique(module, unique_name, lambda: exec(code, module.__dict__))
+    finally:
+        sys.path_importer_cache.pop(path_entry, None)
+
+class PluginSpec:
+    """
+    A discovered plugin that has not been imported yet.
+    Discovery only reads manifest.json (and, without an entry point, parses the entry module's
+    source), so listing plugins is cheap. The module is imported by load_class() and the
+    plugin constructed by activate(), once the host actually needs it.
+    """
+
+    def __init__(self, plugin_dir, manifest, module_name, class_name):
+        self.plugin_dir = plugin_dir
+        self.manifest = manifest
+        self.module_name = module_name
+        self.class_name = class_name
+        self.module = None
+        self._plugin_class = None
+
+    def __repr__(self):
+        return f"PluginSpec({self.name!r}, {self.entry_point!r})"
+
+    @property
+    def name(self):
+        return self.manifest.get('name', os.path.basename(os.path.normpath(self.plugin_dir)))
+
+    @property
+    def entry_point(self):
+        return f"{self.module_name}:{self.class_name}" if self.class_name else self.module_name
+
+    @property
+    def loaded(self):
+        return self.module is not None
+
+    def _unique_module_name(self):
+        safe = re.sub(r'\W', '_', self.name)
+        digest = hashlib.sha1(os.path.realpath(self.plugin_dir).encode('utf-8')).hexdigest()[:8]
+        return f"_algo_plugin_{safe}_{digest}_{self.module_name.replace('.', '_')}"
+
+    def load_module(self):
+        if self.module is None:
+            self.module = import_plugin_module(self.plugin_dir, self.module_name, self._unique_module_name())
+        return self.module
+
+    def load_class(self):
+        """Import the entry module (once) and return the plugin class."""
+        if self._plugin_class is None:
+            module = self.load_module()
+            if self.class_name is None:
+                raise PluginLoadError(f"Plugin '{self.name}' has no plugin class")
+            try:
+                self._plugin_class = getattr(module, self.class_name)
+            except AttributeError:
+                raise PluginLoadError(f"Plugin '{self.name}' has no class '{self.class_name}' in module '{self.module_name}'")
+        return self._plugin_class
+
+    @property
+    def assets(self):
+        """Lazy access to the plugin's assets/ files: names(), open(), read() and view()."""
+        return DirectoryAssets(self.plugin_dir)
+
+    def activate(self, screen=None, **kwargs):
+        """Import the plugin if needed and return a new instance of it."""
+        if self.class_name is None:
+            # Old-style plugin that builds its instance at import time as 'plugin'.
+            module = self.load_module()
+            if not hasattr(module, 'plugin'):
+                raise PluginLoadError(f"Plugin '{self.name}' has neither a plugin class nor a 'plugin' object")
+            return module.plugin
+        return instantiate_plugin(self.load_class(), screen=screen, **kwargs)
+
+class ArchivePluginSpec(PluginSpec):
+    """
+    A plugin discovered in a .zip archive. Its modules are imported from the archive with
+    zipimport and its assets read from it lazily, so the archive is never extracted.
+    Discovery closes the archive again; it is reopened when the plugin is loaded or its assets
+    are first used, and stays open until close().
+    """
+
+    def __init__(self, archive_path, manifest, module_name, class_name):
+        super().__init__(archive_path, manifest, module_name, class_name)
+        self._archive = None
+
+    @property
+    def archive(self):
+        """The PluginArchive, opened on first use."""
+        if self._archive is None:
+            try:
+                self._archive = PluginArchive(self.plugin_dir)
+            except (OSError, ValueError, zipfile.BadZipFile) as error:
+                raise PluginLoadError(f"Unable to read '{self.plugin_dir}': {error}")
+        return self._archive
+
+    @property
+    def name(self):
+        return self.manifest.get('name', os.path.splitext(os.path.basename(self.plugin_dir))[0])
+
+    def load_module(self):
+        if self.module is None:
+            self.module = import_archive_module(self.archive, self.module_name, self._unique_module_name())
+        return self.module
+
+    @property
+    def assets(self):
+        return self.archive.assets
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+def discover_archive(archive_path):
+    """
+    Return an ArchivePluginSpec for a plugin archive, reading only its manifest (and entry module
+    source). The archive is closed before returning, so discovering many plugins keeps no files open.
+    """
+    try:
+        archive = PluginArchive(archive_path)
+    except (OSError, ValueError, zipfile.BadZipFile) as error:
+        raise PluginLoadError(f"Unable to read '{archive_path}': {error}")
+    with archive:
+        try:
+            manifest = archive.manifest()
+        except (ValueError, KeyError) as error:
+            raise PluginLoadError(f"Unable to read '{archive_path}': {error}")
+        if manifest.get('entry_point'):
+            module_name, class_name = parse_entry_point(manifest['entry_point'])
+        else:
+            module_name = DEFAULT_ENTRY_MODULE
+            try:
+                member, source = archive.module_source(module_name)
+                class_name = find_plugin_class_in_source(source, os.path.join(archive_path, member))
+            except (KeyError, SyntaxError) as error:
+                raise PluginLoadError(f"Unable to read module '{module_name}' in '{archive_path}': {error}")
+    return ArchivePluginSpec(archive_path, manifest, module_name, class_name)
+
+def discover_plugin(plugin_dir):
+    """
+    Return a PluginSpec for plugin_dir (a plugin directory or .zip archive) without importing
+    anything. The class comes from the manifest's 'entry_point' ('module:ClassName'); without
+    one, the first PluginBase subclass in plugin.py is used.
+    """
+    if os.path.isfile(plugin_dir):
+        return discover_archive(plugin_dir)
+    manifest_path = os.path.join(plugin_dir, 'manifest.json')
+    try:
+        with open(manifest_path, 'r') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError) as error:
+        raise PluginLoadError(f"Unable to read '{manifest_path}': {error}")
+
+    if manifest.get('entry_point'):
+        module_name, class_name = parse_entry_point(manifest['entry_point'])
+    else:
+        module_name = DEFAULT_ENTRY_MODULE
+        source_path = module_path(plugin_dir, module_name)
+        try:
+            class_name = find_plugin_class(source_path)
+        except (OSError, SyntaxError) as error:
+            raise PluginLoadError(f"Unable to read '{source_path}': {error}")
+    return PluginSpec(plugin_dir, manifest, module_name, class_name)
+
+def discover_plugins(plugins_root):
+    """
+    Return a PluginSpec for every plugin directory and .zip archive directly under
+    plugins_root, sorted by path. Entries that can't be read as plugins are skipped.
+    """
+    specs = []
+    with os.scandir(plugins_root) as entries:
+        plugin_dirs = sorted(entry.path for entry in entries
+                             if (entry.is_dir() and os.path.exists(os.path.join(entry.path, 'manifest.json')))
+                             or (entry.is_file() and entry.name.endswith('.zip')))
+    for plugin_dir in plugin_dirs:
+        try:
+            specs.append(discover_plugin(plugin_dir))
+        except PluginLoadError as error:
+            print(f"Warning: {error}")
+    return specs
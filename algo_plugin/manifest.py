@@ -0,0 +1,212 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Key used for errors about the manifest as a whole (unreadable, not an object, ...).
+DOCUMENT = '$'
+# Part of the schema fingerprint; bump it when the validation code changes what it reports.
+VALIDATOR_VERSION = 1
+
+SEMVER_RE = re.compile(
+    r'^(0|[1-9]\d*)\.(0|[1-9]\d*)\.(0|[1-9]\d*)'
+    r'(?:-((?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?'
+    r'(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$'
+)
+_VERSION_CLAUSE = r'(?:~=|===|==|!=|<=|>=|<|>)?\s*\d+(?:\.\d+)*(?:\.\*)?'
+PYTHON_SPECIFIER_RE = re.compile(r'^\s*' + _VERSION_CLAUSE + r'(?:\s*,\s*' + _VERSION_CLAUSE + r')*\s*$')
+ENTRY_POINT_RE = re.compile(r'^[A-Za-z_]\w*(?:\.[A-Za-z_]\w*)*:[A-Za-z_]\w*$')
+REQUIREMENT_RE = re.compile(
+    r'^\s*[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?'
+    r'(?:\s*\[\s*[A-Za-z0-9._-]+(?:\s*,\s*[A-Za-z0-9._-]+)*\s*\])?'
+    r'(?:\s*' + _VERSION_CLAUSE + r'(?:\s*,\s*' + _VERSION_CLAUSE + r')*)?\s*$'
+)
+
+FORMATS = {
+    'semver': (SEMVER_RE, "must be a semantic version such as 1.2.3"),
+    'python_specifier': (PYTHON_SPECIFIER_RE, "must be a Python version or specifier such as 3.8 or >=3.8,<4"),
+    'requirement': (REQUIREMENT_RE, "must be a requirement such as numpy or numpy>=1.20"),
+    'entry_point': (ENTRY_POINT_RE, "must be an entry point such as plugin:MyPlugin"),
+}
+
+# Declarative description of manifest.json. Fields not listed here are allowed and ignored.
+MANIFEST_SCHEMA = {
+    'name': {'type': str, 'required': True, 'non_empty': True},
+    'version': {'type': str, 'required': True, 'format': 'semver'},
+    'game_version': {'type': str, 'required': True, 'non_empty': True},
+    'python_version': {'type': str, 'required': True, 'format': 'python_specifier'},
+    'description': {'type': str},
+    'dependencies': {'type': list, 'items': {'type': str, 'format': 'requirement'}},
+    'author': {'type': str},
+    'contact': {'type': str},
+    'entry_point': {'type': str, 'format': 'entry_point'},
+    'startup_budget': {'type': dict, 'keys': ['import_ms', 'construct_ms', 'peak_memory_mb'], 'values': {'type': float}},
+}
+
+_TYPE_NAMES = {str: 'a string', list: 'a list', dict: 'an object', int: 'an integer', float: 'a number', bool: 'a boolean'}
+
+def _compile_rule(rule):
+    # Turn one field rule into a function returning the list of problems with a value.
+    expected_type = rule.get('type')
+    if expected_type is float:
+        expected_type = (int, float)
+    type_name = _TYPE_NAMES.get(rule.get('type'), str(rule.get('type')))
+    pattern, format_message = FORMATS[rule['format']] if 'format' in rule else (None, None)
+    non_empty = rule.get('non_empty', False)
+    check_item = _compile_rule(rule['items']) if 'items' in rule else None
+    allowed_keys = rule.get('keys')
+    check_value = _compile_rule(rule['values']) if 'values' in rule else None
+
+    def check(value):
+        # bool is a subclass of int, so reject it explicitly unless a boolean is wanted.
+        wrong_type = expected_type is not None and (
+            not isinstance(value, expected_type) or (isinstance(value, bool) and rule.get('type') is not bool))
+        if wrong_type:
+            return [f"must be {type_name}"]
+        if non_empty and not value:
+            return ["must not be empty"]
+        if pattern is not None and not pattern.match(value):
+            return [f"{format_message}, got {value!r}"]
+        if check_item is not None:
+            return [f"item {index}: {error}" for index, item in enumerate(value) for error in check_item(item)]
+        problems = []
+        if allowed_keys is not None:
+            problems += [f"unknown key {key!r}" for key in value if key not in allowed_keys]
+        if check_value is not None:
+            problems += [f"key {key!r}: {error}" for key, item in value.items() for error in check_value(item)]
+        return problems
+
+    return check
+
+def compile_schema(schema):
+    """
+    Compile a schema into a validator function, once.
+    :return: Function taking a parsed manifest and returning {field: [errors]}; empty when valid.
+    """
+    fields = [(field, rule.get('required', False), _compile_rule(rule)) for field, rule in schema.items()]
+
+    def validate(manifest):
+        if not isinstance(manifest, dict):
+            return {DOCUMENT: ["manifest must be a JSON object"]}
+        errors = {}
+        for field, required, check in fields:
+            if field not in manifest:
+                if required:
+                    errors[field] = ["missing required field"]
+                continue
+            problems = check(manifest[field])
+            if problems:
+                errors[field] = problems
+        return errors
+
+    return validate
+
+validate_manifest_data = compile_schema(MANIFEST_SCHEMA)
+
+def schema_fingerprint(schema):
+    """Hash of a schema, the formats it can use and VALIDATOR_VERSION; it changes whenever validation results may."""
+    formats = {name: [pattern.pattern, message] for name, (pattern, message) in FORMATS.items()}
+    text = json.dumps([VALIDATOR_VERSION, schema, formats], sort_keys=True,
+                      default=lambda value: value.__name__ if isinstance(value, type) else repr(value))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def format_errors(errors):
+    """Flatten {field: [errors]} into 'field: error' lines."""
+    return [f"{field}: {error}" if field != DOCUMENT else error
+            for field, messages in errors.items() for error in messages]
+
+class ManifestCache:
+    """
+    Validation results keyed by manifest path, mtime and size, optionally persisted to a JSON file.
+    A manifest whose mtime and size are unchanged is not opened again. The file records the
+    fingerprint of the schema that produced the results, and is discarded when it doesn't match.
+    :param schema: Schema the results are validated against, default MANIFEST_SCHEMA.
+    """
+
+    def __init__(self, path=None, schema=None):
+        self.path = path
+        self.schema = schema_fingerprint(MANIFEST_SCHEMA if schema is None else schema)
+        self.entries = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        if path:
+            try:
+                with open(path, 'r') as file:
+                    stored = json.load(file)
+            except (OSError, ValueError):
+                stored = None
+            if isinstance(stored, dict) and stored.get('schema') == self.schema:
+                self.entries = stored.get('entries', {})
+
+    @staticmethod
+    def _key(manifest_path):
+        return os.path.realpath(manifest_path)
+
+    def get(self, manifest_path, stat):
+        entry = self.entries.get(self._key(manifest_path))
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+        return None
+
+    def put(self, manifest_path, stat, errors):
+        with self._lock:
+            self.entries[self._key(manifest_path)] = [stat.st_mtime_ns, stat.st_size, errors]
+            self.dirty = True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as file:
+            json.dump({'schema': self.schema, 'entries': self.entries}, file)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+def cache_for(cache_dir):
+    """Return the ManifestCache stored in a build cache directory, or an in-memory one."""
+    return ManifestCache(os.path.join(cache_dir, 'manifests.json') if cache_dir else None)
+
+def validate_manifest_file(manifest_path, cache=None):
+    """Validate one manifest file; returns {field: [errors]}, empty when valid."""
+    try:
+        stat = os.stat(manifest_path)
+    except OSError as error:
+        return {DOCUMENT: [f"unable to read manifest file '{manifest_path}': {error.strerror}"]}
+    if cache is not None:
+        errors = cache.get(manifest_path, stat)
+        if errors is not None:
+            return errors
+    try:
+        with open(manifest_path, 'rb') as file:
+            manifest = json.loads(file.read().decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        errors = {DOCUMENT: [f"unable to parse manifest file '{manifest_path}'"]}
+    except OSError as error:
+        return {DOCUMENT: [f"unable to read manifest file '{manifest_path}': {error.strerror}"]}
+    else:
+        errors = validate_manifest_data(manifest)
+    if cache is not None:
+        cache.put(manifest_path, stat, errors)
+    return errors
+
+def validate_manifests(manifest_paths, cache=None, workers=None):
+    """
+    Validate many manifest files in one call.
+    :param cache: Optional ManifestCache; unchanged manifests are answered from it and it is saved afterwards.
+    :param workers: Number of threads used to read and validate the files.
+    :return: Dict mapping each path to its {field: [errors]}.
+    """
+    manifest_paths = list(manifest_paths)
+    if len(manifest_paths) <= 1 or workers == 1:
+        results = [validate_manifest_file(path, cache) for path in manifest_paths]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(lambda path: validate_manifest_file(path, cache), manifest_paths))
+    if cache is not None:
+        cache.save()
+    return dict(zip(manifest_paths, results))
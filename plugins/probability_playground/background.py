@@ -0,0 +1,82 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class JobCancelled(Exception):
+    pass
+
+def raise_if_cancelled(cancelled):
+    if cancelled.is_set():
+        raise JobCancelled()
+
+class BackgroundJobs:
+    """
+    Runs one job at a time on a worker thread. Submitting a job supersedes the previous one:
+    its cancel event is set, so a queued job never starts and a running one stops at its next
+    raise_if_cancelled() check, and only the newest job's result is ever handed back by poll().
+    Jobs are called as job(cancelled, *args).
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='playground-worker')
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._cancelled = None
+        self._future = None
+        self._finished = None
+
+    def submit(self, job, *args):
+        with self._lock:
+            if self._cancelled is not None:
+                self._cancelled.set()
+            self._generation += 1
+            self._cancelled = threading.Event()
+            self._finished = None
+            self._future = self._executor.submit(self._run, self._generation, self._cancelled, job, args)
+
+    def _run(self, generation, cancelled, job, args):
+        if cancelled.is_set():
+            return
+        result, error = None, None
+        try:
+            result = job(cancelled, *args)
+        except JobCancelled:
+            return
+        except Exception as exc:
+            error = exc
+        with self._lock:
+            if generation == self._generation:
+                self._finished = (result, error)
+
+    def cancel(self):
+        """Cancel the newest job, so nothing is handed back until the next submit()."""
+        with self._lock:
+            if self._cancelled is not None:
+                self._cancelled.set()
+            self._generation += 1
+            self._finished = None
+            self._future = None
+
+    @property
+    def busy(self):
+        """True while the newest submitted job has not finished."""
+        future = self._future
+        return future is not None and not future.done()
+
+    def poll(self):
+        """Return (result, error) of the newest job once, when it has finished; otherwise None."""
+        with self._lock:
+            finished, self._finished = self._finished, None
+        return finished
+
+    def wait(self, timeout=None):
+        """Block until the newest job has finished, then return poll()."""
+        future = self._future
+        if future is not None:
+            future.result(timeout)
+        return self.poll()
+
+    def shutdown(self):
+        with self._lock:
+            if self._cancelled is not None:
+                self._cancelled.set()
+        self._executor.shutdown(wait=False)
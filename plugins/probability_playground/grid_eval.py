@@ -0,0 +1,201 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 65536
+
+def positive_proba(model, points):
+    """P(class 1) for each point, or the 0/1 prediction for models without predict_proba."""
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(points)[:, 1]
+    return model.predict(points).astype(float)
+
+def grid_axes(bounds, resolution):
+    x_min, x_max, y_min, y_max = bounds
+    return np.linspace(x_min, x_max, resolution), np.linspace(y_min, y_max, resolution)
+
+def uniform_proba_grid(model, bounds, resolution):
+    """P(class 1) on the full resolution x resolution mesh; rows follow y, columns follow x."""
+    return chunked_proba_grid(model, bounds, resolution)
+
+def iter_grid_chunks(bounds, resolution, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield (start, points) for consecutive runs of at most chunk_size mesh points in row-major
+    order, computing each run's coordinates from its flat indices so the full meshgrid is never
+    built.
+    """
+    x_range, y_range = grid_axes(bounds, resolution)
+    total = resolution * resolution
+    for start in range(0, total, chunk_size):
+        rows, cols = np.divmod(np.arange(start, min(start + chunk_size, total)), resolution)
+        yield start, np.c_[x_range[cols], y_range[rows]]
+
+def chunked_proba_grid(model, bounds, resolution, chunk_size=DEFAULT_CHUNK_SIZE, workers=None):
+    """
+    uniform_proba_grid evaluated chunk by chunk on a thread pool, each chunk written straight
+    into a preallocated output array. Peak memory is one chunk per worker rather than the whole
+    mesh, and models whose predict releases the GIL (most of scikit-learn's) use several cores.
+    """
+    output = np.empty(resolution * resolution)
+    workers = workers or min(os.cpu_count() or 1, 8)
+
+    def evaluate(chunk):
+        start, points = chunk
+        output[start:start + len(points)] = positive_proba(model, points)
+
+    chunks = iter_grid_chunks(bounds, resolution, chunk_size)
+    if workers == 1 or resolution * resolution <= chunk_size:
+        for chunk in chunks:
+            evaluate(chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # map() would pull every chunk from the generator up front; keep a bounded window.
+            pending = set()
+            for chunk in chunks:
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()
+                pending.add(executor.submit(evaluate, chunk))
+            for future in pending:
+                future.result()
+    return output.reshape(resolution, resolution)
+
+def _split(low, high):
+    # Halve each span that is wider than one mesh step; narrower spans are kept whole.
+    wide = high - low > 1
+    middle = (low + high) // 2
+    return np.concatenate([low, middle[wide]]), np.concatenate([np.where(wide, middle, high), high[wide]]), \
+        np.concatenate([np.arange(len(low)), np.flatnonzero(wide)])
+
+def adaptive_proba_grid(model, bounds, resolution, coarse_cells=8, margin=0.1):
+    """
+    P(class 1) on the same mesh as uniform_proba_grid, evaluating the model only where the
+    boundary is. The mesh is cut into coarse_cells x coarse_cells cells and the model is
+    evaluated at their corners. A cell whose corners all fall on the same side of 0.5, and
+    none within margin of it, is filled by bilinear interpolation. Every other cell is split
+    in four and its new corners evaluated, level by level with one model call per level, until
+    cells are a single mesh step wide. Features smaller than a coarse cell that touch none of
+    its corners can be missed; lower margin or raise coarse_cells to be more conservative.
+    :return: (proba grid, number of points the model was evaluated on)
+    """
+    x_range, y_range = grid_axes(bounds, resolution)
+    proba = np.full((resolution, resolution), np.nan)
+    evaluated = np.zeros((resolution, resolution), dtype=bool)
+    last = max(resolution - 1, 1)
+    step = max(1, -(-last // coarse_cells))
+    edges = np.array(list(range(0, last, step)) + [last])
+    r0, c0 = [axis.ravel() for axis in np.meshgrid(edges[:-1], edges[:-1], indexing='ij')]
+    r1, c1 = [axis.ravel() for axis in np.meshgrid(edges[1:], edges[1:], indexing='ij')]
+
+    model_points = 0
+    settled_cells = []
+    while len(r0):
+        rows = np.concatenate([r0, r0, r1, r1])
+        cols = np.concatenate([c0, c1, c0, c1])
+        pending = ~evaluated[rows, cols]
+        corner_rows, corner_cols = np.divmod(np.unique(rows[pending] * resolution + cols[pending]), resolution)
+        if len(corner_rows):
+            points = np.c_[x_range[corner_cols], y_range[corner_rows]]
+            proba[corner_rows, corner_cols] = positive_proba(model, points)
+            evaluated[corner_rows, corner_cols] = True
+            model_points += len(corner_rows)
+
+        values = np.stack([proba[r0, c0], proba[r0, c1], proba[r1, c0], proba[r1, c1]])
+        positive = values > 0.5
+        settled = (positive.all(axis=0) | ~positive.any(axis=0)) & (np.abs(values - 0.5).min(axis=0) > margin)
+        settled |= (r1 - r0 <= 1) & (c1 - c0 <= 1)
+        settled_cells.append((r0[settled], r1[settled], c0[settled], c1[settled]))
+
+        r0, r1, c0, c1 = r0[~settled], r1[~settled], c0[~settled], c1[~settled]
+        r0, r1, parents = _split(r0, r1)
+        c0, c1 = c0[parents], c1[parents]
+        c0, c1, parents = _split(c0, c1)
+        r0, r1 = r0[parents], r1[parents]
+
+    filled = proba.copy()
+    for cells in settled_cells:
+        _fill_bilinear(filled, proba, *cells)
+    filled[evaluated] = proba[evaluated]
+    return filled, model_points
+
+def _fill_bilinear(filled, proba, r0, r1, c0, c1):
+    # Cells of the same shape are interpolated together with fancy indexing.
+    heights, widths = r1 - r0, c1 - c0
+    shapes = heights * (widths.max(initial=0) + 1) + widths
+    for shape in np.unique(shapes):
+        group = shapes == shape
+        height, width = heights[group][0], widths[group][0]
+        top, bottom, left, right = r0[group], r1[group], c0[group], c1[group]
+        v = np.linspace(0.0, 1.0, height + 1)[None, :, None]
+        u = np.linspace(0.0, 1.0, width + 1)[None, None, :]
+        upper = proba[top, left][:, None, None] * (1 - u) + proba[top, right][:, None, None] * u
+        lower = proba[bottom, left][:, None, None] * (1 - u) + proba[bottom, right][:, None, None] * u
+        rows = top[:, None, None] + np.arange(height + 1)[None, :, None]
+        cols = left[:, None, None] + np.arange(width + 1)[None, None, :]
+        filled[rows, cols] = upper * (1 - v) + lower * v
+
+def _tile_starts(resolution, tile):
+    starts = np.arange(0, resolution, tile)
+    return starts, np.minimum(starts + tile, resolution)
+
+def dirty_tiles(model, bounds, classes, tile=16, margin=0.1):
+    """
+    After model has been updated, find the tile x tile blocks of the class map whose classes
+    can have changed: blocks the old boundary ran through, and blocks whose corners the
+    updated model puts on a different class, on both sides of 0.5 or within margin of it.
+    Blocks entirely on one side of the boundary before and after are assumed unchanged.
+    :param classes: The 0/1 class map (rows follow y) the model produced before the update.
+    :return: Boolean array with one entry per tile.
+    """
+    resolution = classes.shape[0]
+    starts, ends = _tile_starts(resolution, tile)
+    positives = np.add.reduceat(np.add.reduceat(classes.astype(np.int64), starts, axis=0), starts, axis=1)
+    sizes = np.outer(ends - starts, ends - starts)
+    dirty = (positives > 0) & (positives < sizes)
+
+    x_range, y_range = grid_axes(bounds, resolution)
+    corner_index = np.unique(np.concatenate([starts, ends - 1]))
+    rows, cols = [axis.ravel() for axis in np.meshgrid(corner_index, corner_index, indexing='ij')]
+    corner_proba = np.full((resolution, resolution), np.nan)
+    corner_proba[rows, cols] = positive_proba(model, np.c_[x_range[cols], y_range[rows]])
+
+    tile_rows, tile_cols = np.meshgrid(np.arange(len(starts)), np.arange(len(starts)), indexing='ij')
+    for row_index, col_index in ((starts, starts), (starts, ends - 1), (ends - 1, starts), (ends - 1, ends - 1)):
+        r, c = row_index[tile_rows], col_index[tile_cols]
+        values = corner_proba[r, c]
+        dirty |= (values > 0.5) != classes[r, c].astype(bool)
+        dirty |= np.abs(values - 0.5) <= margin
+    return dirty
+
+def update_tiles(model, bounds, classes, dirty, tile=16):
+    """Re-evaluate model on every point of the dirty tiles, in one call, and write the classes in place."""
+    resolution = classes.shape[0]
+    starts, ends = _tile_starts(resolution, tile)
+    pixel_tiles = np.repeat(np.arange(len(starts)), ends - starts)
+    mask = dirty[pixel_tiles][:, pixel_tiles]
+    rows, cols = np.nonzero(mask)
+    if len(rows):
+        x_range, y_range = grid_axes(bounds, resolution)
+        classes[rows, cols] = positive_proba(model, np.c_[x_range[cols], y_range[rows]]) > 0.5
+    return len(rows)
+
+def resmooth_tiles(grid, colors, dirty, tile=16, sigma=1.0):
+    """
+    Redo gaussian_filter(colors, sigma) in place on grid, only around the dirty tiles. Each
+    tile is filtered with a margin of twice the filter radius, and the tile plus one radius is
+    written back, which matches filtering the whole array.
+    """
+    from scipy.ndimage import gaussian_filter
+
+    resolution = grid.shape[0]
+    radius = int(4.0 * sigma + 0.5)
+    starts, ends = _tile_starts(resolution, tile)
+    for row_index, col_index in zip(*np.nonzero(dirty)):
+        r0, r1, c0, c1 = starts[row_index], ends[row_index], starts[col_index], ends[col_index]
+        outer = (max(r0 - 2 * radius, 0), min(r1 + 2 * radius, resolution),
+                 max(c0 - 2 * radius, 0), min(c1 + 2 * radius, resolution))
+        inner = (max(r0 - radius, 0), min(r1 + radius, resolution), max(c0 - radius, 0), min(c1 + radius, resolution))
+        block = gaussian_filter(colors[outer[0]:outer[1], outer[2]:outer[3]], sigma=sigma)
+        grid[inner[0]:inner[1], inner[2]:inner[3]] = block[inner[0] - outer[0]:inner[1] - outer[0],
+                                                           inner[2] - outer[2]:inner[3] - outer[2]]
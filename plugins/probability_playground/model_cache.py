@@ -0,0 +1,56 @@
+import pickle
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+def model_nbytes(model):
+    """Approximate memory held by a fitted model: the size of its pickle."""
+    try:
+        return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return 0
+
+class ModelGridCache:
+    """
+    Fitted models and their smoothed decision grids, keyed by
+    (classifier name, data version, grid resolution, bounds) and evicted least recently used
+    first once the grids and models together exceed max_bytes. The newest entry is always
+    kept, even when it alone is larger than max_bytes.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """Return (model, grid) for key and mark it recently used, or None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, key, model, grid, model_size=None):
+        if key in self._entries:
+            self.nbytes -= self._entries.pop(key)[2]
+        size = grid.nbytes + (model_nbytes(model) if model_size is None else model_size)
+        self._entries[key] = (model, grid, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.nbytes -= evicted_size
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
@@ -1,3 +1,4 @@
+import copy
 import numpy as np
 from scipy.ndimage import gaussian_filter
 from sklearn.datasets import make_blobs
@@ -5,11 +6,21 @@ from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.svm import SVC
+from sklearn.naive_bayes import GaussianNB
+from sklearn.base import clone
 import pygame
 from plugin_base import PluginBase
+from background import BackgroundJobs, raise_if_cancelled
+from model_cache import ModelGridCache, model_nbytes
+from render import LayeredRenderer
+from point_store import PointStore, StreamingStats
+from grid_eval import uniform_proba_grid, adaptive_proba_grid, dirty_tiles, update_tiles, resmooth_tiles
 
 class GameVisualizerPlugin(PluginBase):
-    def __init__(self):
+    # Learns each clicked point as it arrives (partial_fit) instead of waiting for R
+    ONLINE_CLASSIFIER = 'Online Naive Bayes'
+
+    def __init__(self, screen=None):
         super().__init__('game_visualizer')
         
         # Generate a synthetic binary classification dataset
@@ -22,7 +33,8 @@ class GameVisualizerPlugin(PluginBase):
         self.classifiers = {
             'Logistic Regression': LogisticRegression(),
             'Random Forest': RandomForestClassifier(),
-            'SVM': SVC(probability=True)
+            'SVM': SVC(probability=True),
+            self.ONLINE_CLASSIFIER: GaussianNB()
         }
 
         # Default classifier
@@ -32,8 +44,10 @@ class GameVisualizerPlugin(PluginBase):
 
         # Pygame setup
         self.window_size = 600
-        self.screen = pygame.display.set_mode((self.window_size, self.window_size))
-        pygame.display.set_caption("Probability Concepts Visualization")
+        if screen is None:
+            screen = pygame.display.set_mode((self.window_size, self.window_size))
+            pygame.display.set_caption("Probability Concepts Visualization")
+        self.screen = screen
 
         # Colors
         self.BLUE = np.array([0, 0, 255])
@@ -48,6 +62,12 @@ class GameVisualizerPlugin(PluginBase):
 
         # Grid resolution
         self.grid_resolution = 100
+        # 'uniform' evaluates every grid point, in chunks across threads, at a resolution set
+        # with +/- (up to the window size); 'adaptive' (A key) refines only near the boundary,
+        # which makes a grid as fine as the window affordable
+        self.grid_mode = 'uniform'
+        self.uniform_resolution = self.grid_resolution
+        self.adaptive_resolution = self.window_size
 
         # Define range for the grid
         self.x_min, self.x_max = self.X[:, 0].min() - 1, self.X[:, 0].max() + 1
@@ -58,32 +78,186 @@ class GameVisualizerPlugin(PluginBase):
         self.y_scale = self.window_size / (self.y_max - self.y_min)
 
         # Variables for adding points
-        self.new_points = []
+        self.new_points = PointStore()
         self.current_label = 0
         self.grid_cache = None
+        # Bumped whenever new_points changes; part of the model cache key
+        self.data_version = 0
+        self.point_stats = StreamingStats()
+        self.point_stats.extend(self.X)
+        self.statistics = None
+        self.statistics_version = None
 
         # Font
         self.font = pygame.font.SysFont(None, 30)
 
+        # Background and points are pre-composed; draw() blits one frame plus the text
+        self.renderer = LayeredRenderer((self.window_size, self.window_size), {0: self.RED, 1: self.BLUE})
+        self.renderer.add_points(self.to_screen(self.X), self.y)
+
+        # Refits and grid evaluations run on a worker thread; draw keeps showing the old grid
+        self.jobs = BackgroundJobs()
+        self.show_recomputing = True
+
+        # Fitted models and grids per (classifier, data version, resolution, bounds, grid mode)
+        self.model_cache = ModelGridCache()
+
         # Initial classification
-        self.classify_grid()
-
-    def classify_grid(self):
-        x_range = np.linspace(self.x_min, self.x_max, self.grid_resolution)
-        y_range = np.linspace(self.y_min, self.y_max, self.grid_resolution)
-        xx, yy = np.meshgrid(x_range, y_range)
-        grid_points = np.c_[xx.ravel(), yy.ravel()]
-        if hasattr(self.model, 'predict_proba'):
-            predictions_proba = self.model.predict_proba(grid_points)
-            predictions = (predictions_proba[:, 1] > 0.5).astype(int)
+        self.grid_cache = self.classify_grid()
+        self.model_key = self.cache_key(self.current_classifier_name)
+        self.model_cache.put(self.model_key, self.model, self.grid_cache)
+
+        # Online updates redraw only the grid tiles a new point can change; the class map
+        # of the model on screen is kept for them as (model key, classes)
+        self.tile_size = 16
+        self.class_map = None
+
+    def classify_grid(self, model=None, resolution=None, mode=None):
+        """Evaluate model (the current model by default) on the grid and return the smoothed colours."""
+        model = self.model if model is None else model
+        resolution = self.grid_resolution if resolution is None else resolution
+        mode = self.grid_mode if mode is None else mode
+        bounds = (self.x_min, self.x_max, self.y_min, self.y_max)
+        if mode == 'adaptive':
+            proba, _ = adaptive_proba_grid(model, bounds, resolution)
         else:
-            predictions = self.model.predict(grid_points)
+            proba = uniform_proba_grid(model, bounds, resolution)
+        return gaussian_filter(self.colorize((proba > 0.5).astype(int)), sigma=1.0)
 
-        colors = np.zeros((grid_points.shape[0], 3), dtype=int)
+    def colorize(self, predictions):
+        """Background colours for a 0/1 class map, before smoothing."""
+        colors = np.zeros(predictions.shape + (3,), dtype=int)
         colors[predictions == 1] = self.BLUE_back
         colors[predictions == 0] = self.RED_back
-        colors_reshaped = colors.reshape((self.grid_resolution, self.grid_resolution, 3))
-        self.grid_cache = gaussian_filter(colors_reshaped.astype(float), sigma=1.0)
+        return colors.astype(float)
+
+    def cache_key(self, classifier_name):
+        bounds = (float(self.x_min), float(self.x_max), float(self.y_min), float(self.y_max))
+        return (classifier_name, self.data_version, self.grid_resolution, bounds, self.grid_mode)
+
+    def training_data(self):
+        """The initial training split until points are added, then every point."""
+        if not self.new_points:
+            return self.X_train, self.y_train
+        X_combined = np.vstack((self.X, self.new_points.xy))
+        y_combined = np.hstack((self.y, self.new_points.labels))
+        return X_combined, y_combined
+
+    def training_data_since(self, version):
+        """
+        The rows training_data() has gained since data version `version`: the points added since
+        (one per version), and the held-out test split when `version` is 0.
+        """
+        X_new, y_new = self.new_points.xy[version:], self.new_points.labels[version:]
+        if version == 0:
+            X_new, y_new = np.vstack((self.X_test, X_new)), np.hstack((self.y_test, y_new))
+        return X_new, y_new
+
+    def select_classifier(self, classifier_name):
+        """
+        Show classifier_name fitted on the current data: straight from the model cache when it
+        has been fitted on this data before, otherwise fitted and evaluated on the worker thread.
+        """
+        self.current_classifier_name = classifier_name
+        key = self.cache_key(classifier_name)
+        cached = self.model_cache.get(key)
+        if cached is not None:
+            self.jobs.cancel()
+            self.model, self.grid_cache = cached
+            self.model_key = key
+            return
+        X, y = self.training_data()
+        self.request_recompute(classifier_name, X, y)
+
+    def request_recompute(self, classifier_name, X=None, y=None):
+        """
+        Queue a refit (when X and y are given) and grid evaluation of a classifier on the worker
+        thread, superseding any recompute still pending. The result is swapped in by update().
+        """
+        key = self.cache_key(classifier_name)
+        self.jobs.submit(self._recompute, key, self.classifiers[classifier_name], X, y,
+                         self.grid_resolution, self.grid_mode)
+
+    def set_grid_mode(self, mode):
+        """Switch between 'uniform' and 'adaptive' grid evaluation and recompute the grid."""
+        self.grid_mode = mode
+        self.grid_resolution = self.adaptive_resolution if mode == 'adaptive' else self.uniform_resolution
+        self.select_classifier(self.current_classifier_name)
+
+    def set_grid_resolution(self, resolution):
+        """Set the uniform grid resolution, at most one grid point per window pixel, and recompute."""
+        self.uniform_resolution = max(10, min(int(resolution), self.window_size))
+        if self.grid_mode == 'uniform':
+            self.grid_resolution = self.uniform_resolution
+            self.select_classifier(self.current_classifier_name)
+
+    def _recompute(self, cancelled, key, model, X, y, resolution, mode):
+        # Runs on the worker thread: fit a copy so the model in use is never touched mid-fit.
+        if X is not None:
+            model = clone(model)
+            model.fit(X, y)
+            raise_if_cancelled(cancelled)
+        grid = self.classify_grid(model, resolution, mode)
+        raise_if_cancelled(cancelled)
+        return key, model, grid, model_nbytes(model)
+
+    def apply_recompute(self):
+        """Swap in the newest finished recompute, if any."""
+        finished = self.jobs.poll()
+        if finished is None:
+            return False
+        result, error = finished
+        if error is not None:
+            print(f"Recompute failed: {error}")
+            return False
+        key, model, grid, model_size = result
+        self.model_cache.put(key, model, grid, model_size)
+        self.model = model
+        self.grid_cache = grid
+        self.model_key = key
+        return True
+
+    def learn_point(self):
+        """
+        Update the online classifier with the points just added (data_version already bumped):
+        every row training_data() has gained since the model on screen was trained, so that it
+        is trained on the same data as a refit would be. Then refresh only the grid tiles whose
+        class can have changed, re-smoothing around them.
+        Does nothing unless the online classifier is on screen with no recompute pending;
+        R then refits it on every point as usual.
+        """
+        # A recompute that finished since update() polled must be swapped in first, or its
+        # result would later replace the grid updated here.
+        self.apply_recompute()
+        if self.jobs.busy or self.model_key[0] != self.ONLINE_CLASSIFIER:
+            return False
+        # Tiles follow the grid on screen, which can be for older settings than the current
+        # ones (a failed recompute keeps the old grid), and so does the new cache key.
+        resolution = self.grid_cache.shape[0]
+        bounds = (self.x_min, self.x_max, self.y_min, self.y_max)
+        if self.class_map is None or self.class_map[0] != self.model_key:
+            self.class_map = (self.model_key, (uniform_proba_grid(self.model, bounds, resolution) > 0.5).astype(int))
+        classes = self.class_map[1].copy()
+
+        # Cached entries for earlier data versions keep their own model and grid.
+        model = copy.deepcopy(self.model)
+        model.partial_fit(*self.training_data_since(self.model_key[1]))
+        dirty = dirty_tiles(model, bounds, classes, self.tile_size)
+        update_tiles(model, bounds, classes, dirty, self.tile_size)
+        grid = self.grid_cache.copy()
+        resmooth_tiles(grid, self.colorize(classes), dirty, self.tile_size)
+
+        self.model, self.grid_cache = model, grid
+        self.model_key = (self.ONLINE_CLASSIFIER, self.data_version) + self.model_key[2:]
+        self.class_map = (self.model_key, classes)
+        self.model_cache.put(self.model_key, model, grid)
+        return True
+
+    def to_screen(self, points):
+        """Screen coordinates of an (n, 2) array of data points."""
+        offset = np.array([self.x_min, self.y_min])
+        scale = np.array([self.x_scale, self.y_scale])
+        return ((np.asarray(points, dtype=float) - offset) * scale).astype(int)
 
     def grid_to_surface(self):
         array = np.clip(self.grid_cache, 0, 255).astype(np.uint8)
@@ -92,20 +266,22 @@ class GameVisualizerPlugin(PluginBase):
         return scaled_surface
 
     def calculate_statistics(self):
-        combined_points = np.vstack((self.X, np.array([[p[0], p[1]] for p in self.new_points]))) if self.new_points else self.X
-        mean = np.mean(combined_points, axis=0)
-        median = np.median(combined_points, axis=0)
-        std_dev = np.std(combined_points, axis=0)
-        iqr = np.percentile(combined_points, 75, axis=0) - np.percentile(combined_points, 25, axis=0)
-        min_point = np.min(combined_points, axis=0)
-        max_point = np.max(combined_points, axis=0)
-        return mean, median, std_dev, iqr, min_point, max_point
+        """
+        Mean, median, std, IQR, min and max over all points. They are maintained as points are
+        added (the median and IQR from per-axis sorted buffers) and only read out again when the
+        data has changed since the last call.
+        """
+        if self.statistics_version != self.data_version:
+            self.statistics = self.point_stats.summary()
+            self.statistics_version = self.data_version
+        return self.statistics
 
     def draw_statistics(self, mean, median, std_dev, iqr, min_point, max_point):
         # Drawing statistics (same logic as before)
         ...
 
     def update(self, events, delta_time):
+        self.apply_recompute()
         data_changed = False
         for event in events:
             if event.type == pygame.QUIT:
@@ -116,56 +292,45 @@ class GameVisualizerPlugin(PluginBase):
                 elif event.key == pygame.K_2:
                     self.current_label = 1
                 elif event.key == pygame.K_r:
-                    X_combined = np.vstack((self.X, np.array([[p[0], p[1]] for p in self.new_points])))
-                    y_combined = np.hstack((self.y, np.array([p[2] for p in self.new_points]))) if self.new_points else self.y
-                    self.model.fit(X_combined, y_combined)
-                    self.classify_grid()
+                    self.select_classifier(self.current_classifier_name)
                     data_changed = False
+                elif event.key == pygame.K_a:
+                    self.set_grid_mode('uniform' if self.grid_mode == 'adaptive' else 'adaptive')
+                elif event.key in (pygame.K_EQUALS, pygame.K_PLUS):
+                    self.set_grid_resolution(self.uniform_resolution * 2)
+                elif event.key == pygame.K_MINUS:
+                    self.set_grid_resolution(self.uniform_resolution // 2)
                 elif event.key == pygame.K_l:
-                    self.current_classifier_name = 'Logistic Regression'
-                    self.model = self.classifiers[self.current_classifier_name]
-                    self.classify_grid()
+                    self.select_classifier('Logistic Regression')
                 elif event.key == pygame.K_f:
-                    self.current_classifier_name = 'Random Forest'
-                    self.model = self.classifiers[self.current_classifier_name]
-                    self.classify_grid()
+                    self.select_classifier('Random Forest')
                 elif event.key == pygame.K_s:
-                    self.current_classifier_name = 'SVM'
-                    self.model = self.classifiers[self.current_classifier_name]
-                    self.classify_grid()
+                    self.select_classifier('SVM')
+                elif event.key == pygame.K_o:
+                    self.select_classifier(self.ONLINE_CLASSIFIER)
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_x, mouse_y = event.pos
                 data_x = self.x_min + (mouse_x / self.window_size) * (self.x_max - self.x_min)
                 data_y = self.y_min + (mouse_y / self.window_size) * (self.y_max - self.y_min)
-                self.new_points.append((data_x, data_y, self.current_label))
+                self.new_points.append(data_x, data_y, self.current_label)
+                self.point_stats.add((data_x, data_y))
+                self.renderer.add_points(self.to_screen([[data_x, data_y]]), [self.current_label])
+                self.data_version += 1
+                self.learn_point()
                 data_changed = True
 
     def draw(self, surface):
-        surface.fill(self.WHITE)
-        grid_surface = self.grid_to_surface()
-        surface.blit(grid_surface, (0, 0))
-
-        for point, label in zip(self.X, self.y):
-            color = self.BLUE if label == 1 else self.RED
-            screen_x = int((point[0] - self.x_min) * self.x_scale)
-            screen_y = int((point[1] - self.y_min) * self.y_scale)
-            pygame.draw.circle(surface, self.BLACK, (screen_x, screen_y), 6)
-            pygame.draw.circle(surface, color, (screen_x, screen_y), 5)
-
-        for point in self.new_points:
-            data_x, data_y, label = point
-            color = self.BLUE if label == 1 else self.RED
-            screen_x = int((data_x - self.x_min) * self.x_scale)
-            screen_y = int((data_y - self.y_min) * self.y_scale)
-            pygame.draw.circle(surface, self.BLACK, (screen_x, screen_y), 6)
-            pygame.draw.circle(surface, color, (screen_x, screen_y), 5)
+        if self.renderer.background_source is not self.grid_cache:
+            self.renderer.set_background(self.grid_to_surface(), self.grid_cache)
+        self.renderer.draw(surface)
 
         mean, median, std_dev, iqr, min_point, max_point = self.calculate_statistics()
         self.draw_statistics(mean, median, std_dev, iqr, min_point, max_point)
 
         status_text = f"Current Classifier: {self.current_classifier_name} | Current Label: {'Blue (1)' if self.current_label == 1 else 'Red (0)'}"
-        label_surface = self.font.render(status_text, True, self.BLACK)
+        label_surface = self.renderer.text(self.font, status_text, self.BLACK)
         surface.blit(label_surface, (10, 10))
 
-# Required for dynamic plugin loading
-plugin = GameVisualizerPlugin()
+        if self.show_recomputing and self.jobs.busy:
+            busy_surface = self.renderer.text(self.font, "Recomputing\u2026", self.BLACK)
+            surface.blit(busy_surface, (10, self.window_size - 30))
@@ -0,0 +1,230 @@
+import os
+import time
+import cProfile
+import tracemalloc
+
+# ALGO_PLUGIN_PROFILE=1 profiles every plugin's update and draw calls. ALGO_PLUGIN_PROFILE=capture:N
+# also records a cProfile of the next N frames to <plugin_id>.prof in ALGO_PLUGIN_PROFILE_DIR.
+PROFILE_ENV = 'ALGO_PLUGIN_PROFILE'
+PROFILE_DIR_ENV = 'ALGO_PLUGIN_PROFILE_DIR'
+PROFILED_METHODS = ('update', 'draw')
+# Bucket i of a histogram counts the calls that took less than 2**i microseconds.
+HISTOGRAM_BUCKETS = 24
+
+def _profile_setting(value):
+    # (enabled, frames to capture) from ALGO_PLUGIN_PROFILE, read once at import.
+    if value in ('', '0'):
+        return False, 0
+    if not value.startswith('capture:'):
+        return True, 0
+    try:
+        return True, int(value.split(':', 1)[1])
+    except ValueError:
+        print(f"Warning: Ignoring the capture in {PROFILE_ENV}={value!r}; expected capture:FRAMES.")
+        return True, 0
+
+PROFILE_ENABLED, PROFILE_CAPTURE_FRAMES = _profile_setting(os.environ.get(PROFILE_ENV, ''))
+# Open profiles that trace memory, and whether one of them started tracemalloc. Every plugin
+# ships its own copy of this module, so the count is kept on tracemalloc, which they all share.
+_TRACING = tracemalloc.__dict__.setdefault('_plugin_base_tracing', {'profiles': 0, 'started': False})
+
+class CallProfile:
+    """Timing histogram and allocations of the calls of one method."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+        self.net_bytes = 0
+        self.max_peak_bytes = 0
+
+    def record(self, elapsed_ns, net_bytes=0, peak_bytes=0):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        self.histogram[min((elapsed_ns // 1000).bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+        self.net_bytes += net_bytes
+        self.max_peak_bytes = max(self.max_peak_bytes, peak_bytes)
+
+    def percentile(self, fraction):
+        """Upper bound in ms of the histogram bucket that holds the given fraction of the calls."""
+        count = 0
+        for bucket, calls in enumerate(self.histogram):
+            count += calls
+            if calls and count >= fraction * self.calls:
+                return (1 << bucket) / 1000.0
+        return 0.0
+
+    def summary(self):
+        return {
+            'calls': self.calls,
+            'mean_ms': self.total_ns / self.calls / 1e6 if self.calls else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.max_ns / 1e6,
+            'mean_net_bytes': self.net_bytes / self.calls if self.calls else 0.0,
+            'max_peak_bytes': self.max_peak_bytes,
+            'histogram_us': self.histogram,
+        }
+
+class PluginProfile:
+    """
+    Profiling state of one plugin instance. With trace_memory, each call records the bytes it
+    left allocated and its peak allocation (tracemalloc is started if needed). A capture runs
+    cProfile over the plugin's calls for a number of frames, then dumps it to a file, and the
+    difference between tracemalloc snapshots from before and after to <file>.memory.txt.
+    Tracing slows down every allocation in the process, so if a profile started it, it is
+    stopped again once the last profile that traces memory is closed.
+    """
+
+    def __init__(self, trace_memory=True):
+        self.methods = {name: CallProfile() for name in PROFILED_METHODS}
+        self.trace_memory = trace_memory
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _TRACING['started'] = True
+            _TRACING['profiles'] += 1
+        self.profiler = None
+        self.capture_path = None
+        self.capture_frames = 0
+        self.snapshot = None
+        self.captures = []
+        self.running = False
+
+    def start_capture(self, frames, path):
+        self.profiler = cProfile.Profile()
+        self.capture_path = path
+        self.capture_frames = frames
+        self.snapshot = tracemalloc.take_snapshot() if self.trace_memory else None
+
+    def _finish_capture(self):
+        self.profiler.dump_stats(self.capture_path)
+        if self.snapshot is not None:
+            statistics = tracemalloc.take_snapshot().compare_to(self.snapshot, 'lineno')
+            with open(self.capture_path + '.memory.txt', 'w') as file:
+                for statistic in statistics[:50]:
+                    print(statistic, file=file)
+        self.captures.append(self.capture_path)
+        self.profiler = self.capture_path = self.snapshot = None
+
+    def call(self, name, method, plugin, args, kwargs):
+        if self.running:
+            # An overriding method calling super(): only the outermost call is measured.
+            return method(plugin, *args, **kwargs)
+        self.running = True
+        profiler = self.profiler
+        try:
+            if self.trace_memory:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+            if profiler is not None:
+                profiler.enable()
+            start = time.perf_counter_ns()
+            try:
+                return method(plugin, *args, **kwargs)
+            finally:
+                elapsed = time.perf_counter_ns() - start
+                if profiler is not None:
+                    profiler.disable()
+                if self.trace_memory:
+                    current, peak = tracemalloc.get_traced_memory()
+                    self.methods[name].record(elapsed, current - before, peak - before)
+                else:
+                    self.methods[name].record(elapsed)
+                if profiler is not None and name == 'update':
+                    self.capture_frames -= 1
+                    if self.capture_frames <= 0:
+                        self._finish_capture()
+        finally:
+            self.running = False
+
+    def close(self):
+        if not self.trace_memory:
+            return
+        self.trace_memory = False
+        _TRACING['profiles'] -= 1
+        if _TRACING['profiles'] == 0 and _TRACING['started']:
+            tracemalloc.stop()
+            _TRACING['started'] = False
+
+    def stats(self):
+        stats = {name: profile.summary() for name, profile in self.methods.items()}
+        stats['captures'] = list(self.captures)
+        return stats
+
+def _profiled(name, method):
+    def wrapper(self, *args, **kwargs):
+        if self._profile is None:
+            return method(self, *args, **kwargs)
+        return self._profile.call(name, method, self, args, kwargs)
+    wrapper.__name__ = method.__name__
+    wrapper.__qualname__ = method.__qualname__
+    wrapper.__doc__ = method.__doc__
+    wrapper.__wrapped__ = method
+    return wrapper
+
+class PluginBase:
+    # PluginProfile while profiling is enabled; while it is None the cost is one attribute check per call.
+    _profile = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for name in PROFILED_METHODS:
+            if name in cls.__dict__:
+                setattr(cls, name, _profiled(name, cls.__dict__[name]))
+
+    def __init__(self, plugin_id):
+        """
+        Initialize the plugin. Set up any necessary variables, load resources, etc.
+        :param plugin_id: Unique identifier for the plugin.
+        """
+        self.plugin_id = plugin_id  # Unique ID for the plugin
+        self.active = True  # Control whether the plugin is active or not
+        if PROFILE_ENABLED:
+            self.enable_profiling()
+            if PROFILE_CAPTURE_FRAMES:
+                self.capture_profile(PROFILE_CAPTURE_FRAMES,
+                                     os.path.join(os.environ.get(PROFILE_DIR_ENV, '.'), f'{plugin_id}.prof'))
+
+    def enable_profiling(self, trace_memory=True):
+        """
+        Record timing histograms (and allocations, with trace_memory) of update and draw.
+        Hosts call this, or set the ALGO_PLUGIN_PROFILE environment variable.
+        """
+        if self._profile is None:
+            self._profile = PluginProfile(trace_memory)
+        return self._profile
+
+    def disable_profiling(self):
+        if self._profile is not None:
+            self._profile.close()
+            self._profile = None
+
+    def capture_profile(self, frames, path):
+        """
+        Run cProfile over the update and draw calls of the next frames frames, then dump it
+        to path (read it with pstats or snakeviz). Enables profiling if needed.
+        """
+        self.enable_profiling().start_capture(frames, path)
+
+    def profile_stats(self):
+        """Per-method summaries (calls, mean/p50/p95/p99/max ms, allocations, histogram), or None when off."""
+        return None if self._profile is None else self._profile.stats()
+
+    def update(self, events, delta_time):
+        """
+        Update the game logic. This will be called by the main loop.
+        :param events: List of Pygame events.
+        :param delta_time: Time elapsed since the last frame (to make movements frame rate independent).
+        """
+        raise NotImplementedError("The 'update' method must be implemented by the plugin.")
+
+    def draw(self, surface):
+        """
+        Draw the plugin content on the provided Pygame surface.
+        :param surface: Pygame surface where the plugin should render its output.
+        """
+        raise NotImplementedError("The 'draw' method must be implemented by the plugin.")
@@ -0,0 +1,135 @@
+import numpy as np
+
+class PointStore:
+    """
+    Growable array of (x, y, label) rows. Capacity doubles when full, so appending is amortized
+    O(1) and xy/labels are views of the filled rows, not copies.
+    """
+
+    def __init__(self, capacity=64):
+        self._data = np.empty((capacity, 3))
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return iter(self._data[:self._size])
+
+    def append(self, x, y, label):
+        if self._size == len(self._data):
+            grown = np.empty((len(self._data) * 2, 3))
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size] = (x, y, label)
+        self._size += 1
+
+    @property
+    def xy(self):
+        return self._data[:self._size, :2]
+
+    @property
+    def labels(self):
+        return self._data[:self._size, 2].astype(int)
+
+class SortedValues:
+    """
+    Values of a stream kept in sorted order in a growable array, for exact quantiles. Adding a
+    value is a binary search and one block move, a few microseconds at the sizes the playground
+    reaches; reading a quantile is O(1) and matches np.percentile's linear interpolation. The
+    points are stored anyway, so this costs no more memory than they do.
+    """
+
+    def __init__(self, capacity=64):
+        self._data = np.empty(capacity)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, value):
+        if self._size == len(self._data):
+            grown = np.empty(len(self._data) * 2)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        index = np.searchsorted(self._data[:self._size], value, side='right')
+        # Overlapping slices: numpy copies through a buffer, so this shifts the tail by one.
+        self._data[index + 1:self._size + 1] = self._data[index:self._size]
+        self._data[index] = value
+        self._size += 1
+
+    def extend(self, values):
+        values = np.concatenate([self._data[:self._size], np.asarray(values, dtype=float)])
+        values.sort()
+        self._data = np.empty(max(64, len(values) * 2))
+        self._data[:len(values)] = values
+        self._size = len(values)
+
+    def quantile(self, q):
+        if not self._size:
+            return float('nan')
+        position = (self._size - 1) * q
+        lower = int(position)
+        upper = min(lower + 1, self._size - 1)
+        return float(self._data[lower] + (self._data[upper] - self._data[lower]) * (position - lower))
+
+class StreamingStats:
+    """
+    Per-axis mean and standard deviation (Welford), min and max, updated in O(1) per point, and
+    the exact median and interquartile range, from a SortedValues per axis.
+    """
+
+    def __init__(self, dimensions=2):
+        self.count = 0
+        self.mean = np.zeros(dimensions)
+        self._m2 = np.zeros(dimensions)
+        self.min = np.full(dimensions, np.inf)
+        self.max = np.full(dimensions, -np.inf)
+        self._sorted = [SortedValues() for _ in range(dimensions)]
+
+    def add(self, point):
+        point = np.asarray(point, dtype=float)
+        self.count += 1
+        delta = point - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (point - self.mean)
+        np.minimum(self.min, point, out=self.min)
+        np.maximum(self.max, point, out=self.max)
+        for axis, value in enumerate(point):
+            self._sorted[axis].add(value)
+
+    def extend(self, points):
+        points = np.asarray(points, dtype=float).reshape(-1, len(self.mean))
+        if not len(points):
+            return
+        # Chan et al.'s pairwise update merges the batch's mean and M2 into the running ones.
+        count = self.count + len(points)
+        batch_mean = points.mean(axis=0)
+        delta = batch_mean - self.mean
+        self._m2 += ((points - batch_mean) ** 2).sum(axis=0) + delta ** 2 * self.count * len(points) / count
+        self.mean += delta * len(points) / count
+        self.count = count
+        np.minimum(self.min, points.min(axis=0), out=self.min)
+        np.maximum(self.max, points.max(axis=0), out=self.max)
+        for axis, values in enumerate(points.T):
+            self._sorted[axis].extend(values)
+
+    @property
+    def std(self):
+        """Population standard deviation, like np.std."""
+        return np.sqrt(self._m2 / self.count) if self.count else np.full_like(self.mean, np.nan)
+
+    def quantile(self, q):
+        return np.array([axis.quantile(q) for axis in self._sorted])
+
+    @property
+    def median(self):
+        return self.quantile(0.5)
+
+    @property
+    def iqr(self):
+        return self.quantile(0.75) - self.quantile(0.25)
+
+    def summary(self):
+        """(mean, median, std_dev, iqr, min_point, max_point), as calculate_statistics returns."""
+        return self.mean.copy(), self.median, self.std, self.iqr, self.min.copy(), self.max.copy()
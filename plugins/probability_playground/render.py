@@ -0,0 +1,60 @@
+import numpy as np
+import pygame
+
+class LayeredRenderer:
+    """
+    Keeps the playground's static content in one pre-composed frame: the scaled decision grid
+    with every point drawn on top. The background is rebuilt only when the grid array changes
+    and re-composed with the cached point layer; new points are stamped onto both with a
+    pre-rendered circle sprite, in a single Surface.blits call. Drawing a frame is then one
+    opaque blit plus whatever text goes on top.
+    """
+
+    def __init__(self, size, colors, radius=5, outline=1, outline_color=(0, 0, 0)):
+        """
+        :param colors: Fill colour per point label, e.g. {0: red, 1: blue}.
+        """
+        self.size = size
+        self.radius = radius + outline
+        self.sprites = {label: self._circle_sprite(color, radius, outline, outline_color)
+                        for label, color in colors.items()}
+        self.points = pygame.Surface(size, pygame.SRCALPHA)
+        self.frame = pygame.Surface(size)
+        self.background_source = None
+        self._text_cache = {}
+
+    def _circle_sprite(self, color, radius, outline, outline_color):
+        extent = radius + outline
+        sprite = pygame.Surface((extent * 2 + 1, extent * 2 + 1), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, tuple(int(c) for c in outline_color), (extent, extent), extent)
+        pygame.draw.circle(sprite, tuple(int(c) for c in color), (extent, extent), radius)
+        return sprite
+
+    def set_background(self, background, source):
+        """
+        Use background (a window-sized surface) from now on. source is the array it was built
+        from; callers check it against background_source to rebuild only on change.
+        """
+        self.background_source = source
+        self.frame.blit(background, (0, 0))
+        self.frame.blit(self.points, (0, 0))
+
+    def add_points(self, screen_points, labels):
+        """Stamp points, given as an (n, 2) array of screen coordinates, onto the point layer and frame."""
+        corners = np.asarray(screen_points, dtype=int) - self.radius
+        sequence = [(self.sprites[int(label)], (int(x), int(y))) for (x, y), label in zip(corners, labels)]
+        self.points.blits(sequence, doreturn=False)
+        self.frame.blits(sequence, doreturn=False)
+
+    def text(self, font, text, color):
+        """Render text once and reuse the surface while it doesn't change."""
+        key = (id(font), text, tuple(int(c) for c in color))
+        surface = self._text_cache.get(key)
+        if surface is None:
+            if len(self._text_cache) > 64:
+                self._text_cache.clear()
+            surface = self._text_cache[key] = font.render(text, True, key[2])
+        return surface
+
+    def draw(self, surface):
+        surface.blit(self.frame, (0, 0))
@@ -0,0 +1,41 @@
+import os
+import json
+import pytest
+
+PLUGIN_FILES = ['plugin.py', '__init__.py', 'requirements.txt', 'plugin_base.py']
+
+@pytest.fixture
+def make_plugin(tmp_path):
+    """
+    Factory writing a plugin directory and returning its path. The directory is taken relative
+    to the test's tmp_path, so it is removed with it.
+    By default the plugin has the files `create` makes, with some text, an assets/data.json and
+    a valid manifest.json.
+    :param manifest: Replaces the default manifest; fields given as keyword arguments are
+        added to it or override it.
+    :param files: Replaces the default files: a dict of relative path to str or bytes content.
+    """
+    def make(plugin_dir, plugin_name, manifest=None, files=None, **fields):
+        plugin_dir = os.path.join(tmp_path, plugin_dir)
+        if manifest is None:
+            manifest = {
+                "name": plugin_name,
+                "version": "1.0.0",
+                "game_version": "1.0",
+                "python_version": "3.8",
+                "dependencies": [],
+            }
+        manifest = dict(manifest, **fields)
+        if files is None:
+            files = {filename: f'# {plugin_name} {filename}\n' * 50 for filename in PLUGIN_FILES}
+            files['assets/data.json'] = json.dumps({"values": list(range(200))})
+        os.makedirs(plugin_dir, exist_ok=True)
+        for name, content in files.items():
+            path = os.path.join(plugin_dir, *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb' if isinstance(content, bytes) else 'w') as f:
+                f.write(content)
+        with open(os.path.join(plugin_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=4)
+        return plugin_dir
+    return make
@@ -0,0 +1,71 @@
+import os
+import shutil
+import pytest
+from algo_plugin.assets import CompiledAssets, compiled_assets_dir, pack_shelves, precompile_assets
+from algo_plugin.archive import DirectoryAssets
+
+def test_pack_shelves():
+    sizes = {'a': (60, 40), 'b': (50, 40), 'c': (30, 20), 'd': (100, 100)}
+    placements, atlases = pack_shelves(sizes, atlas_size=128, padding=0)
+
+    # Tallest first, new shelf when a row is full, new atlas when the atlas is full.
+    assert placements['d'] == (0, 0, 0)
+    assert placements['a'] == (1, 0, 0) and placements['b'] == (1, 60, 0)
+    assert placements['c'] == (1, 0, 40)
+    assert atlases == [(100, 100), (110, 60)]
+
+def test_precompile_and_load(tmp_path):
+    pygame = pytest.importorskip('pygame')
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.display.init()
+
+    temp_dir = str(tmp_path)
+    plugin_dir = os.path.join(temp_dir, 'plugin')
+    os.makedirs(os.path.join(plugin_dir, 'assets'))
+    sprite = pygame.Surface((8, 4), pygame.SRCALPHA)
+    sprite.fill((10, 20, 30, 40))
+    pygame.image.save(sprite, os.path.join(plugin_dir, 'assets', 'sprite.png'))
+
+    output_dir = os.path.join(temp_dir, 'compiled')
+    index, files = precompile_assets(plugin_dir, output_dir)
+    assert index['images']['sprite.png']['rect'] == [0, 0, 8, 4]
+    assert [arcname for arcname, _ in files] == ['assets/_compiled/index.json', 'assets/_compiled/atlas-0.rgba']
+
+    # Unchanged assets are not compiled again.
+    mtime = os.stat(os.path.join(output_dir, 'atlas-0.rgba')).st_mtime_ns
+    precompile_assets(plugin_dir, output_dir)
+    assert os.stat(os.path.join(output_dir, 'atlas-0.rgba')).st_mtime_ns == mtime
+
+    shutil.copytree(output_dir, os.path.join(plugin_dir, 'assets', '_compiled'))
+    image = CompiledAssets(DirectoryAssets(plugin_dir)).image('sprite.png')
+    assert image.get_size() == (8, 4)
+    assert tuple(image.get_at((3, 2))) == (10, 20, 30, 40)
+
+def test_compiled_assets_follow_cache_entry(tmp_path, make_plugin):
+    pygame = pytest.importorskip('pygame')
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.display.init()
+    from algo_plugin.build_cache import prune_cache
+    from algo_plugin.cli import zip_directory
+
+    temp_dir = str(tmp_path)
+    cache_dir = os.path.join(temp_dir, 'cache')
+    plugin_dir = make_plugin(os.path.join('checkout-1', 'plugin'), 'Sprites', files={})
+    os.makedirs(os.path.join(plugin_dir, 'assets'))
+    pygame.image.save(pygame.Surface((8, 4)), os.path.join(plugin_dir, 'assets', 'sprite.png'))
+    assert zip_directory(plugin_dir, os.path.join(temp_dir, 'one.zip'), cache_dir=cache_dir, precompile=True)
+    compiled_dir = compiled_assets_dir(cache_dir, 'Sprites')
+    mtime = os.stat(os.path.join(compiled_dir, 'atlas-0.rgba')).st_mtime_ns
+
+    # Another checkout of the same plugin uses the same compiled assets.
+    shutil.copytree(os.path.join(temp_dir, 'checkout-1'), os.path.join(temp_dir, 'checkout-2'))
+    shutil.rmtree(os.path.join(temp_dir, 'checkout-1'))
+    assert zip_directory(os.path.join(temp_dir, 'checkout-2', 'plugin'), os.path.join(temp_dir, 'two.zip'),
+                         cache_dir=cache_dir, precompile=True)
+    assert os.listdir(os.path.dirname(compiled_dir)) == [os.path.basename(compiled_dir)]
+    assert os.stat(os.path.join(compiled_dir, 'atlas-0.rgba')).st_mtime_ns == mtime
+
+    # Folders without a cache entry, such as those of removed plugins, are pruned.
+    shutil.copytree(compiled_dir, compiled_assets_dir(cache_dir, 'Removed'))
+    assert prune_cache(cache_dir) == {'archives': 0, 'folders': 1}
+    assert os.listdir(os.path.dirname(compiled_dir)) == [os.path.basename(compiled_dir)]
@@ -0,0 +1,50 @@
+import pytest
+from algo_plugin.bench import compare_to_baseline, percentile, run_benchmark
+
+PLUGIN = '''
+import pygame
+from plugin_base import PluginBase
+
+class CountingPlugin(PluginBase):
+    def __init__(self, screen):
+        super().__init__("counting")
+        self.keys = []
+        self.clicks = 0
+
+    def update(self, events, delta_time):
+        for event in events:
+            if event.type == pygame.KEYDOWN:
+                self.keys.append(event.key)
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                self.clicks += 1
+
+    def draw(self, surface):
+        surface.fill((self.clicks % 256, 0, 0))
+'''
+
+def test_percentile():
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert percentile(values, 0.5) == 3.0
+    assert percentile(values, 0.95) == pytest.approx(4.8)
+    assert percentile([], 0.5) == 0.0
+
+def test_compare_to_baseline():
+    baseline = {'update': {'p50_ms': 1.0, 'p95_ms': 2.0, 'p99_ms': 3.0}, 'draw': {'p50_ms': 1.0, 'p95_ms': 1.0, 'p99_ms': 1.0}}
+    result = {'update': {'p50_ms': 1.05, 'p95_ms': 2.5, 'p99_ms': 3.0}, 'draw': {'p50_ms': 1.0, 'p95_ms': 1.0, 'p99_ms': 1.01}}
+    assert compare_to_baseline(result, baseline, tolerance=0.1) == ['update p95 went from 2.000 ms to 2.500 ms (+25%)']
+
+def test_run_benchmark(make_plugin):
+    pytest.importorskip('pygame')
+    plugin_dir = make_plugin('plugin', 'CountingPlugin', entry_point='plugin:CountingPlugin', files={
+        'plugin_base.py': 'class PluginBase:\n    def __init__(self, plugin_id):\n        self.plugin_id = plugin_id\n',
+        'plugin.py': PLUGIN,
+    })
+
+    script = {'frames': 10, 'events': [
+        {'frame': 0, 'type': 'KEYDOWN', 'key': 'K_r'},
+        {'frame': 5, 'type': 'MOUSEBUTTONDOWN', 'pos': [10, 20], 'button': 1},
+    ]}
+    result = run_benchmark(plugin_dir, script=script, frames=40, warmup=0, size=(64, 64))
+
+    assert result['update']['calls'] == result['draw']['calls'] == 40
+    assert 0 <= result['draw']['p50_ms'] <= result['draw']['p95_ms'] <= result['draw']['p99_ms'] <= result['draw']['max_ms']
@@ -0,0 +1,120 @@
+import os
+import shutil
+import zipfile
+import pytest
+from algo_plugin import build_cache
+from algo_plugin.build_cache import build_archive, prune_cache
+
+def read_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def test_build_archive_is_reproducible(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    plugin_dir = os.path.join(temp_dir, 'plugin')
+    make_plugin(plugin_dir, 'TestPlugin')
+
+    first = os.path.join(temp_dir, 'first.zip')
+    second = os.path.join(temp_dir, 'second.zip')
+    build_archive(plugin_dir, first)
+    os.utime(os.path.join(plugin_dir, 'plugin.py'), (0, 0))
+    build_archive(plugin_dir, second)
+
+    assert read_bytes(first) == read_bytes(second)
+    with zipfile.ZipFile(first) as zip_file:
+        names = zip_file.namelist()
+        assert names == sorted(names)
+        assert 'assets/data.json' in names
+        assert all(info.date_time == (1980, 1, 1, 0, 0, 0) for info in zip_file.infolist())
+
+def test_build_archive_cache_skips_and_reuses(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    plugin_dir = os.path.join(temp_dir, 'plugin')
+    cache_dir = os.path.join(temp_dir, 'cache')
+    output = os.path.join(temp_dir, 'plugin.zip')
+    make_plugin(plugin_dir, 'TestPlugin')
+
+    assert build_archive(plugin_dir, output, cache_dir=cache_dir)['status'] == 'built'
+    assert build_archive(plugin_dir, output, cache_dir=cache_dir)['status'] == 'unchanged'
+
+    # A fresh output location (e.g. a clean CI checkout) is served from the cache.
+    other_output = os.path.join(temp_dir, 'dist', 'plugin.zip')
+    assert build_archive(plugin_dir, other_output, cache_dir=cache_dir)['status'] == 'unchanged'
+    assert read_bytes(other_output) == read_bytes(output)
+
+    with open(os.path.join(plugin_dir, 'plugin.py'), 'a') as f:
+        f.write('# changed\n')
+    build = build_archive(plugin_dir, output, cache_dir=cache_dir)
+    assert build == {'status': 'built', 'reused': 5, 'compressed': 1}
+
+    # Reusing compressed members gives the same bytes as compressing everything again.
+    fresh = os.path.join(temp_dir, 'fresh.zip')
+    build_archive(plugin_dir, fresh)
+    assert read_bytes(fresh) == read_bytes(output)
+    with zipfile.ZipFile(output) as zip_file:
+        assert zip_file.testzip() is None
+        assert zip_file.read('plugin.py').endswith(b'# changed\n')
+
+def test_build_cache_hits_from_another_checkout(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    cache_dir = os.path.join(temp_dir, 'cache')
+    make_plugin(os.path.join(temp_dir, 'checkout-1', 'plugin'), 'TestPlugin')
+    assert build_archive(os.path.join(temp_dir, 'checkout-1', 'plugin'), os.path.join(temp_dir, 'one.zip'),
+                         cache_dir=cache_dir)['status'] == 'built'
+
+    # The same plugin at another path (a fresh CI checkout, new mtimes) uses the same entry.
+    shutil.copytree(os.path.join(temp_dir, 'checkout-1'), os.path.join(temp_dir, 'checkout-2'))
+    shutil.rmtree(os.path.join(temp_dir, 'checkout-1'))
+    build = build_archive(os.path.join(temp_dir, 'checkout-2', 'plugin'), os.path.join(temp_dir, 'two.zip'),
+                          cache_dir=cache_dir)
+    assert build['status'] == 'unchanged'
+    assert read_bytes(os.path.join(temp_dir, 'one.zip')) == read_bytes(os.path.join(temp_dir, 'two.zip'))
+
+def test_prune_cache_keeps_referenced_archives(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    cache_dir = os.path.join(temp_dir, 'cache')
+    objects_dir = os.path.join(cache_dir, 'objects')
+    make_plugin(os.path.join(temp_dir, 'one'), 'TestPlugin')
+    shutil.copytree(os.path.join(temp_dir, 'one'), os.path.join(temp_dir, 'two'))
+
+    # Two plugins with identical contents share one cached archive.
+    build_archive(os.path.join(temp_dir, 'one'), os.path.join(temp_dir, 'one.zip'), cache_dir=cache_dir, cache_key='one')
+    build_archive(os.path.join(temp_dir, 'two'), os.path.join(temp_dir, 'two.zip'), cache_dir=cache_dir, cache_key='two')
+    assert len(os.listdir(objects_dir)) == 1
+
+    # Rebuilding one of them keeps the shared archive, which 'two' still refers to.
+    with open(os.path.join(temp_dir, 'one', 'plugin.py'), 'a') as f:
+        f.write('# changed\n')
+    build_archive(os.path.join(temp_dir, 'one'), os.path.join(temp_dir, 'one.zip'), cache_dir=cache_dir, cache_key='one')
+    assert len(os.listdir(objects_dir)) == 2
+    assert prune_cache(cache_dir) == {'archives': 0, 'folders': 0}
+
+
+    # Once 'two' changes too, nothing refers to the shared archive and pruning removes it.
+    with open(os.path.join(temp_dir, 'two', 'plugin.py'), 'a') as f:
+        f.write('# changed again\n')
+    build_archive(os.path.join(temp_dir, 'two'), os.path.join(temp_dir, 'two.zip'), cache_dir=cache_dir, cache_key='two')
+    assert prune_cache(cache_dir) == {'archives': 1, 'folders': 0}
+    assert len(os.listdir(objects_dir)) == 2
+    with zipfile.ZipFile(os.path.join(temp_dir, 'two.zip')) as zip_file:
+        assert zip_file.read('plugin.py').endswith(b'# changed again\n')
+
+def test_build_without_raw_writes_gives_same_archive(tmp_path, make_plugin, monkeypatch):
+    temp_dir = str(tmp_path)
+    plugin_dir = os.path.join(temp_dir, 'plugin')
+    cache_dir = os.path.join(temp_dir, 'cache')
+    output = os.path.join(temp_dir, 'plugin.zip')
+    make_plugin(plugin_dir, 'TestPlugin')
+    build_archive(plugin_dir, output, cache_dir=cache_dir)
+    with open(os.path.join(plugin_dir, 'plugin.py'), 'a') as f:
+        f.write('# changed\n')
+    fresh = os.path.join(temp_dir, 'fresh.zip')
+    build_archive(plugin_dir, fresh)
+
+    # On a Python whose ZipFile internals haven't been checked, every member is compressed again.
+    monkeypatch.setattr(build_cache, 'RAW_WRITE_PYTHON', ((3, 0), (3, 0)))
+    assert build_archive(plugin_dir, output, cache_dir=cache_dir) == {'status': 'built', 'reused': 0, 'compressed': 6}
+    assert read_bytes(fresh) == read_bytes(output)
+    with zipfile.ZipFile(output) as zip_file:
+        with pytest.raises(RuntimeError):
+            build_cache.write_raw_member(zip_file, zip_file.getinfo('plugin.py'), b'')
@@ -0,0 +1,66 @@
+import os
+import zipfile
+import pytest
+from algo_plugin import build_cache
+from algo_plugin.bundle import create_bundle, extract_bundle
+from algo_plugin.cli import bundle_plugins
+
+# plugin_base.py and data.bin are the same in every plugin; only the manifests differ.
+FILES = {
+    'plugin_base.py': 'class PluginBase:\n    pass\n' * 50,
+    'assets/data.bin': bytes(range(256)) * 64,
+}
+
+def test_bundle_stores_shared_files_once(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    plugins = []
+    for name in ['one', 'two', 'three']:
+        make_plugin(os.path.join(temp_dir, 'src', name), name, files=FILES)
+        plugins.append((name, os.path.join(temp_dir, 'src', name)))
+    bundle_path = os.path.join(temp_dir, 'plugins.bundle')
+
+    stats = create_bundle(plugins, bundle_path, workers=2)
+    # plugin_base.py and data.bin are shared; the three manifests differ.
+    assert (stats['plugins'], stats['files'], stats['blobs']) == (3, 9, 5)
+    with zipfile.ZipFile(bundle_path) as zip_file:
+        assert len([name for name in zip_file.namelist() if name.startswith('blobs/')]) == 5
+        assert zip_file.testzip() is None
+
+    result = extract_bundle(bundle_path, os.path.join(temp_dir, 'out'), plugins=['two'], workers=2)
+    assert result['plugins'] == ['two']
+    assert os.listdir(os.path.join(temp_dir, 'out')) == ['two']
+    for name in ['manifest.json', 'plugin_base.py', os.path.join('assets', 'data.bin')]:
+        with open(os.path.join(temp_dir, 'src', 'two', name), 'rb') as source, \
+                open(os.path.join(temp_dir, 'out', 'two', name), 'rb') as unpacked:
+            assert source.read() == unpacked.read()
+
+    with pytest.raises(ValueError):
+        extract_bundle(bundle_path, os.path.join(temp_dir, 'out'), plugins=['four'])
+
+def test_bundle_without_raw_writes_gives_same_bytes(tmp_path, make_plugin, monkeypatch):
+    temp_dir = str(tmp_path)
+    plugins = []
+    for name in ['one', 'two']:
+        make_plugin(os.path.join(temp_dir, 'src', name), name, files=FILES)
+        plugins.append((name, os.path.join(temp_dir, 'src', name)))
+    create_bundle(plugins, os.path.join(temp_dir, 'raw.bundle'), workers=2)
+    monkeypatch.setattr(build_cache, 'RAW_WRITE_PYTHON', ((3, 0), (3, 0)))
+    create_bundle(plugins, os.path.join(temp_dir, 'plain.bundle'), workers=2)
+
+    with open(os.path.join(temp_dir, 'raw.bundle'), 'rb') as raw, open(os.path.join(temp_dir, 'plain.bundle'), 'rb') as plain:
+        assert raw.read() == plain.read()
+
+def test_bundle_rejects_clashing_plugin_names(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    plugins_root = os.path.join(temp_dir, 'plugins')
+    for relative in [os.path.join('group', 'two'), 'group_two', 'one']:
+        make_plugin(os.path.join(plugins_root, relative), os.path.basename(relative), files=FILES)
+    bundle_path = os.path.join(temp_dir, 'plugins.bundle')
+
+    # group/two and group_two would both be unbundled into group_two/.
+    assert bundle_plugins(plugins_root, bundle_path, workers=2) is None
+    assert not os.path.exists(bundle_path)
+    with pytest.raises(ValueError):
+        create_bundle([('group_two', os.path.join(plugins_root, 'group', 'two')),
+                       ('group_two', os.path.join(plugins_root, 'group_two'))], bundle_path)
+    assert not os.path.exists(bundle_path)
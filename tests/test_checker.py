@@ -0,0 +1,53 @@
+import os
+import json
+import time
+import xml.etree.ElementTree as ET
+from algo_plugin import checker
+
+def test_check_plugin(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    good_dir = os.path.join(temp_dir, 'good')
+    bad_dir = os.path.join(temp_dir, 'bad')
+    make_plugin(good_dir, 'good')
+    make_plugin(bad_dir, 'bad')
+    os.remove(os.path.join(bad_dir, 'plugin_base.py'))
+    with open(os.path.join(bad_dir, 'notes.txt'), 'w') as f:
+        f.write('')
+    with open(os.path.join(bad_dir, 'manifest.json'), 'w') as f:
+        json.dump({"name": "bad", "version": "1.0.0", "game_version": "1.0"}, f)
+
+    good, bad = checker.check_many(checker.plugin_roots(temp_dir)[::-1], workers=2)
+
+    assert good['status'] == 'passed'
+    assert good['missing'] == good['unexpected'] == []
+    assert good['manifest_errors'] == {}
+    assert bad['status'] == 'failed'
+    assert bad['missing'] == ['plugin_base.py']
+    assert bad['unexpected'] == ['notes.txt']
+    assert bad['manifest_errors'] == {'python_version': ['missing required field']}
+
+    # Unexpected files alone are reported but don't fail the check.
+    os.remove(os.path.join(bad_dir, 'manifest.json'))
+    make_plugin(bad_dir, 'bad')
+    assert checker.check_plugin(bad_dir)['status'] == 'passed'
+
+def test_check_changed_since_and_reports(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    make_plugin(os.path.join(temp_dir, 'old'), 'old')
+    make_plugin(os.path.join(temp_dir, 'new'), 'new')
+    stamp = time.time() + 10
+    future = stamp + 10
+    for folder_name, subfolders, filenames in os.walk(os.path.join(temp_dir, 'new')):
+        for name in filenames + [folder_name]:
+            path = os.path.join(folder_name, name)
+            os.utime(path, (future, future))
+
+    results = checker.check_many(checker.plugin_roots(temp_dir), changed_since=stamp)
+    assert [(result['plugin'], result['status']) for result in results] == [('new', 'passed'), ('old', 'skipped')]
+
+    report = json.loads(checker.results_to_json(results))
+    assert report['summary'] == {'passed': 1, 'failed': 0, 'skipped': 1, 'total': 2}
+
+    suite = ET.fromstring(checker.results_to_junit(results))
+    assert suite.get('tests') == '2'
+    assert suite.find("testcase[@name='old']/skipped") is not None
@@ -0,0 +1,46 @@
+import os
+import json
+import zipfile
+import pytest
+from algo_plugin.build_cache import build_archive
+from algo_plugin.compression import AUTO, CompressionPolicy, load_policy, parse_method, parse_rule
+
+def test_parse_method():
+    assert parse_method('stored') == (zipfile.ZIP_STORED, None)
+    assert parse_method('deflate:9') == (zipfile.ZIP_DEFLATED, 9)
+    assert parse_method('LZMA') == (zipfile.ZIP_LZMA, None)
+    assert parse_method('auto') == AUTO
+    with pytest.raises(ValueError):
+        parse_method('deflate:10')
+    with pytest.raises(ValueError):
+        parse_method('lzma:3')
+    with pytest.raises(ValueError):
+        parse_method('zstd')
+
+def test_policy_rules():
+    policy = load_policy(rules=['size>1MB=lzma', 'assets/*.dat=auto'])
+    assert policy.method_for('assets/image.png', 10) == (zipfile.ZIP_STORED, None)
+    assert policy.method_for('plugin.py', 10) == (zipfile.ZIP_DEFLATED, None)
+    assert policy.method_for('plugin.py', 2 * 1024 * 1024) == (zipfile.ZIP_LZMA, None)
+    assert policy.method_for('assets/level.dat', 10) == AUTO
+    assert parse_rule('.png,.MP3=stored') == {'method': 'stored', 'extensions': ['.png', '.MP3']}
+    assert policy.method_for('assets/SOUND.MP3', 10) == (zipfile.ZIP_STORED, None)
+
+def test_auto_stores_incompressible_files(tmp_path):
+    temp_dir = str(tmp_path)
+    plugin_dir = os.path.join(temp_dir, 'plugin')
+    os.makedirs(os.path.join(plugin_dir, 'assets'))
+    with open(os.path.join(plugin_dir, 'manifest.json'), 'w') as f:
+        json.dump({"name": "TestPlugin", "version": "1.0.0"}, f)
+    with open(os.path.join(plugin_dir, 'assets', 'noise.bin'), 'wb') as f:
+        f.write(os.urandom(4096))
+    with open(os.path.join(plugin_dir, 'assets', 'text.bin'), 'wb') as f:
+        f.write(b'abc' * 4096)
+
+    output = os.path.join(temp_dir, 'plugin.zip')
+    build_archive(plugin_dir, output, policy=CompressionPolicy(default='auto', auto_method='deflate:9'))
+
+    with zipfile.ZipFile(output) as zip_file:
+        assert zip_file.getinfo('assets/noise.bin').compress_type == zipfile.ZIP_STORED
+        assert zip_file.getinfo('assets/text.bin').compress_type == zipfile.ZIP_DEFLATED
+        assert zip_file.testzip() is None
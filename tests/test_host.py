@@ -0,0 +1,80 @@
+import os
+import time
+import pytest
+
+class CountingPlugin:
+    def __init__(self, color, cost=0.0):
+        self.color = color
+        self.cost = cost
+        self.events = []
+        self.delta = 0.0
+        self.updates = 0
+
+    def update(self, events, delta_time):
+        self.events.extend(events)
+        self.delta += delta_time
+        self.updates += 1
+        time.sleep(self.cost)
+
+    def draw(self, surface):
+        surface.fill(self.color)
+
+def make_host(**kwargs):
+    pygame = pytest.importorskip('pygame')
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from algo_plugin.host import PluginHost
+    return pygame, PluginHost(pygame.Surface((200, 100)), **kwargs)
+
+def test_composite_and_route_events():
+    pygame, host = make_host()
+    left = host.add(CountingPlugin((255, 0, 0)), (0, 0, 100, 100), name='left')
+    right = host.add(CountingPlugin((0, 0, 255)), (100, 0, 100, 100), name='right')
+
+    click = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(150, 20), button=1)
+    key = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_r)
+    rects = host.frame([click, key], 0.016)
+
+    assert rects == [pygame.Rect(0, 0, 100, 100), pygame.Rect(100, 0, 100, 100)]
+    assert tuple(host.screen.get_at((50, 50)))[:3] == (255, 0, 0)
+    assert tuple(host.screen.get_at((150, 50)))[:3] == (0, 0, 255)
+    # The click is in the right plugin's coordinates and gives it the keyboard focus.
+    assert left.plugin.events == []
+    assert [event.type for event in right.plugin.events] == [pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN]
+    assert right.plugin.events[0].pos == (50, 20)
+    assert host.stats()['left']['surface_bytes'] == left.surface.get_pitch() * 100
+
+def test_over_budget_plugin_is_skipped():
+    pygame, host = make_host(frame_budget_ms=1000)
+    hooked = []
+    host.stats_hook = hooked.append
+    host.stats_interval = 4
+    slow = host.add(CountingPlugin((0, 0, 0), cost=0.02), (0, 0, 100, 100), name='slow', budget_ms=15)
+    fast = host.add(CountingPlugin((0, 0, 0)), (100, 0, 100, 100), name='fast', budget_ms=15)
+
+    event = pygame.event.Event(pygame.KEYDOWN, key=pygame.K_a)
+    rects = [host.frame([event], 0.01) for _ in range(4)]
+
+    # The slow plugin goes over its budget, so it sits out the next frame and only the fast
+    # plugin's rectangle is composited then.
+    assert rects[1] == [fast.rect]
+    stats = host.stats()
+    assert stats['slow']['updates'] == 2 and stats['slow']['skipped_frames'] == 2
+    assert stats['fast']['updates'] == 4 and stats['fast']['skipped_frames'] == 0
+    assert stats['slow']['max_update_ms'] >= 20
+    assert hooked == [stats]
+    # Events and time of skipped frames are kept for the next update.
+    assert len(slow.plugin.events) + len(slow.pending_events) == 4
+    assert slow.plugin.delta + slow.pending_delta == pytest.approx(0.04)
+
+def test_stats_reads_plugin_profile_once():
+    pygame, host = make_host()
+    plugin = CountingPlugin((0, 0, 0))
+    calls = []
+    plugin.profile_stats = lambda: calls.append(1) or {'update': {'calls': len(calls)}}
+    host.add(plugin, (0, 0, 100, 100), name='profiled')
+    host.add(CountingPlugin((0, 0, 0)), (100, 0, 100, 100), name='plain')
+
+    stats = host.stats()
+    assert stats['profiled']['profile'] == {'update': {'calls': 1}}
+    assert 'profile' not in stats['plain']
+    assert len(calls) == 1
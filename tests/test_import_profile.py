@@ -0,0 +1,43 @@
+from algo_plugin.import_profile import parse_importtime, profile_import
+
+PLUGIN = '''
+import pytest
+from plugin_base import PluginBase
+
+class SlowPlugin(PluginBase):
+    def __init__(self, screen):
+        super().__init__("slow")
+        self.data = [bytes(1024) for _ in range(2048)]
+'''
+
+def test_parse_importtime():
+    lines = [
+        'import time: self [us] | cumulative | imported package',
+        'import time:        10 |         10 |     c',
+        'import time:        20 |         30 |   b',
+        'import time:         5 |          5 |   d',
+        'import time:       100 |        135 | a',
+        'import time:         7 |          7 | e',
+    ]
+    a, e = parse_importtime(lines)
+    assert (a['module'], a['cumulative_us'], e['module']) == ('a', 135, 'e')
+    assert [child['module'] for child in a['children']] == ['b', 'd']
+    assert a['children'][0]['children'][0]['module'] == 'c'
+
+def test_profile_import(make_plugin):
+    plugin_dir = make_plugin(
+        'plugin', 'SlowPlugin', dependencies=["pytest"], entry_point="plugin:SlowPlugin",
+        startup_budget={"import_ms": 100000, "peak_memory_mb": 0.5}, files={
+            'plugin_base.py': 'class PluginBase:\n    def __init__(self, plugin_id):\n        self.plugin_id = plugin_id\n',
+            'plugin.py': PLUGIN,
+        })
+
+    result = profile_import(plugin_dir)
+
+    assert result['plugin'] == 'SlowPlugin'
+    assert result['dependencies']['pytest']['cumulative_us'] > 0
+    assert 'pytest' in result['dependencies']['pytest']['modules']
+    assert result['dependencies']['(plugin)']['modules'] == ['plugin_base']
+    assert result['construct']['peak_traced_bytes'] > 2 * 1024 * 1024
+    assert len(result['violations']) == 1
+    assert result['violations'][0].startswith('peak traced memory')
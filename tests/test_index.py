@@ -0,0 +1,53 @@
+import os
+import json
+import shutil
+import zipfile
+from algo_plugin.index import PluginIndex
+
+def test_index_queries(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    plugins_root = os.path.join(temp_dir, 'plugins')
+    make_plugin(os.path.join(plugins_root, 'one'), 'one', files={}, game_version='1.5.2', dependencies=['numpy', 'scikit-learn>=1.0'])
+    make_plugin(os.path.join(plugins_root, 'two'), 'two', files={}, game_version='1.5', dependencies=['pygame'])
+    make_plugin(os.path.join(plugins_root, 'three'), 'three', files={}, game_version='1.50.0', dependencies=['Scikit_Learn'])
+    with zipfile.ZipFile(os.path.join(plugins_root, 'four.zip'), 'w') as zip_file:
+        zip_file.writestr('manifest.json', json.dumps({
+            "name": "four", "version": "2.0.0", "game_version": "1.4.1", "python_version": "3.8", "dependencies": []}))
+
+    with PluginIndex(os.path.join(temp_dir, 'index.sqlite')) as index:
+        counts = index.update(plugins_root)
+        assert (counts['added'], counts['errors']) == (4, [])
+
+        names = lambda plugins: [plugin['name'] for plugin in plugins]
+        assert names(index.query()) == ['four', 'one', 'three', 'two']
+        assert names(index.query(game_version='1.5.x')) == ['one', 'two']
+        assert names(index.query(game_version='1.*.1')) == ['four']
+        assert names(index.query(depends_on='scikit-learn')) == ['one', 'three']
+        assert names(index.query(depends_on='scikit-learn', game_version='1.5.x')) == ['one']
+        assert index.get('four')[0]['kind'] == 'archive'
+        # Dependencies keep their manifest order, and a dependency filter still lists them all.
+        dependencies = {plugin['name']: plugin['dependencies'] for plugin in index.query()}
+        assert dependencies == {'four': [], 'one': ['numpy', 'scikit-learn>=1.0'], 'three': ['Scikit_Learn'],
+                                'two': ['pygame']}
+        assert index.query(depends_on='scikit-learn')[0]['dependencies'] == ['numpy', 'scikit-learn>=1.0']
+
+def test_index_updates_incrementally(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    plugins_root = os.path.join(temp_dir, 'plugins')
+    index_path = os.path.join(temp_dir, 'index.sqlite')
+    make_plugin(os.path.join(plugins_root, 'one'), 'one', files={}, game_version='1.5.2', dependencies=[])
+    make_plugin(os.path.join(plugins_root, 'two'), 'two', files={}, game_version='1.5.2', dependencies=[])
+
+    with PluginIndex(index_path) as index:
+        index.update(plugins_root)
+
+    make_plugin(os.path.join(plugins_root, 'one'), 'one', files={}, game_version='1.6.0', dependencies=['numpy'])
+    shutil.rmtree(os.path.join(plugins_root, 'two'))
+    make_plugin(os.path.join(plugins_root, 'three'), 'three', files={}, game_version='1.5.2', dependencies=[])
+
+    with PluginIndex(index_path) as index:
+        counts = index.update(plugins_root)
+        assert (counts['added'], counts['updated'], counts['removed']) == (1, 1, 1)
+        assert index.update(plugins_root)['unchanged'] == 2
+        assert index.get('one')[0]['dependencies'] == ['numpy']
+        assert index.get('two') == []
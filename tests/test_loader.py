@@ -0,0 +1,150 @@
+import os
+import sys
+import shutil
+import zipfile
+import pytest
+from algo_plugin.loader import discover_plugin, discover_plugins, instantiate_plugin
+
+PLUGIN_BASE = '''
+class PluginBase:
+    def __init__(self, plugin_id):
+        self.plugin_id = plugin_id
+        self.active = True
+'''
+
+PLUGIN = '''
+import os
+from plugin_base import PluginBase
+
+# Import-time side effect the loader must not trigger during discovery.
+open(os.path.join(os.path.dirname(__file__), 'imported'), 'w').close()
+
+class {name}Plugin(PluginBase):
+    def __init__(self, screen):
+        super().__init__(plugin_id="{name}")
+        self.screen = screen
+'''
+
+def plugin_files(plugin_name):
+    return {'plugin_base.py': PLUGIN_BASE, 'plugin.py': PLUGIN.format(name=plugin_name)}
+
+def test_discovery_does_not_import(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    make_plugin(os.path.join(temp_dir, 'one'), 'One', files=plugin_files('One'), entry_point='plugin:OnePlugin')
+    make_plugin(os.path.join(temp_dir, 'two'), 'Two', files=plugin_files('Two'))
+
+    one, two = discover_plugins(temp_dir)
+    assert (one.entry_point, two.entry_point) == ('plugin:OnePlugin', 'plugin:TwoPlugin')
+    assert not one.loaded and not two.loaded
+    assert not os.path.exists(os.path.join(temp_dir, 'one', 'imported'))
+    assert not os.path.exists(os.path.join(temp_dir, 'two', 'imported'))
+
+def test_activate_keeps_plugins_apart(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    make_plugin(os.path.join(temp_dir, 'one'), 'One', files=plugin_files('One'), entry_point='plugin:OnePlugin')
+    make_plugin(os.path.join(temp_dir, 'two'), 'Two', files=plugin_files('Two'), entry_point='plugin:TwoPlugin')
+
+    first = discover_plugin(os.path.join(temp_dir, 'one')).activate(screen='screen')
+    second = discover_plugin(os.path.join(temp_dir, 'two')).activate(screen='screen')
+    assert (first.plugin_id, second.plugin_id) == ('One', 'Two')
+    assert first.screen == 'screen'
+    # Each plugin got its own plugin_base module, and neither is left in sys.modules.
+    assert type(first).__mro__[1] is not type(second).__mro__[1]
+    assert 'plugin_base' not in sys.modules and 'plugin' not in sys.modules
+
+def test_instantiate_plugin_signatures():
+    class NoArguments:
+        def __init__(self):
+            self.screen = None
+
+    class Keywords:
+        def __init__(self, **kwargs):
+            self.kwargs = kwargs
+
+    assert instantiate_plugin(NoArguments, screen='screen').screen is None
+    assert instantiate_plugin(Keywords, screen='screen', speed=2).kwargs == {'screen': 'screen', 'speed': 2}
+
+def test_activate_from_archive(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    plugin_dir = os.path.join(temp_dir, 'src', 'three')
+    make_plugin(plugin_dir, 'Three', files=plugin_files('Three'))
+    os.makedirs(os.path.join(plugin_dir, 'assets'))
+    with open(os.path.join(plugin_dir, 'assets', 'level.txt'), 'wb') as f:
+        f.write(b'stored level data')
+    with open(os.path.join(plugin_dir, 'plugin.py'), 'w') as f:
+        f.write(PLUGIN.format(name='Three').replace("open(os.path.join(os.path.dirname(__file__), 'imported'), 'w').close()", ''))
+    archive_path = os.path.join(temp_dir, 'three.zip')
+    with zipfile.ZipFile(archive_path, 'w') as zip_file:
+        for name in ['manifest.json', 'plugin_base.py', 'plugin.py', 'assets/level.txt']:
+            zip_file.write(os.path.join(plugin_dir, name), 'three/' + name, compress_type=zipfile.ZIP_STORED)
+    shutil.rmtree(os.path.join(temp_dir, 'src'))
+
+    spec, = discover_plugins(temp_dir)
+    assert spec.entry_point == 'plugin:ThreePlugin' and not spec.loaded
+    # Discovery read the manifest and closed the archive again.
+    assert spec._archive is None
+    plugin = spec.activate(screen='screen')
+    assert plugin.plugin_id == 'Three' and plugin.screen == 'screen'
+    assert 'plugin_base' not in sys.modules and 'plugin' not in sys.modules
+    # Nothing was extracted next to the archive.
+    assert os.listdir(temp_dir) == ['three.zip']
+
+    assets = spec.assets
+    assert assets.names() == ['level.txt']
+    view = assets.view('level.txt')
+    assert bytes(view) == b'stored level data' and view.readonly
+    with assets.open('level.txt') as stream:
+        assert stream.read(6) == b'stored'
+    view.release()
+    spec.close()
+    assert spec._archive is None
+    # The archive is reopened on the next use.
+    assert spec.assets.read('level.txt') == b'stored level data'
+    spec.close()
+
+def test_dotted_entry_point_from_archive(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    plugin_dir = os.path.join(temp_dir, 'src', 'dotted')
+    make_plugin(plugin_dir, 'Dotted', files=plugin_files('Dotted'), entry_point='pkg.main:DottedPlugin')
+    os.makedirs(os.path.join(plugin_dir, 'pkg'))
+    open(os.path.join(plugin_dir, 'pkg', '__init__.py'), 'w').close()
+    with open(os.path.join(plugin_dir, 'pkg', 'main.py'), 'w') as f:
+        f.write(PLUGIN.format(name='Dotted').replace("open(os.path.join(os.path.dirname(__file__), 'imported'), 'w').close()", ''))
+    # A root module with the same last name must not be picked up instead.
+    with open(os.path.join(plugin_dir, 'main.py'), 'w') as f:
+        f.write('raise ImportError("wrong main")\n')
+    archive_path = os.path.join(temp_dir, 'dotted.zip')
+    with zipfile.ZipFile(archive_path, 'w') as zip_file:
+        for name in ['manifest.json', 'plugin_base.py', 'main.py', 'pkg/__init__.py', 'pkg/main.py']:
+            zip_file.write(os.path.join(plugin_dir, name), 'dotted/' + name)
+
+    # The archive loads pkg/main.py, as the directory does.
+    for spec in [discover_plugin(plugin_dir), discover_plugin(archive_path)]:
+        assert spec.activate(screen='screen').plugin_id == 'Dotted'
+        assert spec.module.__file__.endswith(os.path.join('pkg', 'main.py'))
+    spec.close()
+
+    os.remove(os.path.join(plugin_dir, 'main.py'))
+    with zipfile.ZipFile(archive_path, 'w') as zip_file:
+        for name in ['manifest.json', 'plugin_base.py', 'pkg/__init__.py', 'pkg/main.py']:
+            zip_file.write(os.path.join(plugin_dir, name), 'dotted/' + name)
+    spec = discover_plugin(archive_path)
+    assert spec.activate(screen='screen').plugin_id == 'Dotted'
+    spec.close()
+
+def test_activate_playground():
+    pytest.importorskip('sklearn')
+    pytest.importorskip('scipy')
+    pygame = pytest.importorskip('pygame')
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.display.init()
+    pygame.font.init()
+
+    plugin_dir = os.path.join(os.path.dirname(__file__), '..', 'plugins', 'probability_playground')
+    spec = discover_plugin(plugin_dir)
+    surface = pygame.Surface((600, 600))
+    plugin = spec.activate(screen=surface)
+    assert type(plugin).__name__ == 'GameVisualizerPlugin' and plugin.screen is surface
+    plugin.update([], 0.016)
+    plugin.draw(surface)
+    assert 'plugin_base' not in sys.modules
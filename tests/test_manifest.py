@@ -0,0 +1,88 @@
+import os
+import json
+from algo_plugin.manifest import (MANIFEST_SCHEMA, ManifestCache, compile_schema, schema_fingerprint,
+                                  validate_manifest_data, validate_manifests)
+
+VALID_MANIFEST = {
+    "name": "TestPlugin",
+    "version": "1.0.0",
+    "description": "A plugin for TestPlugin.",
+    "game_version": "1.5.2",
+    "python_version": ">=3.8",
+    "dependencies": ["numpy", "scikit-learn>=1.0"],
+    "author": "Author",
+    "contact": "Contact",
+}
+
+def test_validate_manifest_data_collects_errors_per_field():
+    assert validate_manifest_data(VALID_MANIFEST) == {}
+    assert validate_manifest_data(dict(VALID_MANIFEST, python_version="3.8")) == {}
+
+    manifest = dict(VALID_MANIFEST, version="1.0", python_version="three", dependencies=["numpy", 7, "bad name"])
+    del manifest["game_version"]
+    errors = validate_manifest_data(manifest)
+    assert sorted(errors) == ["dependencies", "game_version", "python_version", "version"]
+    assert errors["game_version"] == ["missing required field"]
+    assert errors["dependencies"] == [
+        "item 1: must be a string",
+        "item 2: must be a requirement such as numpy or numpy>=1.20, got 'bad name'",
+    ]
+    assert validate_manifest_data(["not", "an", "object"]) == {"$": ["manifest must be a JSON object"]}
+
+def test_compile_schema():
+    validate = compile_schema({"count": {"type": int, "required": True}, "tags": {"type": list, "items": {"type": str}}})
+    assert validate({"count": 3, "tags": ["a"]}) == {}
+    assert validate({"count": True}) == {"count": ["must be an integer"]}
+    assert validate({"tags": "a"}) == {"count": ["missing required field"], "tags": ["must be a list"]}
+
+def test_validate_manifests_uses_cache(tmp_path):
+    temp_dir = str(tmp_path)
+    paths = []
+    for index in range(5):
+        path = os.path.join(temp_dir, f'plugin{index}', 'manifest.json')
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            json.dump(dict(VALID_MANIFEST, name=f"plugin{index}"), f)
+        paths.append(path)
+    with open(paths[0], 'w') as f:
+        f.write('{ not json')
+
+    cache_path = os.path.join(temp_dir, 'cache', 'manifests.json')
+    results = validate_manifests(paths, cache=ManifestCache(cache_path), workers=4)
+    assert list(results) == paths
+    assert list(results[paths[0]]) == ['$']
+    assert all(results[path] == {} for path in paths[1:])
+
+    # A cached result is returned without opening the file again.
+    cache = ManifestCache(cache_path)
+    os.chmod(paths[1], 0)
+    try:
+        if not os.access(paths[1], os.R_OK):
+            assert validate_manifests(paths[1:2], cache=cache) == {paths[1]: {}}
+    finally:
+        os.chmod(paths[1], 0o644)
+
+    # A changed file is validated again.
+    with open(paths[2], 'w') as f:
+        json.dump(dict(VALID_MANIFEST, version="2"), f)
+    assert list(validate_manifests(paths[2:3], cache=cache)[paths[2]]) == ['version']
+
+def test_cache_discarded_when_schema_changes(tmp_path):
+    temp_dir = str(tmp_path)
+    path = os.path.join(temp_dir, 'manifest.json')
+    with open(path, 'w') as f:
+        json.dump(VALID_MANIFEST, f)
+    cache_path = os.path.join(temp_dir, 'manifests.json')
+    validate_manifests([path], cache=ManifestCache(cache_path))
+    assert ManifestCache(cache_path).get(path, os.stat(path)) == {}
+
+    # A schema with a new field gives a different fingerprint, so old results are not used.
+    schema = dict(MANIFEST_SCHEMA, license={'type': str, 'required': True})
+    assert schema_fingerprint(schema) != schema_fingerprint(MANIFEST_SCHEMA)
+    assert ManifestCache(cache_path, schema=schema).entries == {}
+    assert ManifestCache(cache_path, schema=schema).get(path, os.stat(path)) is None
+
+    # So is a cache file written before fingerprints were recorded.
+    with open(cache_path, 'w') as f:
+        json.dump({os.path.realpath(path): [0, 0, {}]}, f)
+    assert ManifestCache(cache_path).entries == {}
@@ -0,0 +1,241 @@
+import os
+import time
+import threading
+import importlib.util
+import numpy as np
+import pytest
+
+PLAYGROUND = os.path.join(os.path.dirname(__file__), '..', 'plugins', 'probability_playground')
+
+def load(name):
+    # Helper modules of the playground plugin, loaded from their files without touching sys.path.
+    spec = importlib.util.spec_from_file_location(f'playground_{name}', os.path.join(PLAYGROUND, f'{name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def two_clusters(count=200):
+    rng = np.random.default_rng(42)
+    return np.vstack([rng.normal((-2, 8), 1.5, (count // 2, 2)), rng.normal((3, 1), 1.5, (count // 2, 2))])
+
+def test_point_store_grows():
+    point_store = load('point_store')
+    store = point_store.PointStore(capacity=2)
+    for index in range(5):
+        store.append(index, -index, index % 2)
+    assert len(store) == 5
+    assert store.xy.tolist() == [[index, -index] for index in range(5)]
+    assert store.labels.tolist() == [0, 1, 0, 1, 0]
+    assert [tuple(row) for row in store][4] == (4, -4, 0)
+
+def test_streaming_stats_match_numpy():
+    point_store = load('point_store')
+    points = two_clusters()
+    stats = point_store.StreamingStats()
+    stats.extend(points)
+    added = np.random.default_rng(0).uniform(-10, 10, (300, 2))
+    for point in added:
+        stats.add(point)
+
+    # Exact on two clusters too, where a median lands between them.
+    everything = np.vstack([points, added])
+    mean, median, std_dev, iqr, min_point, max_point = stats.summary()
+    np.testing.assert_allclose(mean, everything.mean(axis=0))
+    np.testing.assert_allclose(std_dev, everything.std(axis=0))
+    np.testing.assert_allclose(median, np.median(everything, axis=0))
+    np.testing.assert_allclose(iqr, np.subtract(*np.percentile(everything, [75, 25], axis=0)))
+    np.testing.assert_array_equal(min_point, everything.min(axis=0))
+    np.testing.assert_array_equal(max_point, everything.max(axis=0))
+
+def test_sorted_values_quantiles():
+    point_store = load('point_store')
+    values = point_store.SortedValues(capacity=1)
+    assert np.isnan(values.quantile(0.5))
+    samples = np.random.default_rng(1).normal(size=101)
+    for value in samples:
+        values.add(value)
+    for q in (0.0, 0.1, 0.25, 0.5, 0.9, 1.0):
+        assert values.quantile(q) == pytest.approx(np.percentile(samples, q * 100))
+
+def test_background_jobs_supersede():
+    background = load('background')
+    jobs = background.BackgroundJobs()
+    started, release = threading.Event(), threading.Event()
+
+    def slow(cancelled, value):
+        started.set()
+        release.wait(5)
+        background.raise_if_cancelled(cancelled)
+        return value
+
+    jobs.submit(slow, 'old')
+    assert started.wait(5)
+    jobs.submit(lambda cancelled, value: value, 'new')
+    assert jobs.busy
+    release.set()
+    # Only the newest job's result is handed back, once.
+    assert jobs.wait(5) == ('new', None)
+    assert jobs.poll() is None and not jobs.busy
+
+    def failing(cancelled):
+        raise ValueError('not fitted')
+
+    jobs.submit(failing)
+    result, error = jobs.wait(5)
+    assert result is None and isinstance(error, ValueError)
+    jobs.cancel()
+    assert jobs.poll() is None
+    jobs.shutdown()
+
+def activate_playground():
+    pytest.importorskip('sklearn')
+    pytest.importorskip('scipy')
+    pygame = pytest.importorskip('pygame')
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.display.init()
+    pygame.font.init()
+    from algo_plugin.loader import discover_plugin
+    surface = pygame.Surface((600, 600))
+    return pygame, discover_plugin(PLAYGROUND).activate(screen=surface), surface
+
+def wait_idle(plugin):
+    deadline = time.monotonic() + 30
+    while plugin.jobs.busy and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_learn_point_applies_finished_recompute():
+    pygame, plugin, surface = activate_playground()
+    plugin.select_classifier(plugin.ONLINE_CLASSIFIER)
+    wait_idle(plugin)
+    plugin.update([], 0.016)
+    assert plugin.model_key[0] == plugin.ONLINE_CLASSIFIER
+
+    # '+' queues a recompute at the new resolution. It finishes before the click is handled
+    # but after update() polled, so learn_point must swap it in before updating tiles.
+    plugin.update([pygame.event.Event(pygame.KEYDOWN, key=pygame.K_EQUALS)], 0.016)
+    wait_idle(plugin)
+    plugin.new_points.append(0.0, 0.0, 1)
+    plugin.data_version += 1
+    assert plugin.learn_point()
+    assert plugin.grid_cache.shape[:2] == (plugin.grid_resolution, plugin.grid_resolution)
+    assert plugin.model_key == plugin.cache_key(plugin.ONLINE_CLASSIFIER)
+    plugin.draw(surface)
+    plugin.jobs.shutdown()
+
+def test_online_model_trains_on_training_data():
+    pygame, plugin, surface = activate_playground()
+    plugin.select_classifier(plugin.ONLINE_CLASSIFIER)
+    wait_idle(plugin)
+    plugin.update([], 0.016)
+    click = lambda pos: pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+    # The first click moves from the training split to every point, like a refit would.
+    plugin.update([click((100, 100))], 0.016)
+    assert plugin.model.class_count_.sum() == len(plugin.training_data()[0]) == 201
+    # Clicks skipped while a recompute was pending are learned with the next one.
+    plugin.request_recompute(plugin.ONLINE_CLASSIFIER)
+    plugin.update([click((200, 200))], 0.016)
+    wait_idle(plugin)
+    plugin.update([click((300, 300))], 0.016)
+    assert plugin.model_key == plugin.cache_key(plugin.ONLINE_CLASSIFIER)
+    assert plugin.model.class_count_.sum() == len(plugin.training_data()[0]) == 203
+
+    # R finds the model in the cache; it is the one a refit on the same data gives.
+    online = plugin.model
+    plugin.update([pygame.event.Event(pygame.KEYDOWN, key=pygame.K_r)], 0.016)
+    assert plugin.model is online
+    refit = type(online)().fit(*plugin.training_data())
+    np.testing.assert_allclose(online.theta_, refit.theta_)
+    plugin.jobs.shutdown()
+
+def test_model_grid_cache_evicts_least_recently_used():
+    model_cache = load('model_cache')
+    cache = model_cache.ModelGridCache(max_bytes=3000)
+    grid = np.zeros(100)  # 800 bytes
+    for key in 'abc':
+        cache.put(key, None, grid, model_size=200)
+    assert cache.get('a') is not None  # 'b' is now the least recently used
+    cache.put('d', None, grid, model_size=200)
+    assert 'b' not in cache and list('acd') == [key for key in 'abcd' if key in cache]
+    assert cache.nbytes == 3000 and cache.hits == 1
+    assert cache.get('b') is None and cache.misses == 1
+
+    # The newest entry is kept even when it alone is over the limit.
+    cache.put('big', None, np.zeros(1000), model_size=0)
+    assert len(cache) == 1 and 'big' in cache
+
+def fitted(model_name):
+    pytest.importorskip('sklearn')
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.naive_bayes import GaussianNB
+    points = two_clusters()
+    labels = np.repeat([0, 1], len(points) // 2)
+    model = {'logistic': LogisticRegression(), 'bayes': GaussianNB()}[model_name]
+    return model.fit(points, labels), (-8.0, 9.0, -5.0, 14.0)
+
+def test_adaptive_grid_matches_uniform():
+    grid_eval = load('grid_eval')
+    model, bounds = fitted('logistic')
+    uniform = grid_eval.uniform_proba_grid(model, bounds, 200)
+    adaptive, model_points = grid_eval.adaptive_proba_grid(model, bounds, 200)
+
+    # Same classes everywhere, from a fraction of the model evaluations.
+    assert adaptive.shape == uniform.shape
+    assert np.array_equal(adaptive > 0.5, uniform > 0.5)
+    assert model_points < uniform.size / 4
+
+def test_chunked_grid_matches_direct_evaluation():
+    grid_eval = load('grid_eval')
+    model, bounds = fitted('logistic')
+    x_range, y_range = grid_eval.grid_axes(bounds, 70)
+    xx, yy = np.meshgrid(x_range, y_range)
+    direct = model.predict_proba(np.c_[xx.ravel(), yy.ravel()])[:, 1].reshape(70, 70)
+
+    # Chunks that don't divide the mesh evenly, on several threads and on one.
+    for workers in (3, 1):
+        chunked = grid_eval.chunked_proba_grid(model, bounds, 70, chunk_size=333, workers=workers)
+        np.testing.assert_allclose(chunked, direct)
+    starts = [start for start, _ in grid_eval.iter_grid_chunks(bounds, 70, chunk_size=333)]
+    assert starts == list(range(0, 4900, 333))
+
+def test_dirty_tiles_match_full_recompute():
+    pytest.importorskip('scipy')
+    from scipy.ndimage import gaussian_filter
+    grid_eval = load('grid_eval')
+    model, bounds = fitted('bayes')
+    resolution, tile = 100, 16
+    classes = (grid_eval.uniform_proba_grid(model, bounds, resolution) > 0.5).astype(int)
+    grid = gaussian_filter(classes.astype(float), sigma=1.0)
+
+    model.partial_fit([[0.0, 4.0]] * 20, [1] * 20)
+    dirty = grid_eval.dirty_tiles(model, bounds, classes, tile)
+    assert dirty.shape == (7, 7) and 0 < dirty.sum() < dirty.size
+    grid_eval.update_tiles(model, bounds, classes, dirty, tile)
+    grid_eval.resmooth_tiles(grid, classes.astype(float), dirty, tile)
+
+    expected = (grid_eval.uniform_proba_grid(model, bounds, resolution) > 0.5).astype(int)
+    np.testing.assert_array_equal(classes, expected)
+    np.testing.assert_allclose(grid, gaussian_filter(expected.astype(float), sigma=1.0))
+
+def test_layered_renderer_matches_direct_drawing():
+    pygame = pytest.importorskip('pygame')
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    render = load('render')
+    colors = {0: (255, 0, 0), 1: (0, 0, 255)}
+    renderer = render.LayeredRenderer((60, 40), colors, radius=4)
+    renderer.add_points([[10, 10], [40, 25]], [0, 1])
+    background = pygame.Surface((60, 40))
+    background.fill((200, 200, 200))
+    source = np.zeros(1)
+    renderer.set_background(background, source)
+    renderer.add_points([[30, 20]], [1])
+
+    # The same picture as drawing the background and then every point as outlined circles.
+    expected = background.copy()
+    for (x, y), label in (((10, 10), 0), ((40, 25), 1), ((30, 20), 1)):
+        pygame.draw.circle(expected, (0, 0, 0), (x, y), 5)
+        pygame.draw.circle(expected, colors[label], (x, y), 4)
+    frame = pygame.Surface((60, 40))
+    renderer.draw(frame)
+    assert pygame.image.tobytes(frame, 'RGB') == pygame.image.tobytes(expected, 'RGB')
+    assert renderer.background_source is source
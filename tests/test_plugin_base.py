@@ -0,0 +1,89 @@
+import os
+import pstats
+import types
+import tracemalloc
+from algo_plugin.cli import PLUGIN_BASE_TEMPLATE
+
+def load_template():
+    module = types.ModuleType('plugin_base')
+    exec(compile(PLUGIN_BASE_TEMPLATE, 'plugin_base.py', 'exec'), module.__dict__)
+    return module
+
+def make_profiled_plugin(module):
+    class Base(module.PluginBase):
+        def update(self, events, delta_time):
+            self.data = [0] * 1000
+
+    class Plugin(Base):
+        def __init__(self, screen):
+            super().__init__(plugin_id='test')
+            self.screen = screen
+
+        def update(self, events, delta_time):
+            # Calls through super() are measured once, as part of the outer call.
+            super().update(events, delta_time)
+
+        def draw(self, surface):
+            pass
+
+    return Plugin(screen=None)
+
+def test_profiling_off_by_default():
+    plugin = make_profiled_plugin(load_template())
+    plugin.update([], 0.016)
+    assert plugin.profile_stats() is None
+    assert plugin.update.__wrapped__.__name__ == 'update'
+
+def test_profiling_records_calls():
+    plugin = make_profiled_plugin(load_template())
+    plugin.enable_profiling()
+    for _ in range(5):
+        plugin.update([], 0.016)
+        plugin.draw(None)
+
+    stats = plugin.profile_stats()
+    assert stats['update']['calls'] == 5 and stats['draw']['calls'] == 5
+    assert sum(stats['update']['histogram_us']) == 5
+    assert 0 < stats['update']['p50_ms'] <= stats['update']['p99_ms']
+    assert stats['update']['max_peak_bytes'] >= 8000
+    plugin.disable_profiling()
+
+def test_profile_capture_from_environment(tmp_path):
+    output_dir = str(tmp_path)
+    os.environ['ALGO_PLUGIN_PROFILE'] = 'capture:3'
+    os.environ['ALGO_PLUGIN_PROFILE_DIR'] = output_dir
+    try:
+        plugin = make_profiled_plugin(load_template())
+    finally:
+        del os.environ['ALGO_PLUGIN_PROFILE'], os.environ['ALGO_PLUGIN_PROFILE_DIR']
+    for _ in range(4):
+        plugin.update([], 0.016)
+        plugin.draw(None)
+
+    path = os.path.join(output_dir, 'test.prof')
+    assert plugin.profile_stats()['captures'] == [path]
+    assert os.path.exists(path + '.memory.txt')
+    calls = [stat[0] for function, stat in pstats.Stats(path).stats.items() if function[2] == 'update']
+    assert calls == [3, 3]  # the outer and the inner update of 3 frames
+    plugin.disable_profiling()
+
+def test_malformed_capture_setting(capsys):
+    os.environ['ALGO_PLUGIN_PROFILE'] = 'capture:abc'
+    try:
+        plugin = make_profiled_plugin(load_template())
+    finally:
+        del os.environ['ALGO_PLUGIN_PROFILE']
+    assert 'Warning:' in capsys.readouterr().out
+    assert plugin.profile_stats()['captures'] == []
+    plugin.disable_profiling()
+
+def test_disable_stops_tracing():
+    assert not tracemalloc.is_tracing()
+    # Two plugins with their own copies of plugin_base.
+    first, second = make_profiled_plugin(load_template()), make_profiled_plugin(load_template())
+    first.enable_profiling()
+    second.enable_profiling()
+    first.disable_profiling()
+    assert tracemalloc.is_tracing()
+    second.disable_profiling()
+    assert not tracemalloc.is_tracing()
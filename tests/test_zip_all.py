@@ -0,0 +1,50 @@
+import os
+import zipfile
+from algo_plugin.cli import find_plugin_directories, zip_all
+
+def test_find_plugin_directories(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    make_plugin(os.path.join(temp_dir, 'one'), 'one')
+    make_plugin(os.path.join(temp_dir, 'group', 'two'), 'two')
+    os.makedirs(os.path.join(temp_dir, 'not_a_plugin'))
+
+    assert find_plugin_directories(temp_dir) == [
+        os.path.join(temp_dir, 'group', 'two'),
+        os.path.join(temp_dir, 'one'),
+    ]
+
+def test_zip_all_keeps_going_after_failure(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    plugins_root = os.path.join(temp_dir, 'plugins')
+    output_dir = os.path.join(temp_dir, 'dist')
+    make_plugin(os.path.join(plugins_root, 'good'), 'good')
+    make_plugin(os.path.join(plugins_root, 'bad'), 'bad', manifest={"name": "bad"})
+
+    results = zip_all(plugins_root, output_dir, workers=2)
+
+    by_name = {os.path.basename(result['directory']): result for result in results}
+    assert not by_name['bad']['ok']
+    assert 'Invalid manifest.json' in by_name['bad']['message']
+    assert by_name['good']['ok']
+    assert by_name['good']['input_bytes'] > 0
+    assert by_name['good']['output_bytes'] == os.path.getsize(os.path.join(output_dir, 'good.zip'))
+    with zipfile.ZipFile(os.path.join(output_dir, 'good.zip')) as zip_file:
+        assert 'plugin.py' in zip_file.namelist()
+    assert not os.path.exists(os.path.join(output_dir, 'bad.zip'))
+
+def test_zip_all_reports_clashing_archive_names(tmp_path, make_plugin):
+    temp_dir = str(tmp_path)
+    plugins_root = os.path.join(temp_dir, 'plugins')
+    output_dir = os.path.join(temp_dir, 'dist')
+    make_plugin(os.path.join(plugins_root, 'group', 'two'), 'two')
+    make_plugin(os.path.join(plugins_root, 'group_two'), 'group_two')
+    make_plugin(os.path.join(plugins_root, 'one'), 'one')
+
+    results = zip_all(plugins_root, output_dir, workers=2)
+
+    by_path = {os.path.relpath(result['directory'], plugins_root): result for result in results}
+    for relative in [os.path.join('group', 'two'), 'group_two']:
+        assert not by_path[relative]['ok']
+        assert 'would both be zipped' in by_path[relative]['message']
+    assert by_path['one']['ok']
+    assert sorted(os.listdir(output_dir)) == ['one.zip']